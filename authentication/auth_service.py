@@ -14,7 +14,6 @@ and returns a fully authenticated OpenAI client.
 
 from authentication import SessionManager
 from typing import Optional
-from openai import OpenAI
 
 
 class AuthenticationService:
@@ -72,6 +71,8 @@ class AuthenticationService:
         print("Authentication successful.")
 
         if self.client is None:
+            # Deferred until a client is needed: importing openai dominates cold starts.
+            from openai import OpenAI
             self.client = OpenAI(api_key=self.session_manager.api_key)
         self.correct_login = True
 
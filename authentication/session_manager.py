@@ -13,7 +13,6 @@ The SessionManager is implemented as a singleton to ensure a single shared sessi
 """
 
 import os
-from dotenv import load_dotenv
 
 
 class SessionManager:
@@ -62,6 +61,7 @@ class SessionManager:
         This method loads environment variables from the .env file,
         retrieves the API key using the key "API_KEY", and validates it.
         """
+        from dotenv import load_dotenv
         load_dotenv()
         self.api_key = os.getenv("API_KEY")
         self.is_authenticated = self.validate_api_key(self.api_key)
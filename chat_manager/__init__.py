@@ -1,6 +1,5 @@
 """
 ford begin_TODO
-- Avoid using wildcard imports to prevent namespace pollution; consider explicit imports.
 - Ensure consistency in naming conventions across submodules (e.g., consider renaming ChatUserMessage to ChatUserMessageHandler).
 - Consider renaming "handler" to "chat_manager_facade" for better clarity.
 end_todo
@@ -18,13 +17,35 @@ Submodules:
     - api_response: Handles raw API responses, determines necessary follow-up actions, and converts responses
       into internal formats.
     - client_action: Executes actions on the client side based on API responses and model tool calls.
-    - history_manager: Manages the storage and retrieval of the complete chat history.
+    - history_manager: Manages the storage and retrieval of the complete chat history,
+      and forks it into branches that share their common prefix.
     - handler: Provides the ChatManager facade for orchestrating the overall chat interactions.
+    - run_budget: Bounds the turns, tokens, cost and time of a get_response run.
+    - hedging: Duplicates slow requests to cut tail latency.
+    - responses_backend: Sends only the new messages of each turn through the Responses API.
+    - history_compactor: Summarizes and archives the stale messages of long conversations.
+    - run_checkpoint: Checkpoints the turns of get_response runs so they can be resumed.
+    - lifecycle_hooks: Calls registered callbacks at the steps of get_response runs.
+    - profiling_hook: Profiles a sample of runs under cProfile or tracemalloc.
+    - logprob_analytics: Scores the confidence, entropy, margin and agreement of many answers
+      from their logprobs with NumPy (the "analytics" extra).
+    - prompt_cache: Reuses the answers of near-duplicate single-turn prompts (MinHash and LSH).
+    - voting: Normalizes and votes on the candidate answers of a council or of n-way sampling.
 """
 
-from .chat_user_message import *
-from .chat_developer_message import *
-from .api_response import *
+from .chat_user_message import ChatUserMessage
+from .chat_developer_message import ChatDeveloperMessage
+from .api_response import APIResponse
+from .lifecycle_hooks import HookEvent, HookRegistry
 from .client_action import ClientAction
-from .history_manager import ChatHistory
+from .run_budget import RunBudget
+from .voting import answer_text, normalize_answer, majority_vote
+from .logprob_analytics import LogprobBatch
+from .hedging import HedgePolicy, LatencyTracker
+from .history_manager import ChatHistory, HistorySegment
+from .responses_backend import ResponsesBackend
+from .history_compactor import HistoryCompactor
+from .run_checkpoint import RunCheckpointer, RunState
+from .prompt_cache import PromptCache, CacheHit, normalize_prompt
+from .profiling_hook import ProfilingHook
 from .handler import ChatManager
@@ -19,7 +19,6 @@ Description:
 
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict
-from openai.types.chat import ChatCompletionMessageParam
 import json
 
 class APIResponse():
@@ -31,7 +30,7 @@ class APIResponse():
     converts the raw API response into a human-readable format.
     """
     
-    def __init__(self):
+    def __init__(self, choice_index: int = 0):
         """
         Initialize an APIResponse instance with default state.
 
@@ -41,7 +40,10 @@ class APIResponse():
             processed_content: The processed, human-readable content.
             raw_api_response: The raw response data from the API.
             call_tool_value (bool): Flag indicating whether a tool call is required.
+            choice_index (int): The choice of the raw API response this instance reads
+                (responses requested with n > 1 carry several choices).
         """
+        self.choice_index = choice_index
         self.message = None
         self.call_api_value = True 
         self.processed_content = None
@@ -62,9 +64,9 @@ class APIResponse():
         Extract and return the API message from the raw API response.
 
         Returns:
-            The API message from the first choice in the raw API response.
+            The API message from the selected choice in the raw API response.
         """
-        return self.raw_api_response.choices[0].message       
+        return self.raw_api_response.choices[self.choice_index].message       
         
 
     def readable(self):
@@ -76,10 +78,77 @@ class APIResponse():
         Returns:
             str: A formatted string representing the API message.
         """
-        message = self.raw_api_response.choices[0].message
+        message = self.get_api_message()
         self.processed_content = "role: " + message.role + "\n" + message.content
         return self.processed_content
 
+    def get_content(self) -> Optional[str]:
+        """
+        Return the text content of the selected choice, without the role prefix.
+
+        Returns:
+            Optional[str]: The content, or None if the choice only holds tool calls.
+        """
+        return self.get_api_message().content
+
+    @staticmethod
+    def split_choices(raw_api_response) -> List["APIResponse"]:
+        """
+        Build one APIResponse per choice of a raw API response (requested with n > 1).
+
+        Args:
+            raw_api_response: The raw API response data.
+
+        Returns:
+            List[APIResponse]: The handled responses, in choice order.
+        """
+        return [APIResponse(choice.index).handle_choice(raw_api_response)
+                for choice in raw_api_response.choices]
+
+    def handle_choice(self, raw_api_response) -> "APIResponse":
+        """
+        Process the raw API response like `handle`, always returning this instance.
+        """
+        self.handle(raw_api_response)
+        return self
+
+    def to_state(self) -> Dict:
+        """
+        Return the state of this instance as JSON-compatible values, for checkpoints.
+
+        Returns:
+            Dict: The flags, the selected message and the id and model of the response.
+        """
+        from helpers.json_codec import to_jsonable
+        message = self.get_api_message()
+        return {
+            "call_api": self.call_api_value,
+            "call_tool": self.call_tool_value,
+            "message": message if isinstance(message, dict) else to_jsonable(message),
+            "id": getattr(self.raw_api_response, "id", ""),
+            "model": getattr(self.raw_api_response, "model", ""),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "APIResponse":
+        """
+        Rebuild an instance saved with `to_state`. The raw API response is replaced
+        by a Chat Completions-shaped response holding only the selected message.
+
+        Args:
+            state (Dict): The saved state.
+
+        Returns:
+            APIResponse: The restored instance.
+        """
+        from chat_manager.responses_backend import completion_from_message
+        api_response = cls()
+        api_response.raw_api_response = completion_from_message(state["message"], state.get("id", ""),
+                                                                state.get("model", ""))
+        api_response.call_api_value = state["call_api"]
+        api_response.call_tool_value = state["call_tool"]
+        return api_response
+
     def required_action(self):
         """
         Determine if a client action (e.g., a tool call) is required.
@@ -107,7 +176,7 @@ class APIResponse():
         """
         self.raw_api_response = raw_api_response
         
-        if self.raw_api_response.choices[0].message.tool_calls is not None:
+        if self.get_api_message().tool_calls is not None:
             self.call_tool_value = True                
             self.call_api_value = True
             return raw_api_response                                    
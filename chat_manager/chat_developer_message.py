@@ -14,7 +14,10 @@ Description:
     as human-readable text for internal processing.
 """
 
-from openai.types.chat import ChatCompletionDeveloperMessageParam 
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionDeveloperMessageParam
 
 
 class ChatDeveloperMessage:
@@ -47,13 +50,12 @@ class ChatDeveloperMessage:
             ChatUserMessage: The instance with the processed API-compatible message.
         """
         # More preprocessing can be added in future implementations.
-        self.api_compatible_message = ChatCompletionDeveloperMessageParam(
-            role="developer", content=content
-        )
+        # A plain dict: ChatCompletionDeveloperMessageParam is a TypedDict.
+        self.api_compatible_message = {"role": "developer", "content": content}
 
         return self
 
-    def get_api_message(self) -> ChatCompletionDeveloperMessageParam:
+    def get_api_message(self) -> "ChatCompletionDeveloperMessageParam":
         """
         Retrieves the API-compatible message.
 
@@ -14,7 +14,11 @@ Description:
     as human-readable text for internal processing.
 """
 
-from openai.types.chat import ChatCompletionUserMessageParam, ChatCompletionMessageParam
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Type-only: importing openai's type modules at runtime costs most of the import time.
+    from openai.types.chat import ChatCompletionMessageParam
 
 
 class ChatUserMessage:
@@ -47,12 +51,11 @@ class ChatUserMessage:
             ChatUserMessage: The instance with the processed API-compatible message.
         """
         # More preprocessing can be added in future implementations.
-        self.api_compatible_message = ChatCompletionUserMessageParam(
-            role="user", content=content
-        )
+        # A plain dict: ChatCompletionUserMessageParam is a TypedDict.
+        self.api_compatible_message = {"role": "user", "content": content}
         return self
 
-    def get_api_message(self) -> ChatCompletionMessageParam:
+    def get_api_message(self) -> "ChatCompletionMessageParam":
         """
         Retrieves the API-compatible message.
 
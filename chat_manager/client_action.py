@@ -14,7 +14,21 @@ Description:
 """
 
 from chat_manager import APIResponse
-import json
+from tools import ToolArgumentError, ToolExecutionError
+from helpers.json_codec import codec
+from chat_manager.lifecycle_hooks import TOOL_STARTED, TOOL_FINISHED
+import time
+
+def _result_text(result):
+    """
+    Return the text sent to the model for a tool result: its JSON encoding,
+    or its string form if it cannot be encoded (e.g. a circular structure).
+    """
+    try:
+        return codec.dumps(result)
+    except (TypeError, ValueError):
+        return str(result)
+
 
 class ClientAction():
     """
@@ -40,6 +54,30 @@ class ClientAction():
         """
         return self.api_messages
                      
+    def to_state(self):
+        """
+        Return the state of this instance as JSON-compatible values, for checkpoints.
+
+        Returns:
+            dict: The tool result messages.
+        """
+        return {"api_messages": list(self.api_messages)}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuild an instance saved with `to_state`.
+
+        Args:
+            state (dict): The saved state.
+
+        Returns:
+            ClientAction: The restored instance.
+        """
+        client_action = cls()
+        client_action.api_messages = list(state["api_messages"])
+        return client_action
+
     def required(self, api_response):
         """
         Check if a client action is required based on the API response.
@@ -52,7 +90,7 @@ class ClientAction():
         """
         return api_response.required_action()
     
-    def execute(self, model, api_response):
+    def execute(self, model, api_response, timeout=None, emit=None):
         """
         Execute client actions based on tool calls found in the API response.
 
@@ -63,14 +101,37 @@ class ClientAction():
         Args:
             model: The model object containing the tools list.
             api_response: The APIResponse object with raw response data.
+            timeout (Optional[float]): The time limit, in seconds, of each sandboxed tool call.
+            emit (Optional[Callable]): Sends the "tool_started" and "tool_finished" lifecycle
+                events (RunContext.emit), with the sizes of the arguments and the result.
 
         Returns:
             bool: True after processing the tool calls.
         """
-        for tool_call in api_response.raw_api_response.choices[0].message.tool_calls:
+        for tool_call in api_response.get_api_message().tool_calls:
             api_message = {"role": "tool", "tool_call_id": tool_call.id, "content": ""}
             function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            api_message["content"] = str(model.tools_list.get_tool_by_name(function_name).call_function(function_args))
+            if emit is not None:
+                emit(TOOL_STARTED, size=len(tool_call.function.arguments or ""), tool=function_name)
+            started_at = time.perf_counter()
+            error_text = None
+            try:
+                try:
+                    function_args = codec.loads(tool_call.function.arguments)
+                except ValueError as error:
+                    raise ToolArgumentError(f"the arguments are not valid JSON ({error})") from error
+                result = model.tools_list.get_tool_by_name(function_name).call_function(function_args, timeout=timeout)
+                api_message["content"] = result if isinstance(result, str) else _result_text(result)
+            except ToolArgumentError as error:
+                # Report malformed arguments back to the model instead of running the tool.
+                api_message["content"] = f"Error: invalid arguments for tool '{function_name}': {error}"
+                error_text = str(error)
+            except ToolExecutionError as error:
+                # An isolated tool failed, timed out or was cancelled.
+                api_message["content"] = codec.dumps({"error": error.to_dict()})
+                error_text = str(error)
+            if emit is not None:
+                emit(TOOL_FINISHED, seconds=time.perf_counter() - started_at, size=len(api_message["content"]),
+                     tool=function_name, error=error_text)
             self.api_messages.append(api_message)
         return True 
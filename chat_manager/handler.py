@@ -28,7 +28,19 @@ Usage:
 """
 
 from authentication import AuthenticationService
-from chat_manager import ChatUserMessage, ChatDeveloperMessage, APIResponse, ChatHistory, ClientAction
+from chat_manager import (ChatUserMessage, ChatDeveloperMessage, APIResponse, ChatHistory, ClientAction,
+                          RunBudget, HedgePolicy, ResponsesBackend, HistoryCompactor, RunCheckpointer,
+                          PromptCache)
+from chat_manager.run_checkpoint import RESPONSE, ACTION, DONE
+from chat_manager.lifecycle_hooks import (HookRegistry, RunContext, next_run_number, RUN_STARTED, REQUEST_BUILT,
+                                          RESPONSE_RECEIVED, RUN_FINISHED)
+from tools import ToolRoutingContext
+from helpers.json_stream import IncrementalJSONParser, JSONEvent
+from helpers.json_codec import to_jsonable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+import copy
+import time
 
 class ChatManager:
     """
@@ -51,6 +63,141 @@ class ChatManager:
         # self.monitor = monitor  # Monitoring service can be added if needed.
         self.chat_history = ChatHistory()  # Structured message storage.
         self.developer_message = ""
+        # The APIResponse of the latest get_response run.
+        self.last_response = None
+        # The candidates of the latest get_responses run.
+        self.branches = []
+        self.last_responses = []
+        # Sends get_response turns through the Responses API when set.
+        self.responses_backend = None
+        # Summarizes the stale messages of long conversations when set.
+        self.compactor = None
+        # Checkpoints the turns of get_response runs when set.
+        self.checkpointer = None
+        # The id of the latest checkpointed run.
+        self.run_id = None
+        # Receives the lifecycle events of get_response runs when set.
+        self.hooks = None
+        # Answers near-duplicate single-turn prompts from earlier answers when set.
+        self.prompt_cache = None
+
+    def use_responses_api(self, enabled: bool = True) -> "ChatManager":
+        """
+        Sends the turns of `get_response` through the Responses API with
+        server-side state: each request names the previous stored response and
+        uploads only the messages added since, instead of the whole history.
+        The history remains the local mirror of the conversation.
+
+        Args:
+            enabled (bool): True for the Responses API, False for Chat Completions.
+
+        Returns:
+            ChatManager: The current instance (for fluent chaining).
+        """
+        self.responses_backend = ResponsesBackend() if enabled else None
+        return self
+
+    def set_compactor(self, compactor: Optional[HistoryCompactor]) -> "ChatManager":
+        """
+        Compacts the conversation in the background once it grows past the
+        compactor's threshold; the summaries are applied before a request.
+
+        Args:
+            compactor (Optional[HistoryCompactor]): The compactor, or None to disable compaction.
+
+        Returns:
+            ChatManager: The current instance (for fluent chaining).
+        """
+        self.compactor = compactor
+        return self
+
+    def set_checkpointer(self, checkpointer: Optional[RunCheckpointer]) -> "ChatManager":
+        """
+        Checkpoints every completed turn of `get_response` runs, so an
+        interrupted run can be continued with `resume` instead of rerun.
+
+        Args:
+            checkpointer (Optional[RunCheckpointer]): The checkpointer, or None to disable checkpoints.
+
+        Returns:
+            ChatManager: The current instance (for fluent chaining).
+        """
+        self.checkpointer = checkpointer
+        return self
+
+    def set_prompt_cache(self, prompt_cache: Optional[PromptCache]) -> "ChatManager":
+        """
+        Answers stateless single-turn requests (developer instructions and one
+        user message, no tools) from the cache when a near-duplicate prompt was
+        answered before, and caches the answers of such requests.
+
+        Args:
+            prompt_cache (Optional[PromptCache]): The cache, or None to disable it.
+
+        Returns:
+            ChatManager: The current instance (for fluent chaining).
+        """
+        self.prompt_cache = prompt_cache
+        return self
+
+    def _cacheable_prompt(self, model) -> Optional[Tuple[str, list]]:
+        """
+        Returns the user message of a stateless single-turn request and the
+        messages sent before it, or None if the request depends on earlier
+        turns or may call tools.
+        """
+        if model.tools_list is not None and len(model.tools_list):
+            return None
+        messages = self.chat_history.messages()
+        if not messages or not isinstance(messages[-1], dict) or messages[-1].get("role") != "user":
+            return None
+        if any(not isinstance(message, dict) or message.get("role") not in ("developer", "system")
+               for message in messages[:-1]):
+            return None
+        content = messages[-1].get("content")
+        return (content, messages[:-1]) if isinstance(content, str) else None
+
+    def set_hooks(self, hooks: Optional[HookRegistry]) -> "ChatManager":
+        """
+        Sends the lifecycle events of `get_response` runs (run started, request
+        built, response received, tool started and finished, run finished) to
+        the callbacks of a registry.
+
+        Args:
+            hooks (Optional[HookRegistry]): The registry, or None to disable the events.
+
+        Returns:
+            ChatManager: The current instance (for fluent chaining).
+        """
+        self.hooks = hooks
+        return self
+
+    def _begin_run(self, model_type: str) -> Optional[RunContext]:
+        """
+        Starts the lifecycle events of a run; None without hooks.
+        """
+        if self.hooks is None:
+            return None
+        run = RunContext(self.hooks, next_run_number(), model_type)
+        run.emit(RUN_STARTED, messages=len(self.chat_history))
+        return run
+
+    def _end_run(self, run: Optional[RunContext], error: Optional[BaseException]) -> None:
+        if run is not None:
+            run.emit(RUN_FINISHED, seconds=time.perf_counter() - run.started,
+                     messages=len(self.chat_history), error=str(error) if error is not None else None)
+
+    @staticmethod
+    def _content_size(messages) -> int:
+        """
+        Returns the number of characters of the text contents of messages.
+        """
+        size = 0
+        for message in messages:
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+            if isinstance(content, str):
+                size += len(content)
+        return size
 
 
     def send_developer(self, user_text: str) -> bool:
@@ -98,7 +245,11 @@ class ChatManager:
             print("The user message could not be processed")
             return False
 
-    def get_response(self, chatbot) -> APIResponse:
+    def get_response(self,
+                     chatbot,
+                     budget: Optional[RunBudget] = None,
+                     hedge: Optional[HedgePolicy] = None,
+                     run_id: Optional[str] = None) -> APIResponse:
         """
         Processes an incoming chat message and determines an appropriate response.
 
@@ -107,47 +258,358 @@ class ChatManager:
         the API via the authentication service's client. The method also handles
         client actions as required and updates the conversation history accordingly.
 
+        When a budget is given, the remaining time bounds every request and every
+        sandboxed tool call. Once the budget is spent, one last request is made
+        with tools disabled so the model gives a final answer; if there is no
+        time left for it, a notice explaining why the run stopped is returned.
+
+        When a checkpointer is set, every completed turn is checkpointed under
+        `self.run_id`, and an interrupted run can be continued with `resume`.
+        When a prompt cache is set, a single-turn request whose prompt is a
+        near-duplicate of a cached one is answered without any request.
+
         Args:
             chatbot: A tuple (model_config, model) where:
                 - model_config: Contains configuration parameters for the API call.
                 - model: Contains model-specific attributes, such as model_type and tools_list.
+            budget (Optional[RunBudget]): The limits of the run (unbounded if None).
+            hedge (Optional[HedgePolicy]): Sends a duplicate of requests slower than the
+                policy's latency percentile; the first response wins.
+            run_id (Optional[str]): The id of the checkpointed run (a random one if None).
 
         Returns:
             APIResponse: A readable representation of the final API response.
         """
         model_config, model = chatbot          
         api_response = APIResponse() 
+        self.last_response = api_response
+        cache_prompt = self._cacheable_prompt(model) if self.prompt_cache is not None else None
+        if cache_prompt is not None:
+            hit = self.prompt_cache.lookup(cache_prompt[0], chatbot, cache_prompt[1])
+            if hit is not None:
+                api_response = APIResponse.from_state({"call_api": False, "call_tool": False,
+                                                       "message": {"role": "assistant", "content": hit.answer}})
+                self.last_response = api_response
+                self.chat_history.append_message(api_response)
+                return api_response.readable()
         print("sending a message with model", model.model_type)
+        self.run_id = None
+        if self.checkpointer is not None:
+            self.run_id = self.checkpointer.start(self.chat_history, model.model_type, run_id)
+        start_length = len(self.chat_history)
+        run = self._begin_run(model.model_type)
+        try:
+            answer = self._tool_loop(chatbot, api_response, budget, hedge, last_tool=None, run=run)
+        except BaseException as error:
+            self._end_run(run, error)
+            raise
+        self._end_run(run, None)
+        if cache_prompt is not None and not api_response.call_api() and len(self.chat_history) == start_length + 1:
+            self.prompt_cache.store(cache_prompt[0], chatbot, api_response.get_content() or "", cache_prompt[1])
+        return answer
+
+    def resume(self,
+               run_id: str,
+               chatbot,
+               budget: Optional[RunBudget] = None,
+               hedge: Optional[HedgePolicy] = None) -> APIResponse:
+        """
+        Continues a checkpointed `get_response` run from its last checkpoint.
+
+        The conversation is replaced by the one of the run. A run that ended
+        returns its final answer without any request; a run interrupted after a
+        response runs the tool calls of that response; otherwise the next request
+        is sent. The usage already checkpointed is added to `budget`.
+
+        Args:
+            run_id (str): The id of the run.
+            chatbot: The (model_config, model) tuple the run was started with
+                (the model provides the tools).
+            budget (Optional[RunBudget]): The limits of the whole run, including the
+                part before the interruption.
+            hedge (Optional[HedgePolicy]): As for `get_response`.
+
+        Returns:
+            APIResponse: A readable representation of the final API response.
+
+        Raises:
+            ValueError: If no checkpointer is set.
+            FileNotFoundError: If the run has no checkpoints.
+        """
+        if self.checkpointer is None:
+            raise ValueError("Resuming a run needs a checkpointer (set_checkpointer).")
+        state = self.checkpointer.load(run_id)
+        self.chat_history = ChatHistory(history=state.messages, remote_id=state.remote_id,
+                                        remote_length=state.remote_length)
+        if budget is not None and state.usage:
+            budget.add_usage(state.usage.get("turns", 0), state.usage.get("tokens", 0), state.usage.get("cost", 0.0))
+        api_response = APIResponse.from_state(state.api_response) if state.api_response else APIResponse()
+        self.last_response = api_response
+        self.run_id = run_id
+        print(f"resuming run {run_id} after {state.turns} turns")
+        run = self._begin_run(chatbot[1].model_type)
+        try:
+            last_tool = state.last_tool
+            if state.kind == RESPONSE and api_response.required_action():
+                # The response was paid for but its tool calls did not run.
+                last_tool = self._run_tools(chatbot[1], api_response, budget, run)
+            answer = self._tool_loop(chatbot, api_response, budget, hedge, last_tool, run)
+        except BaseException as error:
+            self._end_run(run, error)
+            raise
+        self._end_run(run, None)
+        return answer
+
+    def _run_tools(self,
+                   model,
+                   api_response: APIResponse,
+                   budget: Optional[RunBudget],
+                   run: Optional[RunContext] = None) -> str:
+        """
+        Runs the tool calls of a response, appends their results and checkpoints them.
+
+        Returns:
+            str: The name of the last tool called.
+        """
+        client_action = ClientAction()
+        try:
+            client_action.execute(model, api_response,
+                                  timeout=budget.remaining_time() if budget is not None else None,
+                                  emit=run.emit if run is not None else None)
+        except Exception:
+            print("Problem executing client action")
+            raise
+        self.chat_history.append_message(client_action)
+        last_tool = api_response.get_api_message().tool_calls[-1].function.name
+        if self.run_id is not None:
+            self.checkpointer.record(self.run_id, ACTION, self.chat_history, client_action=client_action,
+                                     budget=budget, last_tool=last_tool)
+        return last_tool
+
+    def _tool_loop(self,
+                   chatbot,
+                   api_response: APIResponse,
+                   budget: Optional[RunBudget],
+                   hedge: Optional[HedgePolicy],
+                   last_tool: Optional[str],
+                   run: Optional[RunContext] = None) -> APIResponse:
+        """
+        Sends requests and runs tool calls until the model gives a final answer.
+        """
+        model_config, model = chatbot
+        final_turn = False
         # Check if more responses are necessary.
         while api_response.call_api():
+            if budget is not None and budget.exhausted():
+                if final_turn or not budget.allows_final_answer():
+                    return "role: assistant\nThe run stopped before a final answer: " \
+                           + budget.exhaustion_reason() + "."
+                # Wind down: one last request in which the model cannot call tools.
+                final_turn = True
+
+            if self.compactor is not None:
+                if self.compactor.poll(self.chat_history) and self.run_id is not None:
+                    self.checkpointer.rewritten(self.run_id)
+            request = {"model": model.model_type, "messages": self.chat_history.messages()}
+            if model.tools_list is not None and len(model.tools_list):
+                # Only the tools the router deems relevant are sent (all of them without a router).
+                routing_context = ToolRoutingContext(self.chat_history.last_user_message(), last_tool)
+                request["tools"] = model.tools_list.get_schemas(routing_context)
+                if final_turn:
+                    request["tool_choice"] = "none"
+            if budget is not None and budget.deadline is not None:
+                request["timeout"] = budget.remaining_time()
+            if run is not None and run.wants(REQUEST_BUILT):
+                run.emit(REQUEST_BUILT, size=self._content_size(request["messages"]),
+                         messages=len(request["messages"]), tools=len(request.get("tools", ())),
+                         final_turn=final_turn)
+
+            def send(target) -> object:
+                target_config, target_model = target
+                if self.responses_backend is not None:
+                    return self.responses_backend.create(self.auth.get_client(), self.chat_history,
+                                                         {**request, "model": target_model.model_type},
+                                                         target_config.get_params())
+                return self.auth.get_client().chat.completions.create(
+                    **{**request, "model": target_model.model_type},
+                    **(target_config.get_params())
+                )
+
             # Determine the actions to take based on the API response.
-            raw_api_response = self.auth.get_client().chat.completions.create(
-                model=model.model_type,
-                messages=self.chat_history.messages(),
-                tools=model.tools_list.get_all_schemas(),
-                **(model_config.get_params())
-            )
+            sent_at = time.perf_counter()
+            if hedge is not None:
+                raw_api_response = hedge.call(send, (model_config, model), timeout=request.get("timeout"),
+                                              budget=budget)
+            else:
+                raw_api_response = send((model_config, model))
+            if run is not None and run.wants(RESPONSE_RECEIVED):
+                usage = getattr(raw_api_response, "usage", None)
+                message = raw_api_response.choices[0].message
+                run.emit(RESPONSE_RECEIVED, seconds=time.perf_counter() - sent_at,
+                         size=len(message.content or ""),
+                         prompt_tokens=getattr(usage, "prompt_tokens", None),
+                         completion_tokens=getattr(usage, "completion_tokens", None),
+                         tool_calls=len(message.tool_calls or ()))
+            if budget is not None:
+                budget.record(raw_api_response, getattr(raw_api_response, "model", None) or model.model_type)
             # Handle the response.
             try:
                 api_response.handle(raw_api_response)
             except Exception:
                 raise print("Problem handling API response")
             self.chat_history.append_message(api_response)
+            if self.responses_backend is not None:
+                # Keep a plain dictionary, so the conversation can go on through Chat Completions.
+                self.chat_history.history[-1] = to_jsonable(self.chat_history.history[-1])
+                # The server now holds every message up to this response.
+                self.chat_history.remote_id = raw_api_response.id
+                self.chat_history.remote_length = len(self.chat_history)
+            if self.run_id is not None:
+                self.checkpointer.record(self.run_id, RESPONSE, self.chat_history, api_response=api_response,
+                                         budget=budget, last_tool=last_tool)
 
             # Determine if the API required a client action.
-            client_action = ClientAction()
-            if client_action.required(api_response):
-                try:
-                    client_action.execute(model, api_response)
-                except Exception:
-                    print("Problem executing client action")
-                    raise
-                self.chat_history.append_message(client_action)
+            if api_response.required_action():
+                last_tool = self._run_tools(model, api_response, budget, run)
 
             print(self.chat_history.messages)
 
+        if self.run_id is not None:
+            self.checkpointer.record(self.run_id, DONE, self.chat_history, api_response=api_response,
+                                     budget=budget, last_tool=last_tool)
         return api_response.readable()
 
+    def stream_json(self,
+                    chatbot,
+                    budget: Optional[RunBudget] = None,
+                    strict: bool = False,
+                    max_depth: Optional[int] = None) -> Iterator[JSONEvent]:
+        """
+        Streams a structured output and yields its parts as soon as they close.
+
+        The request asks for the model's `response_format` (a JSON schema) and is
+        streamed; the text is fed to an IncrementalJSONParser, so every field and
+        array item is yielded, validated against the schema, while the model is
+        still generating the rest. The last event is the whole document. The
+        answer is then appended to the conversation. Tools are not sent and the
+        config's `n` is ignored: this is a single request for a single answer.
+
+        Args:
+            chatbot: A tuple (model_config, model), as for `get_response`.
+            budget (Optional[RunBudget]): Records the usage of the request and bounds its time.
+            strict (bool): Raise StreamValidationError on the first value violating the schema.
+            max_depth (Optional[int]): The deepest values yielded (1 for the top-level
+                fields or items, None for all).
+
+        Yields:
+            JSONEvent: The values that closed, innermost first.
+
+        Raises:
+            ValueError: If the output is not valid JSON or is incomplete.
+        """
+        model_config, model = chatbot
+        parser = IncrementalJSONParser(model.response_format, strict=strict, max_depth=max_depth)
+        request = {"model": model.model_type, "messages": self.chat_history.messages(), "stream": True,
+                   "stream_options": {**(model.stream_options or {}), "include_usage": True}}
+        if model.response_format is not None:
+            request["response_format"] = model.response_format
+        if budget is not None and budget.deadline is not None:
+            request["timeout"] = budget.remaining_time()
+        params = {key: value for key, value in model_config.get_params().items() if key != "n"}
+        stream = self.auth.get_client().chat.completions.create(**request, **params)
+        parts = []
+        usage_chunk = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage_chunk = chunk
+                for choice in chunk.choices or ():
+                    # Only the first choice is parsed, should several be streamed.
+                    if getattr(choice, "index", 0) == 0 and choice.delta.content:
+                        parts.append(choice.delta.content)
+                        yield from parser.feed(choice.delta.content)
+        finally:
+            # Also reached when the caller stops iterating early.
+            if hasattr(stream, "close"):
+                stream.close()
+            if budget is not None:
+                budget.record(usage_chunk, model.model_type)
+        api_response = APIResponse.from_state({"call_api": False, "call_tool": False,
+                                               "message": {"role": "assistant", "content": "".join(parts)}})
+        self.last_response = api_response
+        self.chat_history.append_message(api_response)
+        # A top-level number only ends with the stream.
+        yield from parser.finish()
+
+    def get_responses(self, chatbot, n: int, budget: Optional[RunBudget] = None) -> List[str]:
+        """
+        Samples `n` candidate answers from a single request and follows each one.
+
+        The request is sent once with `n` choices. Every choice becomes its own
+        APIResponse in its own branch: a fork of the current history (sharing
+        its messages) to which the choice is appended. Choices that call tools are continued in their branch
+        (concurrently, one choice per request) until they give a final answer.
+        The current history is left untouched; use `adopt_branch` to continue
+        from one of the candidates.
+
+        Args:
+            chatbot: A tuple (model_config, model), as for `get_response`.
+            n (int): The number of candidates (overrides the config's n).
+            budget (Optional[RunBudget]): The limits shared by the request and all branches.
+
+        Returns:
+            List[str]: The readable final answer of every candidate, in choice order.
+                The APIResponses are in `last_responses` and the branches in `branches`.
+        """
+        model_config, model = chatbot
+        request = {"model": model.model_type, "messages": self.chat_history.messages(), "n": n}
+        if model.tools_list is not None and len(model.tools_list):
+            routing_context = ToolRoutingContext(self.chat_history.last_user_message(), None)
+            request["tools"] = model.tools_list.get_schemas(routing_context)
+        if budget is not None and budget.deadline is not None:
+            request["timeout"] = budget.remaining_time()
+        params = {key: value for key, value in model_config.get_params().items() if key != "n"}
+        raw_api_response = self.auth.get_client().chat.completions.create(**request, **params)
+        if budget is not None:
+            budget.record(raw_api_response, model.model_type)
+
+        # Branches continue one choice at a time.
+        single_config = copy.copy(model_config).set_n(None)
+
+        def follow(api_response: APIResponse, history: ChatHistory):
+            branch = ChatManager(self.auth)
+            branch.chat_history = history
+            branch.chat_history.append_message(api_response)
+            branch.last_response = api_response
+            if not api_response.required_action():
+                return branch, api_response.readable()
+            client_action = ClientAction()
+            client_action.execute(model, api_response,
+                                  timeout=budget.remaining_time() if budget is not None else None)
+            branch.chat_history.append_message(client_action)
+            return branch, branch.get_response((single_config, model), budget)
+
+        choices = APIResponse.split_choices(raw_api_response)
+        # Forks are taken here: forking is not thread-safe.
+        histories = [self.chat_history.fork() for _ in choices]
+        with ThreadPoolExecutor(max_workers=max(1, n)) as pool:
+            results = list(pool.map(follow, choices, histories))
+
+        self.branches = [branch for branch, _ in results]
+        self.last_responses = [branch.last_response for branch in self.branches]
+        return [readable for _, readable in results]
+
+    def adopt_branch(self, index: int) -> None:
+        """
+        Continues the conversation from the branch of candidate `index` of the
+        latest `get_responses` call.
+
+        Args:
+            index (int): The index of the candidate.
+        """
+        self.chat_history = self.branches[index].chat_history
+        self.last_response = self.last_responses[index]
+
     def clear_history(self) -> None:
         """
         Clears the developer message and (optionally) the conversation history.
@@ -0,0 +1,233 @@
+"""
+Module: chat_manager.hedging
+Description:
+    This module cuts the tail latency of completions with hedged requests.
+    Completion latency has a long tail: most requests finish quickly, a few take
+    many times longer. A HedgePolicy records the recent latencies of every model
+    type; when a request is still running after a chosen percentile of them
+    (e.g. the p95), a duplicate is sent to the same model or to a fallback
+    preset, and whichever finishes first wins. Since only the slowest few percent
+    of requests are duplicated, the extra cost is bounded by the same fraction.
+
+    The losing request cannot be aborted mid-flight through the synchronous
+    openai client: it is cancelled if it has not started yet, otherwise its
+    result is discarded (and closed, for streams) when it arrives. It is
+    still paid for, so its usage is recorded in the run's budget. A request
+    failing before the hedging delay is not duplicated: a bad request or an
+    authentication error would fail again.
+
+    A policy owns the threads sending its requests: close it, or use it as a
+    context manager, once it is no longer needed.
+
+Classes:
+    LatencyTracker:
+        The recent latencies of every model type.
+    HedgePolicy:
+        When and where to send the duplicate request.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of the latencies of every model type.
+
+    Attributes:
+        window (int): The number of latencies kept per model type.
+    """
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_type: str, latency: float) -> None:
+        """
+        Records the latency, in seconds, of a request to `model_type`.
+        """
+        with self._lock:
+            self._latencies.setdefault(model_type, deque(maxlen=self.window)).append(latency)
+
+    def count(self, model_type: str) -> int:
+        """
+        Returns the number of latencies recorded for `model_type`.
+        """
+        with self._lock:
+            return len(self._latencies.get(model_type, ()))
+
+    def percentile(self, model_type: str, q: float) -> Optional[float]:
+        """
+        Returns the `q` percentile (0 < q < 1) of the recent latencies of
+        `model_type`, or None if none were recorded.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(model_type, ()))
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+
+class HedgePolicy:
+    """
+    Decides when to send a duplicate request and where.
+
+    Attributes:
+        percentile (float): The latency percentile after which a request is hedged.
+        min_samples (int): The number of latencies needed before hedging a model type.
+        min_delay (float): The minimum delay, in seconds, before hedging.
+        fallback: The (model_config, model) that receives the duplicate, or None for
+            the same chatbot as the original request.
+        tracker (LatencyTracker): The recent latencies.
+        hedges_sent (int): The number of duplicates sent so far.
+        hedges_won (int): The number of duplicates that finished first.
+    """
+
+    def __init__(self,
+                 percentile: float = 0.95,
+                 min_samples: int = 20,
+                 min_delay: float = 0.05,
+                 fallback: Optional[Tuple[Any, Any]] = None,
+                 window: int = 200,
+                 max_workers: int = 8) -> None:
+        """
+        Initializes the policy.
+
+        Args:
+            percentile (float): The latency percentile after which a request is hedged.
+            min_samples (int): The number of latencies needed before hedging a model type.
+            min_delay (float): The minimum delay, in seconds, before hedging.
+            fallback (Optional[Tuple[Config, Model]]): The chatbot receiving the duplicate.
+            window (int): The number of latencies kept per model type.
+            max_workers (int): The number of threads sending requests.
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.fallback = fallback
+        self.tracker = LatencyTracker(window)
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def delay_for(self, model_type: str) -> Optional[float]:
+        """
+        Returns how long to wait before hedging a request to `model_type`, or
+        None if too few latencies were recorded to tell.
+        """
+        if self.tracker.count(model_type) < self.min_samples:
+            return None
+        return max(self.min_delay, self.tracker.percentile(model_type, self.percentile))
+
+    def _timed(self, send: Callable[[Any], Any], chatbot: Tuple[Any, Any]) -> Tuple[Any, float]:
+        start = time.monotonic()
+        result = send(chatbot)
+        return result, time.monotonic() - start
+
+    def _discard(self, future: Future, model_type: str, budget=None) -> None:
+        """
+        Cancels a losing request, or closes its result once it arrives.
+        Its latency is still recorded, so slow requests keep counting in the percentile,
+        and so is its usage in `budget`, since it is paid for.
+        """
+        if future.cancel():
+            return
+
+        def close(done: Future) -> None:
+            if not done.cancelled() and done.exception() is None:
+                result, latency = done.result()
+                self.tracker.record(model_type, latency)
+                if budget is not None:
+                    budget.record(result, model_type)
+                if hasattr(result, "close"):
+                    result.close()
+
+        future.add_done_callback(close)
+
+    def call(self,
+             send: Callable[[Tuple[Any, Any]], Any],
+             chatbot: Tuple[Any, Any],
+             timeout: Optional[float] = None,
+             budget=None) -> Any:
+        """
+        Sends a request through `send`, hedging it if it is slow.
+
+        Args:
+            send (Callable): Sends the request for a (model_config, model) chatbot
+                and returns the raw API response.
+            chatbot (Tuple[Config, Model]): The chatbot of the original request.
+            timeout (Optional[float]): The overall time limit in seconds.
+            budget (Optional[RunBudget]): Charged with the usage of the losing request;
+                the caller records the response returned.
+
+        Returns:
+            Any: The raw API response that arrived first.
+
+        Raises:
+            Exception: The error of the original request if it failed before the hedging
+                delay (no duplicate is sent), else the error of the last request if
+                every request failed.
+            TimeoutError: If no request finished within `timeout`.
+        """
+        model_type = chatbot[1].model_type
+        delay = self.delay_for(model_type)
+        if timeout is not None and delay is not None and delay >= timeout:
+            delay = None
+        if delay is None:
+            result, latency = self._timed(send, chatbot)
+            self.tracker.record(model_type, latency)
+            return result
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        primary = self._executor.submit(self._timed, send, chatbot)
+        done, _ = wait([primary], timeout=delay)
+        if primary in done:
+            # A fast failure (a bad request, an auth error) would fail again: it is not hedged.
+            result, latency = primary.result()
+            self.tracker.record(model_type, latency)
+            return result
+
+        hedge_chatbot = self.fallback or chatbot
+        hedge = self._executor.submit(self._timed, send, hedge_chatbot)
+        with self._lock:
+            self.hedges_sent += 1
+        model_of = {primary: model_type, hedge: hedge_chatbot[1].model_type}
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    self._discard(future, model_of[future], budget)
+                raise TimeoutError(f"No response from {model_type} within {timeout} seconds.")
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                result, latency = future.result()
+                self.tracker.record(model_of[future], latency)
+                if future is hedge:
+                    with self._lock:
+                        self.hedges_won += 1
+                for other in pending:
+                    self._discard(other, model_of[other], budget)
+                return result
+        raise error
+
+    def close(self) -> None:
+        """
+        Stops the threads sending requests once the requests in flight end.
+        """
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self) -> "HedgePolicy":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,224 @@
+"""
+Module: chat_manager.history_compactor
+Description:
+    This module keeps long conversations small. Old tool results (a
+    `read_project` dump from twenty turns ago) and old long turns are resent in
+    full on every request although the model rarely needs more than their gist.
+
+    Once a conversation passes a size threshold, a HistoryCompactor summarizes
+    its stale messages with a cheap preset (`Director.default_model` by default)
+    in a background thread, so the conversation is never blocked. The summaries
+    replace the message contents the next time the owner of the history polls
+    the compactor (`ChatManager.get_response` does so before every request);
+    the message structure (roles, tool calls and their results) is unchanged.
+    The originals are archived as JSON files and can be read back, by the code
+    or by the model through `as_tool()`.
+
+Classes:
+    HistoryCompactor:
+        Summarizes and archives the stale messages of a ChatHistory.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from helpers.json_codec import codec, to_jsonable
+from helpers.utils import estimate_tokens, safe_read_file, safe_write_file
+
+_SUMMARY_INSTRUCTION = (
+    "Summarize the following message from an earlier part of a conversation in a few sentences. "
+    "Keep file names, identifiers, numbers, errors and decisions; drop everything else."
+)
+
+
+def _content_of(message: Any) -> Optional[str]:
+    """
+    Returns the text content of a message dictionary or SDK message.
+    """
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+    return content if isinstance(content, str) else None
+
+
+class HistoryCompactor:
+    """
+    Summarizes and archives the stale messages of a conversation in the background.
+
+    Attributes:
+        threshold_tokens (int): The estimated size of a conversation above which it is compacted.
+        keep_recent (int): The number of latest messages never compacted.
+        min_chars (int): The length below which a message is not worth compacting.
+        archive_dir (Path): The directory of the archived originals.
+        compacted (int): The number of messages compacted so far.
+    """
+
+    def __init__(self,
+                 auth=None,
+                 chatbot: Optional[Tuple[Any, Any]] = None,
+                 summarize: Optional[Callable[[str], str]] = None,
+                 threshold_tokens: int = 30000,
+                 keep_recent: int = 8,
+                 min_chars: int = 2000,
+                 archive_dir: str = ".chat_archive") -> None:
+        """
+        Initializes the compactor.
+
+        Args:
+            auth (AuthenticationService): Provides the client of the summarizer requests.
+            chatbot (Optional[Tuple[Config, Model]]): The summarizer preset
+                (Director.default_model with ConfigDirector.default_config if None).
+            summarize (Optional[Callable[[str], str]]): Replaces the summarizer requests
+                (e.g. a local model); `auth` and `chatbot` are then unused.
+            threshold_tokens (int): The estimated size above which a conversation is compacted.
+            keep_recent (int): The number of latest messages never compacted.
+            min_chars (int): The length below which a message is not compacted.
+            archive_dir (str): The directory of the archived originals.
+        """
+        if summarize is None and auth is None:
+            raise ValueError("A HistoryCompactor needs an authenticator or a summarize function.")
+        if summarize is None and chatbot is None:
+            from models import ConfigAdapter, ConfigDirector, Director
+            model = Director.default_model()
+            chatbot = (ConfigAdapter.adapt(ConfigDirector.default_config(), model), model)
+        self.auth = auth
+        self.chatbot = chatbot
+        self.summarize = summarize or self._summarize_with_model
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent = keep_recent
+        self.min_chars = min_chars
+        self.archive_dir = Path(archive_dir)
+        self.compacted = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="compactor")
+        self._jobs: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def _summarize_with_model(self, text: str) -> str:
+        """
+        Summarizes a text with the summarizer preset.
+        """
+        model_config, model = self.chatbot
+        raw_api_response = self.auth.get_client().chat.completions.create(
+            model=model.model_type,
+            messages=[{"role": "developer", "content": _SUMMARY_INSTRUCTION},
+                      {"role": "user", "content": text}],
+            **model_config.get_params()
+        )
+        return raw_api_response.choices[0].message.content or ""
+
+    def size_of(self, messages: List[Any]) -> int:
+        """
+        Returns the estimated number of tokens of a list of messages.
+        """
+        return sum(estimate_tokens(_content_of(message) or "") for message in messages)
+
+    def archive(self, message: Any) -> Optional[str]:
+        """
+        Archives a message and returns its archive id, or None if it could not be written.
+        """
+        archive_id = codec.hash_key(message)[:16]
+        path = self.archive_dir / f"{archive_id}.json"
+        if not path.exists():
+            try:
+                self.archive_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as error:
+                print(f"Error creating the archive directory {self.archive_dir}: {error}")
+                return None
+            if not safe_write_file(codec.dumps(message), str(path)):
+                return None
+        return archive_id
+
+    def load_original(self, archive_id: str) -> Optional[dict]:
+        """
+        Returns an archived original message, or None if there is none with that id.
+        """
+        content = safe_read_file(str(self.archive_dir / f"{Path(archive_id).name}.json"))
+        return codec.loads(content) if content else None
+
+    def retrieve_archived(self, archive_id: str) -> str:
+        """
+        Returns the full original content of a message that was compacted into a summary.
+
+        Args:
+            archive_id (str): The archive id quoted in the compacted message.
+        """
+        original = self.load_original(archive_id)
+        if original is None:
+            return f"Error: no archived message {archive_id}."
+        return original.get("content") or codec.dumps(original)
+
+    def as_tool(self):
+        """
+        Wraps `retrieve_archived` into a ModelTool, so the model can read an original back.
+        """
+        from tools import ModelTool
+        return ModelTool().set_function(self.retrieve_archived)
+
+    def _compact(self, messages: List[Any], stop: int) -> Dict[int, Tuple[Any, dict]]:
+        """
+        Summarizes the long messages before index `stop`. Runs in the background.
+
+        Returns:
+            Dict[int, Tuple[Any, dict]]: For every compacted index, the original
+                message and its replacement.
+        """
+        replacements = {}
+        for index in range(stop):
+            message = messages[index]
+            content = _content_of(message)
+            role = message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+            if content is None or len(content) < self.min_chars or role in ("developer", "system"):
+                continue
+            if content.startswith("[Compacted "):
+                continue
+            archive_id = self.archive(message)
+            if archive_id is None:
+                # Without its archive, the original would be lost: keep it.
+                continue
+            summary = self.summarize(content)
+            replacement = dict(message) if isinstance(message, dict) else to_jsonable(message)
+            replacement["content"] = (f"[Compacted {role} message; the original is archived as "
+                                      f"{archive_id}]\n{summary}")
+            replacements[index] = (message, replacement)
+        return replacements
+
+    def poll(self, history) -> int:
+        """
+        Applies a finished compaction to `history` and starts a new one if the
+        history has grown past the threshold. Call it from the thread that owns
+        the history, e.g. before every request.
+
+        Args:
+            history (ChatHistory): The conversation.
+
+        Returns:
+            int: The number of messages replaced by summaries in this call.
+        """
+        key = id(history)
+        applied = 0
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.done():
+                del self._jobs[key]
+                if job.exception() is None:
+                    applied = history.replace_messages(job.result())
+                    self.compacted += applied
+                else:
+                    print("Problem compacting the chat history:", job.exception())
+                job = None
+            if job is None:
+                messages = history.messages()
+                stop = len(messages) - self.keep_recent
+                if stop > 0 and self.size_of(messages) > self.threshold_tokens:
+                    # The job reads a snapshot: appends to the history do not disturb it.
+                    self._jobs[key] = self._executor.submit(self._compact, list(messages), stop)
+        return applied
+
+    def wait(self) -> None:
+        """
+        Blocks until the running compactions have finished (they still need a `poll`).
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.exception()
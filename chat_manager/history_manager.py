@@ -13,8 +13,15 @@ Description:
     the application. The ChatHistory class provides methods to append new
     messages and to retrieve the entire conversation history in an API-
     compatible format.
+
+    Histories fork cheaply: `fork()` freezes the messages so far into a
+    HistorySegment shared by the original and the branch, and each of them
+    then stores only the messages appended after the fork. N branches of a
+    long conversation therefore hold the prefix once, not N times.
     
 Classes:
+    HistorySegment:
+        A frozen run of messages shared by forked histories.
     ChatHistory:
         A data class that maintains a list of messages. It provides methods
         for appending individual or multiple messages and for retrieving the
@@ -22,8 +29,41 @@ Classes:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Union, Iterable
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, Iterable
 from chat_manager import APIResponse, ChatUserMessage, ClientAction, ChatDeveloperMessage
+from helpers.json_codec import codec
+from helpers.utils import safe_read_file, safe_write_file
+
+
+@dataclass(frozen=True)
+class HistorySegment:
+    """
+    A frozen run of messages, following the messages of its parent segment.
+
+    Segments are shared between forked histories and never change; the
+    message dictionaries they hold must not be mutated either.
+
+    Attributes:
+        messages (Tuple[dict, ...]): The messages of this segment.
+        parent (Optional[HistorySegment]): The segment holding the earlier messages.
+    """
+    messages: Tuple[dict, ...]
+    parent: Optional["HistorySegment"] = None
+
+    def chain(self) -> List["HistorySegment"]:
+        """
+        Returns the segments from the first one to this one.
+        """
+        segments = []
+        segment = self
+        while segment is not None:
+            segments.append(segment)
+            segment = segment.parent
+        segments.reverse()
+        return segments
+
+    def __len__(self) -> int:
+        return sum(len(segment.messages) for segment in self.chain())
 
 
 @dataclass
@@ -33,9 +73,19 @@ class ChatHistory:
     and retrieved in an API-compatible format.
     
     Attributes:
-        history (List[dict]): A list that stores messages as dictionaries.
+        history (List[dict]): The messages appended since the last fork (all
+            messages if the history was never forked), as dictionaries.
+        prefix (Optional[HistorySegment]): The frozen messages before `history`,
+            shared with the histories forked from the same point.
+        remote_id (Optional[str]): The id of the stored Responses API response this
+            history continues, when it is sent through the ResponsesBackend.
+        remote_length (int): The number of messages of this history the server holds
+            under `remote_id`; only the later ones are sent.
     """
     history: List[dict] = field(default_factory=list)
+    prefix: Optional[HistorySegment] = field(default=None, repr=False)
+    remote_id: Optional[str] = field(default=None, repr=False)
+    remote_length: int = field(default=0, repr=False)
 
     def append_message(self, message: Union[ChatUserMessage, APIResponse, ClientAction]) -> None:
         """
@@ -69,8 +119,125 @@ class ChatHistory:
         Returns:
             List[dict]: A list of messages formatted as API-compatible dictionaries.
         """
-        return self.history
+        if self.prefix is None:
+            return self.history
+        return [message for segment in self.prefix.chain() for message in segment.messages] + self.history
+
+    def iter_reversed(self) -> Iterator[dict]:
+        """
+        Iterates over the messages from the latest to the first, without copying them.
+        """
+        yield from reversed(self.history)
+        segment = self.prefix
+        while segment is not None:
+            yield from reversed(segment.messages)
+            segment = segment.parent
+
+    def __len__(self) -> int:
+        return len(self.history) + (len(self.prefix) if self.prefix is not None else 0)
+
+    def fork(self) -> "ChatHistory":
+        """
+        Returns a branch of the conversation that shares its messages so far.
+
+        The messages appended since the last fork are frozen into a segment
+        shared by this history and the branch; afterwards each of them stores
+        only its own new messages. Forking is not thread-safe: fork from the
+        thread that owns the history, then hand the branches to other threads.
+
+        Returns:
+            ChatHistory: The branch, holding the same messages as this history
+                (and continuing the same server-side response chain).
+        """
+        if self.history:
+            self.prefix = HistorySegment(tuple(self.history), self.prefix)
+            self.history = []
+        return ChatHistory(prefix=self.prefix, remote_id=self.remote_id, remote_length=self.remote_length)
     
+    def last_user_message(self) -> str:
+        """
+        Retrieves the content of the latest user message.
+
+        Returns:
+            str: The content of the latest user message, or "" if there is none.
+        """
+        for message in self.iter_reversed():
+            if isinstance(message, dict) and message.get("role") == "user":
+                content = message.get("content")
+                return content if isinstance(content, str) else ""
+        return ""
+
+    def replace_messages(self, replacements: Dict[int, Tuple[Any, dict]]) -> int:
+        """
+        Replaces messages by index, e.g. with the summaries of a HistoryCompactor.
+
+        A replacement is skipped if the message at its index is no longer the
+        original it was computed from (the history was cleared or reloaded).
+        A forked history gets its own copy of the messages; its branches are not
+        affected. The server-side Responses chain is dropped, so the next request
+        sends the replaced messages.
+
+        Args:
+            replacements (Dict[int, Tuple[Any, dict]]): For every index, the original
+                message and its replacement.
+
+        Returns:
+            int: The number of messages replaced.
+        """
+        messages = self.messages() if self.prefix is None else list(self.messages())
+        replaced = 0
+        for index, (original, replacement) in replacements.items():
+            if index < len(messages) and messages[index] is original:
+                messages[index] = replacement
+                replaced += 1
+        if replaced:
+            self.history = messages
+            self.prefix = None
+            self.remote_id = None
+            self.remote_length = 0
+        return replaced
+
+    def save(self, file_path: str) -> bool:
+        """
+        Persists the chat history as a JSON document.
+
+        SDK message objects are stored as plain dictionaries, so a loaded
+        history can be sent to the API as is.
+
+        Args:
+            file_path (str): The path of the JSON file.
+
+        Returns:
+            bool: True if the history was written successfully, False otherwise.
+        """
+        return safe_write_file(codec.dumps(self.messages()), file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ChatHistory":
+        """
+        Loads a chat history saved with `save`.
+
+        Args:
+            file_path (str): The path of the JSON file.
+
+        Returns:
+            ChatHistory: The loaded history.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not a valid saved history.
+        """
+        content = safe_read_file(file_path)
+        if content is None:
+            raise FileNotFoundError(f"No chat history found at {file_path}.")
+        history = codec.loads(content)
+        if not isinstance(history, list):
+            raise ValueError(f"{file_path} does not contain a list of messages.")
+        return cls(history=history)
+
     def clear_messages(self):
         print("deleting history")
         self.history = []
+        self.prefix = None
+        self.remote_id = None
+        self.remote_length = 0
@@ -0,0 +1,196 @@
+"""
+Module: chat_manager.lifecycle_hooks
+Description:
+    This module provides the extension points of a `get_response` run:
+    callbacks registered on a HookRegistry are called when a run starts,
+    when a request is built, when its response is received, when a tool
+    starts and finishes, and when the run ends. Every event carries the
+    timing and the sizes of its step, so client-side time can be measured
+    and exported without patching ChatManager or ClientAction.
+
+    Callbacks are plain functions or coroutine functions. Plain callbacks run
+    inline, in the thread of the run; keep them cheap. Coroutines are
+    scheduled on an event loop in a background thread owned by the registry,
+    so slow exporters do not hold the run up. A callback that raises is
+    reported and does not interrupt the run.
+
+Classes:
+    HookEvent:
+        What a callback receives.
+    HookRegistry:
+        The callbacks of every event.
+    RunContext:
+        The events of one run.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+RUN_STARTED = "run_started"
+REQUEST_BUILT = "request_built"
+RESPONSE_RECEIVED = "response_received"
+TOOL_STARTED = "tool_started"
+TOOL_FINISHED = "tool_finished"
+RUN_FINISHED = "run_finished"
+
+EVENTS = (RUN_STARTED, REQUEST_BUILT, RESPONSE_RECEIVED, TOOL_STARTED, TOOL_FINISHED, RUN_FINISHED)
+
+_run_numbers = itertools.count(1)
+
+
+def next_run_number() -> int:
+    """
+    Returns a number identifying a run in the events of this process.
+    """
+    return next(_run_numbers)
+
+
+@dataclass
+class HookEvent:
+    """
+    What a callback receives.
+
+    Attributes:
+        name (str): The event (one of EVENTS).
+        run (int): The number of the run, shared by all its events.
+        model_type (str): The model of the run.
+        seconds (Optional[float]): The duration of the step that just ended (the
+            request for "response_received", the tool call for "tool_finished",
+            the whole run for "run_finished").
+        elapsed (float): The seconds since the run started.
+        size (Optional[int]): The size of the step's payload, in characters: the
+            messages sent, the response content, the tool arguments or result.
+        details (Dict[str, Any]): Event-specific values (message and token counts,
+            the tool name, the error of a failed step).
+    """
+    name: str
+    run: int
+    model_type: str
+    seconds: Optional[float] = None
+    elapsed: float = 0.0
+    size: Optional[int] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+class HookRegistry:
+    """
+    The callbacks of every lifecycle event.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: Dict[str, List[Callable]] = {name: [] for name in EVENTS}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def on(self, name: str, callback: Callable[[HookEvent], Any]) -> "HookRegistry":
+        """
+        Registers a callback (a function or a coroutine function) for an event.
+
+        Args:
+            name (str): The event (one of EVENTS).
+            callback (Callable[[HookEvent], Any]): The callback.
+
+        Returns:
+            HookRegistry: The current instance (for fluent chaining).
+
+        Raises:
+            ValueError: If the event is unknown.
+        """
+        if name not in self._callbacks:
+            raise ValueError(f"Unknown lifecycle event {name!r}; expected one of {', '.join(EVENTS)}.")
+        self._callbacks[name].append(callback)
+        return self
+
+    def off(self, name: str, callback: Callable[[HookEvent], Any]) -> "HookRegistry":
+        """
+        Removes a callback registered with `on`.
+
+        Returns:
+            HookRegistry: The current instance (for fluent chaining).
+        """
+        if callback in self._callbacks.get(name, []):
+            self._callbacks[name].remove(callback)
+        return self
+
+    def wants(self, name: str) -> bool:
+        """
+        Returns True if the event has callbacks, so its sizes are worth computing.
+        """
+        return bool(self._callbacks.get(name))
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Returns the background event loop of the coroutine callbacks, starting it if needed.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="lifecycle-hooks", daemon=True).start()
+            return self._loop
+
+    def emit(self, event: HookEvent) -> None:
+        """
+        Calls the callbacks of an event.
+
+        Args:
+            event (HookEvent): The event.
+        """
+        for callback in self._callbacks.get(event.name, ()):
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    asyncio.run_coroutine_threadsafe(self._guarded(callback, event), self._event_loop())
+                else:
+                    callback(event)
+            except Exception as error:
+                print(f"Problem in the {event.name} hook {getattr(callback, '__name__', callback)}:", error)
+
+    @staticmethod
+    async def _guarded(callback: Callable, event: HookEvent) -> None:
+        try:
+            await callback(event)
+        except Exception as error:
+            print(f"Problem in the {event.name} hook {getattr(callback, '__name__', callback)}:", error)
+
+    def close(self) -> None:
+        """
+        Stops the event loop of the coroutine callbacks (pending ones are dropped).
+        """
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+@dataclass
+class RunContext:
+    """
+    The events of one run: its number, model and start time, kept by the run
+    itself so concurrent runs on one ChatManager do not mix their timings.
+
+    Attributes:
+        hooks (HookRegistry): The registry receiving the events.
+        run (int): The number of the run.
+        model_type (str): The model of the run.
+        started (float): The `time.perf_counter()` value at the start of the run.
+    """
+    hooks: HookRegistry
+    run: int
+    model_type: str
+    started: float = field(default_factory=time.perf_counter)
+
+    def wants(self, name: str) -> bool:
+        """
+        Returns True if the event has callbacks.
+        """
+        return self.hooks.wants(name)
+
+    def emit(self, name: str, seconds: Optional[float] = None, size: Optional[int] = None, **details) -> None:
+        """
+        Sends an event of the run to the hooks.
+        """
+        self.hooks.emit(HookEvent(name, self.run, self.model_type, seconds,
+                                  time.perf_counter() - self.started, size, details))
@@ -0,0 +1,272 @@
+"""
+Module: chat_manager.logprob_analytics
+Description:
+    This module turns the token logprobs of many answers (the samples of one
+    request, the members of a council round, or a whole evaluation set) into
+    NumPy arrays and scores every answer at once: confidence, minimum token
+    confidence, entropy, top-1 margin and agreement with the other answers.
+    The scores can weight votes or feed routing decisions.
+
+    Answers are requested with `Config.set_logprobs(True)` and, for entropy
+    and margin, `set_top_logprobs(k)`. Answers without logprobs (e.g. from
+    reasoning models) have a length of 0; their confidence is NaN.
+
+    The logprobs are read once into padded (answers x tokens) matrices with
+    a validity mask; every score is then a vectorized reduction over them,
+    so scoring thousands of answers takes milliseconds.
+
+    NumPy is an optional dependency: install the "analytics" extra
+    (`pip install gpt_council[analytics]`). It is imported when a batch is
+    built, not when chat_manager is imported.
+
+Classes:
+    LogprobBatch:
+        The logprobs of a set of answers, with their scores.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from chat_manager.voting import answer_text, normalize_answer
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("Logprob analytics need NumPy: pip install gpt_council[analytics]") from error
+    return numpy
+
+
+def _get(obj: Any, name: str, default: Any = None) -> Any:
+    """
+    Reads a field of an SDK object or of its dictionary form.
+    """
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _choices_of(item: Any) -> List[Any]:
+    """
+    Returns the choices an item contributes: every choice of a raw API response,
+    the selected choice of an APIResponse, or the item itself if it is a choice.
+    """
+    if hasattr(item, "raw_api_response") and hasattr(item, "choice_index"):
+        return [item.raw_api_response.choices[item.choice_index]]
+    choices = _get(item, "choices")
+    return list(choices) if choices is not None else [item]
+
+
+@dataclass
+class LogprobBatch:
+    """
+    The logprobs of a set of answers.
+
+    Attributes:
+        answers (List[str]): The text of every answer.
+        labels (List[str]): The label of every answer (a member name, a sample index).
+        logprobs (numpy.ndarray): (answers, tokens) token logprobs, 0 where masked.
+        mask (numpy.ndarray): (answers, tokens) True for the tokens of each answer.
+        top_logprobs (Optional[numpy.ndarray]): (answers, tokens, k) logprobs of the k
+            most likely tokens at every position, -inf where missing; None if no
+            answer has top logprobs.
+        lengths (numpy.ndarray): The number of tokens of every answer.
+    """
+    answers: List[str]
+    labels: List[str]
+    logprobs: Any
+    mask: Any
+    top_logprobs: Any
+    lengths: Any
+
+    @classmethod
+    def from_responses(cls, responses: List[Any], labels: Optional[List[str]] = None) -> "LogprobBatch":
+        """
+        Reads the logprobs of a set of answers.
+
+        Args:
+            responses (List[Any]): Raw API responses (every choice is an answer),
+                APIResponses (their selected choice), or choices, as SDK objects or
+                dictionaries.
+            labels (Optional[List[str]]): A label per item of `responses` (its choices
+                are suffixed with their index when there are several); indices if None.
+
+        Returns:
+            LogprobBatch: The batch.
+        """
+        np = _numpy()
+        answers, names, token_lists = [], [], []
+        for position, item in enumerate(responses):
+            choices = _choices_of(item)
+            base = labels[position] if labels is not None else str(position)
+            for index, choice in enumerate(choices):
+                message = _get(choice, "message")
+                answers.append(answer_text(_get(message, "content") or ""))
+                names.append(base if len(choices) == 1 else f"{base}:{index}")
+                token_lists.append(_get(_get(choice, "logprobs"), "content") or [])
+
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        width = int(lengths.max()) if len(lengths) else 0
+        mask = np.arange(width)[None, :] < lengths[:, None]
+        flat = [token for tokens in token_lists for token in tokens]
+        logprobs = np.zeros((len(token_lists), width))
+        logprobs[mask] = np.fromiter((_get(token, "logprob") for token in flat), dtype=float, count=len(flat))
+
+        top_k = max((len(_get(token, "top_logprobs") or ()) for token in flat), default=0)
+        top_logprobs = None
+        if top_k:
+            padding = [-np.inf] * top_k
+            values = (value
+                      for token in flat
+                      for value in ([_get(alternative, "logprob") for alternative in _get(token, "top_logprobs") or ()]
+                                    + padding)[:top_k])
+            rows = np.fromiter(values, dtype=float, count=len(flat) * top_k).reshape(len(flat), top_k)
+            top_logprobs = np.full((len(token_lists), width, top_k), -np.inf)
+            top_logprobs[mask] = rows
+        return cls(answers, names, logprobs, mask, top_logprobs, lengths)
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def _mean(self, values):
+        """
+        Averages a (answers, tokens) matrix over the tokens of each answer (NaN if none).
+        """
+        np = _numpy()
+        totals = np.where(self.mask, values, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / np.where(self.lengths > 0, self.lengths, np.nan)
+
+    def mean_logprob(self):
+        """
+        Returns the mean token logprob of every answer.
+        """
+        return self._mean(self.logprobs)
+
+    def confidence(self):
+        """
+        Returns the geometric mean of the token probabilities of every answer (0 to 1).
+        """
+        return _numpy().exp(self.mean_logprob())
+
+    def min_confidence(self):
+        """
+        Returns the probability of the least likely token of every answer.
+        """
+        np = _numpy()
+        lowest = np.where(self.mask, self.logprobs, np.inf).min(axis=1, initial=np.inf)
+        return np.where(self.lengths > 0, np.exp(lowest), np.nan)
+
+    def _top(self):
+        if self.top_logprobs is None:
+            raise ValueError("Entropy and margin need top logprobs: request them with set_top_logprobs(k).")
+        return self.top_logprobs
+
+    def _top_probabilities(self):
+        """
+        Returns the top-k probabilities renormalized over the k alternatives.
+        """
+        np = _numpy()
+        probabilities = np.exp(self._top())
+        totals = probabilities.sum(axis=2, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(totals > 0, probabilities / totals, 0.0)
+
+    def entropy(self):
+        """
+        Returns the mean per-token entropy (in nats) of every answer, computed over
+        the top-k alternatives. Lower is more certain.
+        """
+        np = _numpy()
+        probabilities = self._top_probabilities()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            terms = np.where(probabilities > 0, -probabilities * np.log(probabilities), 0.0)
+        return self._mean(terms.sum(axis=2))
+
+    def margin(self):
+        """
+        Returns the mean per-token gap between the probabilities of the two most
+        likely alternatives of every answer (0 to 1). Higher is more certain.
+        """
+        np = _numpy()
+        probabilities = np.exp(self._top())
+        if probabilities.shape[2] < 2:
+            return self._mean(probabilities[:, :, 0])
+        best_two = -np.partition(-probabilities, 1, axis=2)[:, :, :2]
+        return self._mean(best_two[:, :, 0] - best_two[:, :, 1])
+
+    def groups(self) -> Tuple[List[str], Any]:
+        """
+        Groups the answers by their normalized form.
+
+        Returns:
+            Tuple[List[str], numpy.ndarray]: The normalized answers of the groups and
+                the group index of every answer (-1 for empty answers).
+        """
+        np = _numpy()
+        keys = [normalize_answer(answer) for answer in self.answers]
+        distinct = sorted({key for key in keys if key})
+        index = {key: position for position, key in enumerate(distinct)}
+        return distinct, np.fromiter((index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+
+    def agreement(self):
+        """
+        Returns, for every answer, the fraction of the other answers that give the
+        same normalized answer (0 for empty answers).
+        """
+        np = _numpy()
+        _, group = self.groups()
+        sizes = np.bincount(group[group >= 0], minlength=int(group.max(initial=-1)) + 1)
+        others = max(len(self) - 1, 1)
+        return np.where(group >= 0, (sizes[np.maximum(group, 0)] - 1) / others, 0.0)
+
+    def weighted_vote(self, weights=None) -> Tuple[Optional[str], float]:
+        """
+        Votes with the answers weighted by their confidence (or by `weights`).
+
+        Args:
+            weights (Optional[numpy.ndarray]): A weight per answer; the confidence if
+                None (answers without logprobs weigh 0).
+
+        Returns:
+            Tuple[Optional[str], float]: The first original answer of the group with the
+                highest total weight and that group's share of the total weight, or
+                (None, 0.0) if no answer voted.
+        """
+        np = _numpy()
+        distinct, group = self.groups()
+        weights = np.nan_to_num(self.confidence() if weights is None else np.asarray(weights, dtype=float))
+        voting = group >= 0
+        if not distinct or not voting.any():
+            return None, 0.0
+        totals = np.bincount(group[voting], weights=weights[voting], minlength=len(distinct))
+        winner = int(totals.argmax())
+        total = totals.sum()
+        share = float(totals[winner] / total) if total > 0 else 0.0
+        return self.answers[int(np.flatnonzero(group == winner)[0])], share
+
+    def scores(self) -> Dict[str, Any]:
+        """
+        Returns every score, as arrays indexed like `answers` (entropy and margin
+        only when top logprobs were requested).
+        """
+        scores = {
+            "confidence": self.confidence(),
+            "min_confidence": self.min_confidence(),
+            "agreement": self.agreement(),
+            "tokens": self.lengths,
+        }
+        if self.top_logprobs is not None:
+            scores["entropy"] = self.entropy()
+            scores["margin"] = self.margin()
+        return scores
+
+    def table(self) -> List[Dict[str, Any]]:
+        """
+        Returns the scores as one dictionary per answer, for logs and reports.
+        """
+        scores = self.scores()
+        return [{"label": label, "answer": answer,
+                 **{name: values[index].item() for name, values in scores.items()}}
+                for index, (label, answer) in enumerate(zip(self.labels, self.answers))]
@@ -0,0 +1,140 @@
+"""
+Module: chat_manager.profiling_hook
+Description:
+    This module profiles a sample of `get_response` runs in production. A
+    ProfilingHook attached to a HookRegistry picks a configurable fraction
+    of runs at random and runs them under `cProfile` (where client-side time
+    goes: JSON encoding, tool routing, history handling) or `tracemalloc`
+    (where memory goes). Each sampled run leaves a file in the output
+    directory: a `.prof` file for `pstats`/snakeviz, or a `.snapshot` file
+    for `tracemalloc.Snapshot.load`.
+
+    cProfile only sees the thread of the run: tools running in sandbox
+    processes or worker threads are not included. Only one cProfile
+    profiler can be active in a thread, so runs started while another
+    profiler is active are not sampled.
+
+Classes:
+    ProfilingHook:
+        Samples runs under cProfile or tracemalloc.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from chat_manager.lifecycle_hooks import RUN_FINISHED, RUN_STARTED, HookEvent, HookRegistry
+
+_MODES = ("cprofile", "tracemalloc")
+
+
+class ProfilingHook:
+    """
+    Samples runs under cProfile or tracemalloc and dumps one file per sampled run.
+
+    Attributes:
+        sample_rate (float): The fraction of runs profiled (0 to 1).
+        mode (str): "cprofile" or "tracemalloc".
+        output_dir (Path): The directory of the dumps.
+        frames (int): The number of frames tracemalloc keeps per allocation.
+        files (List[str]): The files written so far.
+    """
+
+    def __init__(self,
+                 sample_rate: float = 0.01,
+                 mode: str = "cprofile",
+                 output_dir: str = ".profiles",
+                 frames: int = 10) -> None:
+        """
+        Initializes the hook (attach it to a registry with `attach`).
+
+        Args:
+            sample_rate (float): The fraction of runs profiled (0 to 1).
+            mode (str): "cprofile" for time, "tracemalloc" for memory.
+            output_dir (str): The directory of the dumps.
+            frames (int): The number of frames tracemalloc keeps per allocation.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in _MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {', '.join(_MODES)}.")
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.frames = frames
+        self.files: List[str] = []
+        self._active: Dict[int, Any] = {}
+        self._traced_runs = 0
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    def attach(self, registry: HookRegistry) -> "ProfilingHook":
+        """
+        Registers the hook on the run events of a registry.
+
+        Returns:
+            ProfilingHook: The current instance (for fluent chaining).
+        """
+        registry.on(RUN_STARTED, self.run_started)
+        registry.on(RUN_FINISHED, self.run_finished)
+        return self
+
+    def _path_for(self, event: HookEvent, suffix: str) -> Path:
+        model = re.sub(r"[^A-Za-z0-9_.-]", "_", event.model_type or "model")
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return self.output_dir / f"{model}-{stamp}-{os.getpid()}-run{event.run}{suffix}"
+
+    def run_started(self, event: HookEvent) -> None:
+        """
+        Starts profiling the run if it is sampled.
+        """
+        if random.random() >= self.sample_rate:
+            return
+        if self.mode == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active in this thread.
+                return
+            self._active[event.run] = profiler
+            return
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracing = True
+            self._traced_runs += 1
+            self._active[event.run] = True
+
+    def run_finished(self, event: HookEvent) -> Optional[str]:
+        """
+        Stops profiling a sampled run and dumps its profile.
+
+        Returns:
+            Optional[str]: The file written, or None if the run was not sampled.
+        """
+        state = self._active.pop(event.run, None)
+        if state is None:
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cprofile":
+            state.disable()
+            path = self._path_for(event, ".prof")
+            state.dump_stats(str(path))
+        else:
+            path = self._path_for(event, ".snapshot")
+            tracemalloc.take_snapshot().dump(str(path))
+            with self._lock:
+                self._traced_runs -= 1
+                if self._traced_runs == 0 and self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+        self.files.append(str(path))
+        return str(path)
@@ -0,0 +1,358 @@
+"""
+Module: chat_manager.prompt_cache
+Description:
+    This module caches the answers of stateless single-turn requests and
+    serves them again for prompts that are near-duplicates of a cached one:
+    the same question with different whitespace, casing, trailing
+    punctuation or filler words. It works offline: no embedding request is
+    made.
+
+    A prompt is normalized (Unicode NFKC, lower case, whitespace collapsed,
+    trailing punctuation dropped; digits, operators and other symbols are
+    kept), cut into overlapping character shingles and
+    fingerprinted with MinHash. The share of equal MinHash values between
+    two fingerprints estimates the Jaccard similarity of their shingle sets.
+    Fingerprints are indexed by locality-sensitive hashing: each is split
+    into bands, and prompts sharing at least one band are the candidates of
+    a lookup. Only the candidates are compared, so a lookup costs the same
+    with ten or a million entries.
+
+    A near-duplicate is only served when, besides passing the similarity
+    threshold, it has the same words as the prompt once stopwords are
+    removed: "the capital of austria" never answers "the capital of
+    australia", however similar the two strings are.
+
+    Entries are scoped by what the request sends besides the prompt: the
+    model type, the config parameters and the messages before the prompt
+    (the developer instructions). The similarity threshold can differ per
+    Director preset: a preset writing code needs near-exact prompts, a FAQ
+    assistant can be more lenient.
+
+Classes:
+    CacheHit:
+        A cached answer and how similar its prompt was.
+    PromptCache:
+        The near-duplicate cache.
+
+Functions:
+    normalize_prompt:
+        Returns the comparable form of a prompt.
+    content_tokens:
+        Returns the words and symbols of a normalized prompt, without stopwords.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from helpers.json_codec import codec
+from helpers.utils import safe_read_file, safe_write_file
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.,;:!?…]+$")
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# Words (and separators) whose presence does not change the question asked.
+STOPWORDS = frozenset((
+    "a", "an", "the", "please", "kindly", "can", "could", "would", "you", "me", "tell", "i", "want", "to",
+    "know", "is", "are", "was", "s", "do", "does", "just", "hey", "hi", "hello", "thanks", "thank",
+    ",", "'",
+))
+# A Mersenne prime larger than the 32-bit shingle hashes.
+_PRIME = (1 << 61) - 1
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Returns the comparable form of a prompt: NFKC-normalized, lower-cased,
+    with collapsed whitespace and without trailing punctuation. Digits,
+    operators and other symbols are kept: "2+2" and "2*2" stay different.
+    """
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", prompt).lower()).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def content_tokens(normalized: str) -> Tuple[str, ...]:
+    """
+    Returns the words and symbols of a normalized prompt, in order, without stopwords.
+    """
+    return tuple(token for token in _TOKEN.findall(normalized) if token not in STOPWORDS)
+
+
+@dataclass
+class CacheHit:
+    """
+    A cached answer.
+
+    Attributes:
+        answer (str): The cached answer.
+        prompt (str): The prompt the answer was cached for.
+        similarity (float): The estimated similarity of the two prompts (1.0 for
+            prompts equal once normalized).
+    """
+    answer: str
+    prompt: str
+    similarity: float
+
+
+class PromptCache:
+    """
+    A cache of single-turn answers, served for near-duplicate prompts.
+
+    Attributes:
+        threshold (float): The default minimum similarity of a near-duplicate hit (0 to 1).
+        preset_thresholds (Dict[str, float]): The threshold of Director presets, by preset name.
+        shingle_size (int): The length of the character shingles.
+        max_entries (int): The number of entries kept; the oldest are evicted first.
+        hits (int): The lookups answered by an exact (normalized) match.
+        near_hits (int): The lookups answered by a near-duplicate.
+        misses (int): The lookups without an answer.
+    """
+
+    def __init__(self,
+                 threshold: float = 0.8,
+                 preset_thresholds: Optional[Dict[str, float]] = None,
+                 num_hashes: int = 64,
+                 bands: int = 16,
+                 shingle_size: int = 4,
+                 max_entries: int = 10000,
+                 seed: int = 1) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            threshold (float): The default minimum similarity of a near-duplicate hit.
+            preset_thresholds (Optional[Dict[str, float]]): The threshold of Director
+                presets by preset name (e.g. {"python_programmer": 0.95}).
+            num_hashes (int): The length of the MinHash fingerprints.
+            bands (int): The number of LSH bands (must divide `num_hashes`); more bands
+                find less similar candidates.
+            shingle_size (int): The length of the character shingles.
+            max_entries (int): The number of entries kept.
+            seed (int): The seed of the hash functions; caches saved and loaded must use the same.
+
+        Raises:
+            ValueError: If `bands` does not divide `num_hashes`.
+        """
+        if num_hashes % bands:
+            raise ValueError("The number of bands must divide the number of hashes.")
+        self.threshold = threshold
+        self.preset_thresholds = dict(preset_thresholds or {})
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._rows = num_hashes // bands
+        self._bands = bands
+        generator = random.Random(seed)
+        self._permutations = [(generator.randrange(1, _PRIME), generator.randrange(0, _PRIME))
+                              for _ in range(num_hashes)]
+        # Entry id -> (scope, normalized prompt, signature, prompt, answer, content tokens).
+        self._entries: "OrderedDict[int, Tuple[str, str, Tuple[int, ...], str, str, Tuple[str, ...]]]" \
+            = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], set] = {}
+        self._presets: Dict[Tuple[str, str], Optional[str]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # Fingerprints
+
+    def _shingles(self, text: str) -> List[int]:
+        size = self.shingle_size
+        pieces = {text[index:index + size] for index in range(max(1, len(text) - size + 1))}
+        return [int.from_bytes(hashlib.blake2b(piece.encode("utf-8"), digest_size=4).digest(), "big")
+                for piece in pieces]
+
+    def signature(self, normalized: str) -> Tuple[int, ...]:
+        """
+        Returns the MinHash fingerprint of a normalized prompt.
+        """
+        shingles = self._shingles(normalized)
+        return tuple(min((a * shingle + b) % _PRIME for shingle in shingles) for a, b in self._permutations)
+
+    def _band_keys(self, scope: str, signature: Tuple[int, ...]):
+        rows = self._rows
+        return [(scope, band, signature[band * rows:(band + 1) * rows]) for band in range(self._bands)]
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """
+        Returns the estimated Jaccard similarity of two fingerprints.
+        """
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+    # Scopes and thresholds
+
+    @staticmethod
+    def scope_of(chatbot, context: Optional[List[Any]] = None) -> str:
+        """
+        Returns the scope of a request: answers are only shared within a scope.
+
+        Args:
+            chatbot: The (model_config, model) tuple of the request.
+            context (Optional[List[Any]]): The messages sent before the prompt (the
+                developer instructions).
+        """
+        model_config, model = chatbot
+        return codec.hash_key({"model": model.model_type, "params": model_config.get_params(),
+                               "context": list(context or [])})
+
+    def preset_of(self, model) -> Optional[str]:
+        """
+        Returns the name of the Director preset a model was built with, if any
+        (matched on model type and developer instruction).
+        """
+        key = (model.model_type, model.developer)
+        if key not in self._presets:
+            from models import Director
+            name = None
+            presets = [attribute for attribute, member in vars(Director).items()
+                       if isinstance(member, staticmethod)]
+            for candidate in presets:
+                preset = getattr(Director, candidate)()
+                if (preset.model_type, preset.developer) == key:
+                    name = candidate
+                    break
+            self._presets[key] = name
+        return self._presets[key]
+
+    def threshold_for(self, model) -> float:
+        """
+        Returns the similarity threshold of a model: its preset's, or the default one.
+        """
+        preset = self.preset_of(model)
+        return self.preset_thresholds.get(preset, self.threshold) if preset else self.threshold
+
+    # Lookups
+
+    def lookup(self, prompt: str, chatbot, context: Optional[List[Any]] = None) -> Optional[CacheHit]:
+        """
+        Returns the cached answer of the most similar prompt, if it passes the
+        threshold and has the same words once stopwords are removed.
+
+        Args:
+            prompt (str): The user message.
+            chatbot: The (model_config, model) tuple that would answer it.
+            context (Optional[List[Any]]): The messages sent before the prompt.
+
+        Returns:
+            Optional[CacheHit]: The hit, or None.
+        """
+        scope = self.scope_of(chatbot, context)
+        normalized = normalize_prompt(prompt)
+        with self._lock:
+            entry_id = self._exact.get((scope, normalized))
+            if entry_id is not None:
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                entry = self._entries[entry_id]
+                return CacheHit(entry[4], entry[3], 1.0)
+        signature = self.signature(normalized)
+        tokens = content_tokens(normalized)
+        threshold = self.threshold_for(chatbot[1])
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(scope, signature):
+                candidates |= self._buckets.get(key, set())
+            best, best_similarity = None, -1.0
+            for candidate in candidates:
+                entry = self._entries[candidate]
+                if entry[5] != tokens:
+                    continue
+                similarity = self.similarity(signature, entry[2])
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is None or best_similarity < threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.near_hits += 1
+            entry = self._entries[best]
+            return CacheHit(entry[4], entry[3], best_similarity)
+
+    def store(self, prompt: str, chatbot, answer: str, context: Optional[List[Any]] = None) -> None:
+        """
+        Caches the answer of a prompt.
+
+        Args:
+            prompt (str): The user message.
+            chatbot: The (model_config, model) tuple that answered it.
+            answer (str): The answer.
+            context (Optional[List[Any]]): The messages sent before the prompt.
+        """
+        self._add(self.scope_of(chatbot, context), prompt, answer)
+
+    def _add(self, scope: str, prompt: str, answer: str) -> None:
+        normalized = normalize_prompt(prompt)
+        signature = self.signature(normalized)
+        with self._lock:
+            previous = self._exact.get((scope, normalized))
+            if previous is not None:
+                self._remove(previous)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, normalized, signature, prompt, answer, content_tokens(normalized))
+            self._exact[(scope, normalized)] = entry_id
+            for key in self._band_keys(scope, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        scope, normalized, signature = self._entries.pop(entry_id)[:3]
+        self._exact.pop((scope, normalized), None)
+        for key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._exact.clear()
+            self._buckets.clear()
+
+    # Persistence
+
+    def save(self, file_path: str) -> bool:
+        """
+        Writes the entries to a JSON file (the fingerprints are recomputed on load).
+
+        Returns:
+            bool: True if the file was written successfully.
+        """
+        with self._lock:
+            entries = [[entry[0], entry[3], entry[4]] for entry in self._entries.values()]
+        return safe_write_file(codec.dumps(entries), file_path)
+
+    def load(self, file_path: str) -> int:
+        """
+        Adds the entries of a file written by `save`.
+
+        Returns:
+            int: The number of entries loaded (0 if the file is missing).
+        """
+        if not Path(file_path).is_file():
+            return 0
+        content = safe_read_file(file_path)
+        if not content:
+            return 0
+        entries = codec.loads(content)
+        for scope, prompt, answer in entries:
+            self._add(scope, prompt, answer)
+        return len(entries)
@@ -0,0 +1,263 @@
+"""
+Module: chat_manager.responses_backend
+Description:
+    This module sends `get_response` turns through the Responses API with
+    server-side state instead of Chat Completions. Chat Completions needs the
+    whole conversation on every request, so tool-heavy sessions re-upload and
+    re-encode tens of KB to MB per turn. With `store=True`, the server keeps
+    each response and the next request names it as `previous_response_id`:
+    only the messages added since then (the new user message or the tool
+    results) are sent.
+
+    The ChatHistory stays the local mirror of the conversation, in Chat
+    Completions format: responses are converted into Chat Completions-shaped
+    objects, so APIResponse, ClientAction, RunBudget and the history work
+    unchanged. The history records the id of the stored response and how many
+    of its messages the server holds (`remote_id`, `remote_length`); forks
+    inherit them and continue the same server-side chain.
+
+    When the server no longer has the previous response (stored responses
+    expire) or the local history no longer matches it, the whole conversation
+    is sent again and a new chain starts.
+
+Classes:
+    ResponsesBackend:
+        Sends a turn through the Responses API and mirrors its output.
+
+Functions:
+    completion_from_message:
+        Rebuilds a Chat Completions-shaped response around a message dictionary.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from helpers.json_codec import to_jsonable
+
+# Config parameters that keep their name in the Responses API.
+_SHARED_PARAMS = ("store", "metadata", "service_tier", "temperature", "top_p", "top_logprobs")
+
+
+@dataclass
+class _Function:
+    name: str
+    arguments: str
+
+
+@dataclass
+class _ToolCall:
+    id: str
+    function: _Function
+    type: str = "function"
+
+
+class _Message:
+    """
+    An assistant message shaped like a Chat Completions message. It is not a
+    dataclass so that JSON encoders go through `model_dump`, like for SDK messages.
+    """
+
+    def __init__(self, content: Optional[str], tool_calls: Optional[List[_ToolCall]] = None) -> None:
+        self.role = "assistant"
+        self.content = content
+        self.tool_calls = tool_calls
+
+    def model_dump(self, exclude_none: bool = True) -> Dict[str, Any]:
+        message = {"role": self.role, "content": self.content}
+        if self.tool_calls:
+            message["tool_calls"] = [
+                {"id": call.id, "type": call.type,
+                 "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                for call in self.tool_calls
+            ]
+        return {key: value for key, value in message.items() if value is not None or not exclude_none}
+
+
+@dataclass
+class _Choice:
+    message: _Message
+    index: int = 0
+    logprobs: Any = None
+    finish_reason: str = "stop"
+
+
+@dataclass
+class _Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+@dataclass
+class _Completion:
+    """
+    A Responses API response shaped like a Chat Completions response.
+    """
+    id: str
+    model: str
+    choices: List[_Choice]
+    usage: _Usage = field(default_factory=_Usage)
+
+
+def completion_from_message(message: Dict[str, Any], response_id: str = "", model: str = "") -> _Completion:
+    """
+    Rebuilds a Chat Completions-shaped response around an assistant message
+    dictionary, e.g. one restored from a checkpoint.
+
+    Args:
+        message (Dict[str, Any]): The assistant message, as stored in a ChatHistory.
+        response_id (str): The id of the response.
+        model (str): The model that produced it.
+
+    Returns:
+        _Completion: The response, with one choice and no usage.
+    """
+    tool_calls = [_ToolCall(call["id"], _Function(call["function"]["name"], call["function"]["arguments"]))
+                  for call in message.get("tool_calls") or []]
+    return _Completion(
+        id=response_id,
+        model=model,
+        choices=[_Choice(_Message(message.get("content"), tool_calls or None),
+                         finish_reason="tool_calls" if tool_calls else "stop")],
+    )
+
+
+class ResponsesBackend:
+    """
+    Sends turns through the Responses API, uploading only the new messages.
+
+    Attributes:
+        resends (int): The number of turns that had to send the whole conversation
+            after a chain had been started.
+    """
+
+    def __init__(self) -> None:
+        self.resends = 0
+
+    @staticmethod
+    def to_input_items(messages: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Converts Chat Completions messages into Responses API input items.
+
+        Args:
+            messages (List[Any]): Message dictionaries or SDK message objects.
+
+        Returns:
+            List[Dict[str, Any]]: The input items.
+        """
+        items = []
+        for message in messages:
+            if not isinstance(message, dict):
+                message = to_jsonable(message)
+            role = message.get("role")
+            if role == "tool":
+                items.append({"type": "function_call_output",
+                              "call_id": message["tool_call_id"],
+                              "output": message.get("content") or ""})
+            elif role == "assistant":
+                if message.get("content"):
+                    items.append({"role": "assistant", "content": message["content"]})
+                for call in message.get("tool_calls") or []:
+                    items.append({"type": "function_call",
+                                  "call_id": call["id"],
+                                  "name": call["function"]["name"],
+                                  "arguments": call["function"]["arguments"]})
+            else:
+                items.append({"role": role, "content": message.get("content")})
+        return items
+
+    @staticmethod
+    def to_tools(schemas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Converts Chat Completions tool schemas into Responses API function tools.
+        """
+        return [{"type": "function", **schema["function"]} for schema in schemas]
+
+    @staticmethod
+    def to_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Converts Config parameters into Responses API parameters. Parameters the
+        Responses API does not accept (penalties, logit_bias, n, seed, stop,
+        prediction) are dropped; `store` is always enabled.
+        """
+        converted = {name: params[name] for name in _SHARED_PARAMS if name in params}
+        if "max_completion_tokens" in params:
+            converted["max_output_tokens"] = params["max_completion_tokens"]
+        if "reasoning_effort" in params:
+            converted["reasoning"] = {"effort": params["reasoning_effort"]}
+        converted["store"] = True
+        return converted
+
+    @staticmethod
+    def to_completion(response) -> _Completion:
+        """
+        Converts a Responses API response into a Chat Completions-shaped response.
+        """
+        texts = []
+        tool_calls = []
+        for item in response.output:
+            if item.type == "message":
+                texts.extend(part.text for part in item.content if getattr(part, "type", "") == "output_text")
+            elif item.type == "function_call":
+                tool_calls.append(_ToolCall(item.call_id, _Function(item.name, item.arguments)))
+        message = _Message("".join(texts) if texts else None, tool_calls or None)
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "input_tokens", 0) or 0
+        completion_tokens = getattr(usage, "output_tokens", 0) or 0
+        return _Completion(
+            id=response.id,
+            model=getattr(response, "model", ""),
+            choices=[_Choice(message, finish_reason="tool_calls" if tool_calls else "stop")],
+            usage=_Usage(prompt_tokens, completion_tokens, prompt_tokens + completion_tokens),
+        )
+
+    @staticmethod
+    def _is_expired(error: Exception) -> bool:
+        """
+        Returns True if `error` says the previous response is no longer available.
+        """
+        return getattr(error, "status_code", None) == 404 or "previous_response" in str(error)
+
+    def create(self, client, history, request: Dict[str, Any], params: Dict[str, Any]) -> _Completion:
+        """
+        Sends a turn and returns its response in Chat Completions shape.
+
+        The history is not modified: once the response is appended to it, the
+        caller records `response.id` as `history.remote_id` and the history's
+        length as `history.remote_length`.
+
+        Args:
+            client: The openai client.
+            history (ChatHistory): The conversation.
+            request (Dict[str, Any]): The Chat Completions request built by `get_response`
+                ("model", "messages", and optionally "tools", "tool_choice", "timeout").
+            params (Dict[str, Any]): The Config parameters.
+
+        Returns:
+            _Completion: The response, shaped like a Chat Completions response.
+        """
+        messages = request["messages"]
+        arguments = {"model": request["model"], **self.to_params(params)}
+        if "tools" in request:
+            arguments["tools"] = self.to_tools(request["tools"])
+        if "tool_choice" in request:
+            arguments["tool_choice"] = request["tool_choice"]
+        if "timeout" in request:
+            arguments["timeout"] = request["timeout"]
+
+        chained = history.remote_id is not None and history.remote_length <= len(messages)
+        if chained:
+            try:
+                response = client.responses.create(
+                    input=self.to_input_items(messages[history.remote_length:]),
+                    previous_response_id=history.remote_id,
+                    **arguments
+                )
+                return self.to_completion(response)
+            except Exception as error:
+                if not self._is_expired(error):
+                    raise
+        if history.remote_id is not None:
+            self.resends += 1
+        response = client.responses.create(input=self.to_input_items(messages), **arguments)
+        return self.to_completion(response)
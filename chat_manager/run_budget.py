@@ -0,0 +1,184 @@
+"""
+Module: chat_manager.run_budget
+Description:
+    This module bounds a `ChatManager.get_response` run. Without a bound, a model
+    that keeps requesting tools loops forever and keeps spending tokens.
+
+    A RunBudget limits the number of API calls (turns), the total tokens and
+    the cost of a run, and sets an absolute deadline. The remaining time is
+    passed on as the network timeout of every request and as the timeout of
+    sandboxed tools. Once the budget is spent, the run winds down with one last
+    request in which tools are disabled, so the model gives its best final
+    answer; that request is skipped if the deadline has passed or the run was
+    cancelled.
+
+    Concurrent runs (e.g. the members of a council round) use budgets spawned
+    from one parent budget: their usage is charged to the parent as it is
+    recorded, and they stop once the parent is spent, so together they never
+    get more than the parent's limits.
+
+Classes:
+    RunBudget:
+        The limits of a run and what it has used so far.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class RunBudget:
+    """
+    The limits of a run and what it has used so far.
+
+    Any limit left to None is not enforced. Usage is recorded from the `usage`
+    field of every API response.
+
+    Attributes:
+        max_turns (Optional[int]): The maximum number of API calls.
+        max_total_tokens (Optional[int]): The maximum number of prompt plus completion tokens.
+        max_cost (Optional[float]): The maximum cost, in the currency of `prices`.
+        deadline (Optional[float]): The absolute deadline, as a `time.time()` timestamp.
+        prices (Dict[str, Tuple[float, float]]): The (prompt, completion) price per million
+            tokens of each model type. Dated snapshots (e.g. "o3-mini-2025-01-31") use the
+            price of the longest matching prefix. Models without a price cost nothing.
+        turns_used (int): The number of API calls made so far.
+        tokens_used (int): The number of tokens used so far.
+        cost_used (float): The cost so far.
+        parent (Optional[RunBudget]): The budget this one was spawned from; it is
+            charged with this budget's usage and its limits apply too.
+    """
+    max_turns: Optional[int] = None
+    max_total_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+    deadline: Optional[float] = None
+    prices: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    turns_used: int = 0
+    tokens_used: int = 0
+    cost_used: float = 0.0
+    cancelled: bool = False
+    parent: Optional["RunBudget"] = field(default=None, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def within(cls, seconds: float, **limits) -> "RunBudget":
+        """
+        Builds a budget whose deadline is `seconds` from now.
+
+        Args:
+            seconds (float): The time allowed for the run.
+            **limits: The other limits (max_turns, max_total_tokens, max_cost, prices).
+
+        Returns:
+            RunBudget: The budget.
+        """
+        return cls(deadline=time.time() + seconds, **limits)
+
+    def price_of(self, model_type: str) -> Optional[Tuple[float, float]]:
+        """
+        Returns the (prompt, completion) price per million tokens of a model type.
+        """
+        matches = [prefix for prefix in self.prices if model_type.startswith(prefix)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def record(self, raw_api_response, model_type: str) -> None:
+        """
+        Records the turn and the usage of an API response.
+
+        Args:
+            raw_api_response: The raw API response (its `usage` may be missing).
+            model_type (str): The model that produced the response.
+        """
+        usage = getattr(raw_api_response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        price = self.price_of(model_type)
+        cost = (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000 if price is not None else 0.0
+        self.add_usage(1, prompt_tokens + completion_tokens, cost)
+
+    def add_usage(self, turns: int, tokens: int, cost: float) -> None:
+        """
+        Adds usage to this budget and to the budgets it was spawned from.
+
+        Args:
+            turns (int): The number of API calls.
+            tokens (int): The number of prompt plus completion tokens.
+            cost (float): The cost, in the currency of `prices`.
+        """
+        budget = self
+        while budget is not None:
+            with budget._lock:
+                budget.turns_used += turns
+                budget.tokens_used += tokens
+                budget.cost_used += cost
+            budget = budget.parent
+
+    def remaining_time(self) -> Optional[float]:
+        """
+        Returns the seconds left before the deadline (never negative), or None without deadline.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def spawn(self) -> "RunBudget":
+        """
+        Returns a budget for one of several concurrent runs (e.g. a council member).
+        It has the same deadline and prices and no limits of its own: its usage is
+        charged to this budget as it is recorded, and it is spent once this budget
+        is, so all the runs spawned from this budget share its limits. Cancelling
+        it stops that run only; cancelling this budget stops them all.
+        """
+        return RunBudget(deadline=self.deadline, prices=self.prices, parent=self)
+
+    def absorb(self, child: "RunBudget") -> None:
+        """
+        Adds the usage of another budget to this one (budgets spawned from this
+        one are already charged here and are ignored).
+        """
+        if child.parent is self:
+            return
+        with self._lock:
+            self.turns_used += child.turns_used
+            self.tokens_used += child.tokens_used
+            self.cost_used += child.cost_used
+
+    def cancel(self) -> None:
+        """
+        Marks the run as cancelled: it stops before its next request.
+        """
+        self.cancelled = True
+
+    def exhaustion_reason(self) -> Optional[str]:
+        """
+        Returns why the budget is spent, or None if the run may continue.
+        """
+        if self.cancelled:
+            return "the run was cancelled"
+        if self.deadline is not None and time.time() >= self.deadline:
+            return "the deadline has passed"
+        if self.max_turns is not None and self.turns_used >= self.max_turns:
+            return f"the limit of {self.max_turns} turns was reached"
+        if self.max_total_tokens is not None and self.tokens_used >= self.max_total_tokens:
+            return f"the limit of {self.max_total_tokens} tokens was reached"
+        if self.max_cost is not None and self.cost_used >= self.max_cost:
+            return f"the cost limit of {self.max_cost} was reached"
+        if self.parent is not None:
+            return self.parent.exhaustion_reason()
+        return None
+
+    def exhausted(self) -> bool:
+        """
+        Returns True if the run must stop calling tools.
+        """
+        return self.exhaustion_reason() is not None
+
+    def allows_final_answer(self) -> bool:
+        """
+        Returns True if there is still time for the forced final answer.
+        """
+        if self.parent is not None and not self.parent.allows_final_answer():
+            return False
+        return not self.cancelled and (self.deadline is None or time.time() < self.deadline)
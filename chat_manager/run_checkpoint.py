@@ -0,0 +1,265 @@
+"""
+Module: chat_manager.run_checkpoint
+Description:
+    This module checkpoints the turns of `get_response` tool loops, so a run
+    interrupted by a crash or a deploy resumes from its last completed turn
+    instead of repeating every paid request and tool call.
+
+    A run is an append-only JSON Lines file named after its id. The first
+    line holds the conversation as it was when the run started; every later
+    line is one checkpoint, written once a response is appended ("response")
+    and once its tool calls have run ("action"). A checkpoint holds only the
+    messages appended since the previous one, the APIResponse or ClientAction
+    state, the budget usage so far and the Responses API chain. When the
+    history is rewritten (by a compaction), the next checkpoint holds the
+    whole conversation instead of a delta.
+
+    `ChatManager.resume(run_id, chatbot)` replays the file: a run that ended
+    returns its final answer, a run stopped after a response runs the tool
+    calls of that response, and a run stopped after a tool action sends the
+    next request.
+
+Classes:
+    RunState:
+        A run rebuilt from its checkpoints.
+    RunCheckpointer:
+        Writes and reads the checkpoints of runs.
+"""
+
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from helpers.json_codec import codec, to_jsonable
+
+RESPONSE = "response"
+ACTION = "action"
+DONE = "done"
+
+
+@dataclass
+class RunState:
+    """
+    A run rebuilt from its checkpoints.
+
+    Attributes:
+        run_id (str): The id of the run.
+        model_type (str): The model the run was started with.
+        messages (List[dict]): The conversation at the last checkpoint.
+        kind (Optional[str]): The kind of the last checkpoint ("response", "action"
+            or "done"), None if the run has none.
+        api_response (Optional[dict]): The state of the latest APIResponse.
+        client_action (Optional[dict]): The state of the latest ClientAction, if the
+            last checkpoint is an action.
+        usage (Dict[str, Any]): The turns, tokens and cost used so far.
+        last_tool (Optional[str]): The latest tool called.
+        remote_id (Optional[str]): The Responses API chain of the history.
+        remote_length (int): The number of messages the server holds under `remote_id`.
+        turns (int): The number of responses checkpointed.
+    """
+    run_id: str
+    model_type: str
+    messages: List[dict] = field(default_factory=list)
+    kind: Optional[str] = None
+    api_response: Optional[dict] = None
+    client_action: Optional[dict] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+    last_tool: Optional[str] = None
+    remote_id: Optional[str] = None
+    remote_length: int = 0
+    turns: int = 0
+
+    @property
+    def done(self) -> bool:
+        """
+        True if the run reached its final answer.
+        """
+        return self.kind == DONE
+
+
+class RunCheckpointer:
+    """
+    Writes and reads the checkpoints of `get_response` runs.
+
+    Attributes:
+        directory (Path): The directory of the run files.
+        durable (bool): Whether every checkpoint is flushed to disk (fsync) before
+            the run continues; without it a power loss may drop the latest ones.
+    """
+
+    def __init__(self, directory: str = ".chat_runs", durable: bool = True) -> None:
+        self.directory = Path(directory)
+        self.durable = durable
+        # The number of messages of each open run already written.
+        self._written: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def path_of(self, run_id: str) -> Path:
+        """
+        Returns the file of a run.
+        """
+        return self.directory / f"{Path(run_id).name}.jsonl"
+
+    def _append(self, run_id: str, entry: Dict[str, Any], mode: str = "a") -> None:
+        with open(self.path_of(run_id), mode, encoding="utf-8") as file:
+            file.write(codec.dumps(entry) + "\n")
+            if self.durable:
+                file.flush()
+                os.fsync(file.fileno())
+
+    @staticmethod
+    def _plain(messages: List[Any]) -> List[dict]:
+        return [message if isinstance(message, dict) else to_jsonable(message) for message in messages]
+
+    def start(self, history, model_type: str, run_id: Optional[str] = None) -> str:
+        """
+        Starts a run and records the conversation it starts from. Starting a run
+        with the id of an existing one replaces its checkpoints.
+
+        Args:
+            history (ChatHistory): The conversation.
+            model_type (str): The model of the run.
+            run_id (Optional[str]): The id of the run (a random one if None).
+
+        Returns:
+            str: The id of the run.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        messages = history.messages()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._append(run_id, {"run_id": run_id, "model_type": model_type, "started": time.time(),
+                                  "messages": self._plain(messages)}, mode="w")
+            self._written[run_id] = len(messages)
+        return run_id
+
+    def rewritten(self, run_id: str) -> None:
+        """
+        Notes that the history of a run was rewritten (e.g. compacted): the next
+        checkpoint holds the whole conversation.
+        """
+        with self._lock:
+            self._written[run_id] = -1
+
+    def record(self,
+               run_id: str,
+               kind: str,
+               history,
+               api_response=None,
+               client_action=None,
+               budget=None,
+               last_tool: Optional[str] = None) -> None:
+        """
+        Appends a checkpoint to a run.
+
+        Args:
+            run_id (str): The id of the run.
+            kind (str): "response" after a response was appended, "action" after its
+                tool calls ran, "done" once the run has its final answer.
+            history (ChatHistory): The conversation.
+            api_response (Optional[APIResponse]): The latest response.
+            client_action (Optional[ClientAction]): The tool action just executed.
+            budget (Optional[RunBudget]): The budget of the run.
+            last_tool (Optional[str]): The latest tool called.
+        """
+        messages = history.messages()
+        entry: Dict[str, Any] = {"kind": kind}
+        with self._lock:
+            written = self._written.get(run_id, -1)
+            if 0 <= written <= len(messages):
+                entry["new_messages"] = self._plain(messages[written:])
+            else:
+                entry["messages"] = self._plain(messages)
+            if api_response is not None:
+                entry["api_response"] = api_response.to_state()
+            if client_action is not None:
+                entry["client_action"] = client_action.to_state()
+            if budget is not None:
+                entry["usage"] = {"turns": budget.turns_used, "tokens": budget.tokens_used,
+                                  "cost": budget.cost_used}
+            entry["last_tool"] = last_tool
+            entry["remote_id"] = history.remote_id
+            entry["remote_length"] = history.remote_length
+            self._append(run_id, entry)
+            if kind == DONE:
+                self._written.pop(run_id, None)
+            else:
+                self._written[run_id] = len(messages)
+
+    def load(self, run_id: str) -> RunState:
+        """
+        Rebuilds a run from its checkpoints. A torn last line (the process died
+        while writing it) is ignored and cut off the file, so the checkpoints of
+        the resumed run are appended after the last complete one. A header line
+        (a line without "kind") restarts the run from its conversation.
+
+        Args:
+            run_id (str): The id of the run.
+
+        Returns:
+            RunState: The run at its last checkpoint.
+
+        Raises:
+            FileNotFoundError: If there is no run with that id.
+        """
+        path = self.path_of(run_id)
+        if not path.is_file():
+            raise FileNotFoundError(f"No checkpointed run {run_id} in {self.directory}.")
+        state = None
+        valid_length = 0
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    entry = codec.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    # Complete JSON but no newline: the write was cut short.
+                    break
+                valid_length += len(line)
+                if state is None or "kind" not in entry:
+                    state = RunState(run_id, entry.get("model_type", ""), list(entry.get("messages", [])))
+                    continue
+                if "messages" in entry:
+                    state.messages = list(entry["messages"])
+                else:
+                    state.messages.extend(entry.get("new_messages", []))
+                state.kind = entry["kind"]
+                if "api_response" in entry:
+                    state.api_response = entry["api_response"]
+                if entry["kind"] == RESPONSE:
+                    state.turns += 1
+                state.client_action = entry.get("client_action")
+                state.usage = entry.get("usage", state.usage)
+                state.last_tool = entry.get("last_tool")
+                state.remote_id = entry.get("remote_id")
+                state.remote_length = entry.get("remote_length", 0)
+        if state is None:
+            raise ValueError(f"The run file {path} is empty.")
+        if valid_length < path.stat().st_size:
+            with open(path, "r+b") as file:
+                file.truncate(valid_length)
+        with self._lock:
+            # Checkpoints of the resumed run continue from the rebuilt conversation.
+            self._written[run_id] = len(state.messages)
+        return state
+
+    def runs(self) -> List[str]:
+        """
+        Returns the ids of the checkpointed runs.
+        """
+        if not self.directory.is_dir():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.jsonl"))
+
+    def discard(self, run_id: str) -> None:
+        """
+        Deletes the checkpoints of a run.
+        """
+        with self._lock:
+            self._written.pop(run_id, None)
+        self.path_of(run_id).unlink(missing_ok=True)
@@ -0,0 +1,78 @@
+"""
+Module: chat_manager.voting
+Description:
+    This module compares the answers of several samples or council members.
+    Answers are normalized (case, whitespace, surrounding punctuation and a
+    leading "role: ..." line are ignored) so trivially different phrasings of
+    the same answer are counted together.
+
+Functions:
+    answer_text:
+        Returns an answer without the role line `get_response` puts before it.
+    normalize_answer:
+        Returns the comparable form of an answer.
+    majority_vote:
+        Returns the most common answer and how many answers agree with it.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+_ROLE_PREFIX = re.compile(r"^role:\s*\w+\s*\n")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def answer_text(answer: Optional[str]) -> str:
+    """
+    Returns an answer without the "role: ..." line `get_response` puts before it.
+
+    Args:
+        answer (Optional[str]): The answer, possibly as returned by `get_response`.
+
+    Returns:
+        str: The text of the answer.
+    """
+    return _ROLE_PREFIX.sub("", answer, count=1) if answer else ""
+
+
+def normalize_answer(answer: Optional[str]) -> str:
+    """
+    Returns the comparable form of an answer.
+
+    Args:
+        answer (Optional[str]): The answer, possibly as returned by `get_response`.
+
+    Returns:
+        str: The lower-cased answer with collapsed whitespace and no surrounding punctuation.
+    """
+    if not answer:
+        return ""
+    answer = _WHITESPACE.sub(" ", answer_text(answer).lower()).strip()
+    return answer.strip(" .,;:!?\"'`")
+
+
+def majority_vote(answers: List[Optional[str]]) -> Tuple[Optional[str], int]:
+    """
+    Returns the most common answer and how many answers agree with it.
+
+    Ties are broken in favour of the answer given first. Empty answers do not vote.
+
+    Args:
+        answers (List[Optional[str]]): The answers to compare.
+
+    Returns:
+        Tuple[Optional[str], int]: The first original answer of the winning group
+            and the size of that group, or (None, 0) if no answer voted.
+    """
+    counts = {}
+    first = {}
+    for answer in answers:
+        key = normalize_answer(answer)
+        if not key:
+            continue
+        counts[key] = counts.get(key, 0) + 1
+        first.setdefault(key, answer)
+    if not counts:
+        return None, 0
+    winner = max(counts, key=lambda key: counts[key])
+    return first[winner], counts[winner]
@@ -0,0 +1,20 @@
+"""
+Module: council
+Version: 1.0.0
+
+Description:
+    The council package coordinates several models working on the same task.
+
+Submodules:
+    - workflow: Declares multi-stage pipelines as a graph of steps and runs them
+      with maximal concurrency and cached node results.
+    - quorum: Ends a council round once a quorum policy is satisfied, cancelling
+      the members still running.
+    - job_queue: A durable SQLite job queue with leases, retries and dead letters.
+    - worker_fleet: Runs queued council jobs in a fleet of worker processes.
+"""
+
+from .workflow import WorkflowError, WorkflowNode, Workflow, NodeResult, NodeCache, WorkflowScheduler
+from .quorum import MemberAnswer, QuorumPolicy, FirstK, MajorityAgreement, FirstValid, QuorumResult, Council
+from .job_queue import Job, JobQueue
+from .worker_fleet import JobContext, WorkerFleet, chatbot_from_spec
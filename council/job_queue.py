@@ -0,0 +1,344 @@
+"""
+Module: council.job_queue
+Description:
+    This module provides a durable job queue stored in a local SQLite file, so
+    council jobs can be spread over several worker processes without an
+    external broker.
+
+    A worker leases a job for a visibility timeout and extends the lease with
+    heartbeats while it runs. If the worker dies, the lease expires and
+    another worker picks the job up again. A failed job is retried with an
+    increasing delay until it has used its attempts, then moved to the dead
+    letters, where it can be inspected and requeued. Workers may report the
+    progress of a job, and the queue answers progress queries (job status and
+    counts per status).
+
+    Every operation runs in its own short transaction; leasing takes the
+    write lock first (BEGIN IMMEDIATE), so two workers never lease the same job.
+
+Classes:
+    Job:
+        A job and its state.
+    JobQueue:
+        The SQLite-backed queue.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from helpers.json_codec import codec
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    progress REAL,
+    note TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+
+@dataclass
+class Job:
+    """
+    A job and its state.
+
+    Attributes:
+        id (int): The id of the job.
+        kind (str): The handler that runs the job.
+        payload (Any): The JSON payload given to the handler.
+        status (str): "queued", "leased", "done" or "dead".
+        attempts (int): The number of times the job was leased.
+        max_attempts (int): The number of attempts before the job is dead-lettered.
+        worker (Optional[str]): The worker holding or having held the lease.
+        progress (Optional[float]): The progress reported by the worker (0 to 1).
+        note (Optional[str]): The progress note reported by the worker.
+        result (Any): The JSON result of a done job.
+        error (Optional[str]): The last error of the job.
+    """
+    id: int
+    kind: str
+    payload: Any
+    status: str
+    attempts: int
+    max_attempts: int
+    worker: Optional[str] = None
+    progress: Optional[float] = None
+    note: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+
+
+def _job_from_row(row: sqlite3.Row) -> Job:
+    return Job(
+        id=row["id"],
+        kind=row["kind"],
+        payload=codec.loads(row["payload"]),
+        status=row["status"],
+        attempts=row["attempts"],
+        max_attempts=row["max_attempts"],
+        worker=row["worker"],
+        progress=row["progress"],
+        note=row["note"],
+        result=codec.loads(row["result"]) if row["result"] is not None else None,
+        error=row["error"],
+    )
+
+
+class JobQueue:
+    """
+    A durable job queue in a SQLite file, shared by processes on one machine.
+
+    Attributes:
+        path (str): The database file.
+        retry_delay (float): The delay, in seconds, before the first retry; it doubles
+            with every attempt.
+    """
+
+    def __init__(self, path: str = "council_jobs.sqlite3", retry_delay: float = 5.0) -> None:
+        """
+        Opens (and creates if needed) the queue.
+
+        Args:
+            path (str): The database file.
+            retry_delay (float): The delay before the first retry of a failed job.
+        """
+        self.path = path
+        self.retry_delay = retry_delay
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # WAL lets progress queries read while a worker writes.
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Yields a connection inside a transaction, committed on success.
+        """
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def enqueue(self, kind: str, payload: Any, max_attempts: int = 3, delay: float = 0.0) -> int:
+        """
+        Adds a job.
+
+        Args:
+            kind (str): The handler that runs the job.
+            payload (Any): The JSON-serializable payload given to the handler.
+            max_attempts (int): The number of attempts before the job is dead-lettered.
+            delay (float): The seconds before the job may be leased.
+
+        Returns:
+            int: The id of the job.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, codec.dumps(payload), QUEUED, max_attempts, now + delay, now, now),
+            )
+            return cursor.lastrowid
+
+    def lease(self, worker: str, visibility_timeout: float = 300.0) -> Optional[Job]:
+        """
+        Leases the oldest available job: a queued job whose delay has passed, or a
+        leased job whose lease expired (its worker died). Expired jobs that have
+        used all their attempts are dead-lettered instead.
+
+        Args:
+            worker (str): The id of the leasing worker.
+            visibility_timeout (float): The seconds the lease lasts unless extended.
+
+        Returns:
+            Optional[Job]: The leased job, or None if no job is available.
+        """
+        now = time.time()
+        with self._connect(immediate=True) as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, 'the lease expired'), updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now),
+            )
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY available_at, id LIMIT 1",
+                (QUEUED, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (LEASED, worker, now + visibility_timeout, now, row["id"]),
+            )
+            return _job_from_row(connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id: int, worker: str, visibility_timeout: float = 300.0) -> bool:
+        """
+        Extends the lease of a running job.
+
+        Returns:
+            bool: False if the worker no longer holds the lease (it expired and the
+                job was leased again); the worker should then drop the job.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (now + visibility_timeout, now, job_id, worker, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def report_progress(self, job_id: int, worker: str, progress: float, note: Optional[str] = None) -> bool:
+        """
+        Records the progress of a running job.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET progress = ?, note = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (progress, note, time.time(), job_id, worker, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: Any) -> bool:
+        """
+        Stores the result of a job and marks it done.
+
+        Returns:
+            bool: False if the worker no longer holds the lease (the result is dropped).
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, progress = 1.0, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, codec.dumps(result), time.time(), job_id, worker, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> Optional[str]:
+        """
+        Records the failure of a job: it is retried after a delay doubling with every
+        attempt, or dead-lettered once it has used its attempts.
+
+        Returns:
+            Optional[str]: The new status ("queued" or "dead"), or None if the worker
+                no longer holds the lease.
+        """
+        now = time.time()
+        with self._connect(immediate=True) as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND status = ?",
+                (job_id, worker, LEASED),
+            ).fetchone()
+            if row is None:
+                return None
+            status = DEAD if row["attempts"] >= row["max_attempts"] else QUEUED
+            delay = self.retry_delay * 2 ** (row["attempts"] - 1)
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (status, error, now + delay, now, job_id),
+            )
+            return status
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """
+        Returns a job and its state, or None if there is no such job.
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Returns the number of jobs in every status.
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def dead_letters(self, limit: int = 100) -> List[Job]:
+        """
+        Returns the dead-lettered jobs, oldest first.
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY updated_at LIMIT ?", (DEAD, limit)
+            ).fetchall()
+        return [_job_from_row(row) for row in rows]
+
+    def requeue(self, job_id: int, max_attempts: Optional[int] = None) -> bool:
+        """
+        Moves a dead-lettered job back to the queue with fresh attempts.
+
+        Returns:
+            bool: False if the job is not dead-lettered.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, max_attempts = COALESCE(?, max_attempts), "
+                "available_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, max_attempts, now, now, job_id, DEAD),
+            )
+            return cursor.rowcount == 1
+
+    def wait_for(self, job_id: int, timeout: Optional[float] = None, poll_interval: float = 0.5) -> Job:
+        """
+        Blocks until a job is done or dead-lettered.
+
+        Raises:
+            TimeoutError: If the job did not end within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"No job {job_id}.")
+            if job.status in (DONE, DEAD):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} did not end within {timeout} seconds.")
+            time.sleep(poll_interval)
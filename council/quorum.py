@@ -0,0 +1,259 @@
+"""
+Module: council.quorum
+Description:
+    This module ends a council round as soon as enough members have answered.
+    Waiting for every member makes a round as slow as its slowest member,
+    often a reasoning model, although a majority or the first valid answer is
+    usually all that is needed.
+
+    A Council asks all its members concurrently, each in its own conversation
+    and with its own budget spawned from the round's budget. A QuorumPolicy
+    looks at the answers as they arrive: the first K answers, K members
+    agreeing on the same normalized answer, or the first answer passing a
+    validator (e.g. valid JSON). Once the policy is satisfied, the budgets of
+    the remaining members are cancelled: their tool loops stop before their
+    next request. A request already in flight cannot be aborted through the
+    synchronous openai client; it completes in the background and its usage
+    is still added to the round's budget.
+
+Classes:
+    MemberAnswer:
+        The answer of a member.
+    QuorumPolicy:
+        The policy interface.
+    FirstK:
+        Satisfied by the first K answers.
+    MajorityAgreement:
+        Satisfied when K members give the same normalized answer.
+    FirstValid:
+        Satisfied by the first answer passing a validator.
+    QuorumResult:
+        The outcome of a round.
+    Council:
+        Runs rounds among its members.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from chat_manager import ChatHistory, ChatManager, RunBudget, answer_text, majority_vote, normalize_answer
+from helpers.json_codec import codec
+
+
+@dataclass
+class MemberAnswer:
+    """
+    The answer of a member.
+
+    Attributes:
+        member (str): The name of the member.
+        answer (str): The text of the answer (without the role line).
+        seconds (float): The time the member took.
+    """
+    member: str
+    answer: str
+    seconds: float
+
+
+class QuorumPolicy:
+    """
+    The policy interface: `decide` returns the answers forming the quorum, or
+    None while it is not reached.
+    """
+
+    def decide(self, answers: List[MemberAnswer], members: int) -> Optional[List[MemberAnswer]]:
+        """
+        Decides whether the answers received so far form a quorum.
+
+        Args:
+            answers (List[MemberAnswer]): The answers received so far, in arrival order.
+            members (int): The number of members asked.
+
+        Returns:
+            Optional[List[MemberAnswer]]: The answers forming the quorum, or None.
+        """
+        raise NotImplementedError
+
+
+class FirstK(QuorumPolicy):
+    """
+    Satisfied by the first `k` answers, whatever they say.
+    """
+
+    def __init__(self, k: int = 1) -> None:
+        self.k = k
+
+    def decide(self, answers, members):
+        return answers[:self.k] if len(answers) >= min(self.k, members) else None
+
+
+class MajorityAgreement(QuorumPolicy):
+    """
+    Satisfied when `k` members give the same normalized answer (a strict
+    majority of the members if `k` is None).
+    """
+
+    def __init__(self, k: Optional[int] = None) -> None:
+        self.k = k
+
+    def decide(self, answers, members):
+        needed = self.k if self.k is not None else members // 2 + 1
+        groups: Dict[str, List[MemberAnswer]] = {}
+        for answer in answers:
+            key = normalize_answer(answer.answer)
+            if key:
+                groups.setdefault(key, []).append(answer)
+                if len(groups[key]) >= needed:
+                    return groups[key]
+        return None
+
+
+def _is_json(answer: str) -> bool:
+    try:
+        codec.loads(answer.strip().removeprefix("```json").removesuffix("```"))
+        return True
+    except ValueError:
+        return False
+
+
+class FirstValid(QuorumPolicy):
+    """
+    Satisfied by the first answer that passes a validator (by default: the
+    answer is valid JSON, optionally in a ```json fence).
+    """
+
+    def __init__(self, validate: Callable[[str], bool] = _is_json) -> None:
+        self.validate = validate
+
+    def decide(self, answers, members):
+        for answer in answers:
+            try:
+                if self.validate(answer.answer):
+                    return [answer]
+            except Exception:
+                continue
+        return None
+
+
+@dataclass
+class QuorumResult:
+    """
+    The outcome of a round.
+
+    Attributes:
+        answer (Optional[str]): The answer of the quorum (the majority among its
+            answers), or the majority of all answers if no quorum was reached.
+        reached (bool): Whether the policy was satisfied.
+        quorum (List[MemberAnswer]): The answers forming the quorum.
+        answers (List[MemberAnswer]): Every answer received before the round ended.
+        cancelled (List[str]): The members still running when the round ended.
+        failed (Dict[str, str]): The members that raised, with their error.
+        seconds (float): The duration of the round.
+        budget (RunBudget): The round's budget; the usage of cancelled members keeps
+            being added to it until their in-flight request completes.
+    """
+    answer: Optional[str]
+    reached: bool
+    quorum: List[MemberAnswer]
+    answers: List[MemberAnswer]
+    cancelled: List[str]
+    failed: Dict[str, str]
+    seconds: float
+    budget: RunBudget = field(repr=False, default_factory=RunBudget)
+
+
+class Council:
+    """
+    A group of chatbots answering the same request.
+
+    Attributes:
+        auth (AuthenticationService): Provides the client of the members.
+        members (Dict[str, Tuple[Config, Model]]): The members, by name.
+    """
+
+    def __init__(self, auth, members: Dict[str, Tuple[Any, Any]]) -> None:
+        if not members:
+            raise ValueError("A council needs at least one member.")
+        self.auth = auth
+        self.members = dict(members)
+
+    def _ask(self, name: str, history: ChatHistory, budget: RunBudget) -> MemberAnswer:
+        """
+        Runs one member to its final answer. Runs in a worker thread.
+        """
+        start = time.monotonic()
+        manager = ChatManager(self.auth)
+        manager.chat_history = history
+        answer = manager.get_response(self.members[name], budget)
+        return MemberAnswer(name, answer_text(answer), time.monotonic() - start)
+
+    def _history_for(self, name: str, request: Union[str, ChatHistory]) -> ChatHistory:
+        if isinstance(request, ChatHistory):
+            return request.fork()
+        model = self.members[name][1]
+        history = ChatHistory()
+        if model.developer:
+            history.history.append({"role": "developer", "content": model.developer})
+        history.history.append({"role": "user", "content": request})
+        return history
+
+    def run(self,
+            request: Union[str, ChatHistory],
+            policy: Optional[QuorumPolicy] = None,
+            budget: Optional[RunBudget] = None) -> QuorumResult:
+        """
+        Asks every member and returns as soon as the policy is satisfied.
+
+        Args:
+            request (Union[str, ChatHistory]): A prompt (sent after each member's
+                developer instruction) or a conversation, forked for every member.
+            policy (Optional[QuorumPolicy]): The quorum policy (MajorityAgreement if None).
+            budget (Optional[RunBudget]): The round's budget; every member runs with a
+                budget spawned from it, so the members share its limits.
+
+        Returns:
+            QuorumResult: The outcome of the round.
+        """
+        policy = policy or MajorityAgreement()
+        budget = budget if budget is not None else RunBudget()
+        start = time.monotonic()
+        # Forks are taken here: forking is not thread-safe.
+        histories = {name: self._history_for(name, request) for name in self.members}
+        member_budgets = {name: budget.spawn() for name in self.members}
+
+        pool = ThreadPoolExecutor(max_workers=len(self.members), thread_name_prefix="council")
+        running: Dict[Future, str] = {}
+        for name in self.members:
+            running[pool.submit(self._ask, name, histories[name], member_budgets[name])] = name
+
+        answers: List[MemberAnswer] = []
+        failed: Dict[str, str] = {}
+        quorum = None
+        while running and quorum is None:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    failed[name] = str(future.exception())
+                else:
+                    answers.append(future.result())
+            quorum = policy.decide(answers, len(self.members))
+
+        cancelled = list(running.values())
+        for name in cancelled:
+            member_budgets[name].cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        voters = quorum if quorum is not None else answers
+        return QuorumResult(
+            answer=majority_vote([answer.answer for answer in voters])[0],
+            reached=quorum is not None,
+            quorum=quorum or [],
+            answers=answers,
+            cancelled=cancelled,
+            failed=failed,
+            seconds=time.monotonic() - start,
+            budget=budget,
+        )
@@ -0,0 +1,371 @@
+"""
+Module: council.worker_fleet
+Description:
+    This module runs the jobs of a JobQueue in a fleet of worker processes, so
+    throughput scales across cores instead of being bound by one interpreter.
+
+    Every worker process logs in once, then loops: lease a job, run its
+    handler while a heartbeat thread extends the lease, and write the result
+    back (or the error, which retries or dead-letters the job). Handlers are
+    looked up by the kind of the job; the built-in ones run a chatbot
+    ("chat"), a council round ("council") or a registered workflow
+    ("workflow") through ChatManager. Chatbots are described in the payload
+    by preset names, since Config and Model objects do not travel through
+    the queue:
+
+        {"model": "python_programmer", "config": "reliable_config"}
+        {"model": "o3-mini", "developer": "Answer in JSON."}
+
+    Handlers, workflow factories and the authenticator factory are pickled
+    into the worker processes, so they must be module-level functions.
+
+Usage:
+    queue = JobQueue("jobs.sqlite3")
+    job_id = queue.enqueue("chat", {"prompt": "Explain WAL mode.", "chatbot": {"model": "default_model"}})
+    with WorkerFleet("jobs.sqlite3", processes=4):
+        print(queue.wait_for(job_id).result["answer"])
+
+Classes:
+    JobContext:
+        What a handler receives besides the payload.
+    WorkerFleet:
+        Starts and stops the worker processes.
+
+Functions:
+    chatbot_from_spec: Builds a (Config, Model) chatbot from its description.
+    run_chat_job, run_council_job, run_workflow_job: The built-in handlers.
+    run_worker: The loop of a worker process.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from chat_manager import ChatManager, RunBudget, answer_text
+from council.job_queue import Job, JobQueue
+from council.quorum import Council, FirstK, FirstValid, MajorityAgreement
+from council.workflow import WorkflowScheduler
+
+
+@dataclass
+class JobContext:
+    """
+    What a handler receives besides the payload.
+
+    Attributes:
+        auth (AuthenticationService): The logged-in authenticator of the worker.
+        job (Job): The leased job.
+        queue (JobQueue): The queue of the job.
+        worker (str): The id of the worker.
+        workflows (Dict[str, Callable]): The workflow factories registered in the fleet.
+    """
+    auth: Any
+    job: Job
+    queue: JobQueue
+    worker: str
+    workflows: Dict[str, Callable] = field(default_factory=dict)
+
+    def report(self, progress: float, note: Optional[str] = None) -> None:
+        """
+        Records the progress of the job (0 to 1), visible through `JobQueue.get`.
+        """
+        self.queue.report_progress(self.job.id, self.worker, progress, note)
+
+    def budget(self, payload: Dict[str, Any]) -> RunBudget:
+        """
+        Builds the budget of the job from the optional "budget" entry of its payload
+        ({"seconds": ..., "max_turns": ..., "max_total_tokens": ..., "max_cost": ...}).
+        """
+        limits = dict(payload.get("budget") or {})
+        seconds = limits.pop("seconds", None)
+        return RunBudget.within(seconds, **limits) if seconds is not None else RunBudget(**limits)
+
+
+def chatbot_from_spec(spec: Dict[str, Any]) -> Tuple[Any, Any]:
+    """
+    Builds a chatbot from its description.
+
+    Args:
+        spec (Dict[str, Any]): "model" is a Director preset name or a model type
+            ("default_model" if missing), "config" a ConfigDirector preset name
+            ("default_config" if missing), and "developer" optionally replaces the
+            developer instruction.
+
+    Returns:
+        Tuple[Config, Model]: The chatbot, with the config adapted to the model.
+    """
+    from models import ConfigAdapter, ConfigDirector, Director, Model
+    model_name = spec.get("model", "default_model")
+    preset = getattr(Director, model_name, None)
+    model = preset() if callable(preset) else Model().set_model_type(model_name).build()
+    if spec.get("developer") is not None:
+        model.set_developer_instruction(spec["developer"])
+    config_name = spec.get("config", "default_config")
+    config_preset = getattr(ConfigDirector, config_name, None)
+    if not callable(config_preset):
+        raise ValueError(f"Unknown config preset: {config_name}")
+    return ConfigAdapter.adapt(config_preset(), model), model
+
+
+def run_chat_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Runs a chatbot on a prompt.
+
+    Payload: "prompt", "chatbot" (see `chatbot_from_spec`), optionally "budget".
+
+    Returns:
+        Dict[str, Any]: The "answer" and the "turns" and "tokens" used.
+    """
+    chatbot = chatbot_from_spec(payload.get("chatbot") or {})
+    budget = context.budget(payload)
+    manager = ChatManager(context.auth)
+    if chatbot[1].developer:
+        manager.send_developer(chatbot[1].developer)
+    manager.send_message(payload["prompt"])
+    answer = manager.get_response(chatbot, budget)
+    return {"answer": answer_text(answer), "turns": budget.turns_used, "tokens": budget.tokens_used}
+
+
+_POLICIES = {
+    "majority": lambda payload: MajorityAgreement(payload.get("k")),
+    "first_k": lambda payload: FirstK(payload.get("k", 1)),
+    "first_valid": lambda payload: FirstValid(),
+}
+
+
+def run_council_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Runs a council round on a prompt.
+
+    Payload: "prompt", "members" (a chatbot description by member name), optionally
+    "policy" ("majority", "first_k" or "first_valid"), "k" and "budget".
+
+    Returns:
+        Dict[str, Any]: The "answer", whether the quorum was "reached", the answers by
+            member, the "cancelled" and "failed" members and the "tokens" used.
+    """
+    members = {name: chatbot_from_spec(spec) for name, spec in payload["members"].items()}
+    policy = _POLICIES[payload.get("policy", "majority")](payload)
+    budget = context.budget(payload)
+    result = Council(context.auth, members).run(payload["prompt"], policy, budget)
+    return {
+        "answer": result.answer,
+        "reached": result.reached,
+        "answers": {answer.member: answer.answer for answer in result.answers},
+        "cancelled": result.cancelled,
+        "failed": result.failed,
+        "tokens": budget.tokens_used,
+    }
+
+
+def run_workflow_job(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Runs a registered workflow.
+
+    Payload: "workflow" (the name it was registered under in the fleet), "inputs",
+    optionally "budget". The progress of the job is the share of nodes finished.
+
+    Returns:
+        Dict[str, Any]: The "outputs" of the workflow and the "tokens" used.
+    """
+    workflow = context.workflows[payload["workflow"]]()
+    budget = context.budget(payload)
+    scheduler = WorkflowScheduler(context.auth)
+    total = len(workflow.nodes)
+    watcher_done = threading.Event()
+
+    def watch() -> None:
+        while not watcher_done.wait(1.0):
+            if scheduler.last_run:
+                context.report(len(scheduler.last_run) / total, "nodes finished")
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        outputs = scheduler.run(workflow, payload.get("inputs") or {}, budget)
+    finally:
+        watcher_done.set()
+    return {"outputs": outputs, "tokens": budget.tokens_used}
+
+
+def _default_auth():
+    """
+    Logs in from the .env file of the working directory.
+    """
+    from authentication import AuthenticationService
+    auth = AuthenticationService()
+    auth.login()
+    return auth
+
+
+def _heartbeat(queue: JobQueue, job: Job, worker: str, visibility_timeout: float, stop: threading.Event) -> None:
+    """
+    Extends the lease of `job` every third of the visibility timeout until `stop` is set.
+    """
+    while not stop.wait(visibility_timeout / 3):
+        if not queue.heartbeat(job.id, worker, visibility_timeout):
+            return
+
+
+def run_worker(queue_path: str,
+               worker: str,
+               handlers: Dict[str, Callable],
+               workflows: Dict[str, Callable],
+               auth_factory: Callable,
+               visibility_timeout: float,
+               poll_interval: float,
+               stop_event,
+               max_jobs: Optional[int] = None) -> None:
+    """
+    The loop of a worker process: lease, run, write back, until `stop_event` is set.
+
+    Args:
+        queue_path (str): The database file of the queue.
+        worker (str): The id of the worker.
+        handlers (Dict[str, Callable]): The handler of every job kind.
+        workflows (Dict[str, Callable]): The workflow factories, by name.
+        auth_factory (Callable): Returns a logged-in authenticator.
+        visibility_timeout (float): The lease duration, extended while a job runs.
+        poll_interval (float): The wait between two leases when the queue is empty.
+        stop_event: A multiprocessing Event; the worker stops after its current job.
+        max_jobs (Optional[int]): The number of jobs after which the worker stops.
+    """
+    queue = JobQueue(queue_path)
+    auth = auth_factory()
+    handled = 0
+    while not stop_event.is_set() and (max_jobs is None or handled < max_jobs):
+        job = queue.lease(worker, visibility_timeout)
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+        handled += 1
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat,
+                                     args=(queue, job, worker, visibility_timeout, stop_heartbeat),
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            handler = handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"No handler for jobs of kind {job.kind!r}.")
+            result = handler(job.payload, JobContext(auth, job, queue, worker, workflows))
+        except Exception as error:
+            stop_heartbeat.set()
+            status = queue.fail(job.id, worker, f"{type(error).__name__}: {error}")
+            print(f"Worker {worker}: job {job.id} failed ({status}):", traceback.format_exc(limit=3))
+        else:
+            stop_heartbeat.set()
+            if not queue.complete(job.id, worker, result):
+                print(f"Worker {worker}: the lease of job {job.id} expired; its result was dropped.")
+        heartbeat.join()
+
+
+class WorkerFleet:
+    """
+    Starts and stops the worker processes of a queue.
+
+    Attributes:
+        queue_path (str): The database file of the queue.
+        processes (int): The number of worker processes.
+        handlers (Dict[str, Callable]): The handler of every job kind.
+        workflows (Dict[str, Callable]): The workflow factories that "workflow" jobs can name.
+    """
+
+    def __init__(self,
+                 queue_path: str,
+                 processes: Optional[int] = None,
+                 auth_factory: Callable = _default_auth,
+                 visibility_timeout: float = 300.0,
+                 poll_interval: float = 1.0) -> None:
+        """
+        Initializes the fleet (call `start`, or use it as a context manager).
+
+        Args:
+            queue_path (str): The database file of the queue.
+            processes (Optional[int]): The number of worker processes (the number of CPUs if None).
+            auth_factory (Callable): A module-level function returning a logged-in
+                authenticator, called once in every worker (a login from .env by default).
+            visibility_timeout (float): The lease duration, extended while a job runs.
+            poll_interval (float): The wait between two leases when the queue is empty.
+        """
+        self.queue_path = queue_path
+        self.processes = processes or os.cpu_count() or 1
+        self.auth_factory = auth_factory
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Callable] = {
+            "chat": run_chat_job,
+            "council": run_council_job,
+            "workflow": run_workflow_job,
+        }
+        self.workflows: Dict[str, Callable] = {}
+        # Spawned rather than forked: the parent may hold threads and open clients.
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._workers = []
+        JobQueue(queue_path)
+
+    def set_handler(self, kind: str, handler: Callable) -> "WorkerFleet":
+        """
+        Registers the handler of a job kind: a module-level function called with the
+        payload and a JobContext and returning a JSON-serializable result.
+        """
+        self.handlers[kind] = handler
+        return self
+
+    def set_workflow(self, name: str, factory: Callable) -> "WorkerFleet":
+        """
+        Registers a workflow that "workflow" jobs can name: a module-level function
+        returning the Workflow.
+        """
+        self.workflows[name] = factory
+        return self
+
+    def start(self) -> "WorkerFleet":
+        """
+        Starts the worker processes.
+        """
+        self._stop_event.clear()
+        for index in range(self.processes):
+            worker = f"{os.getpid()}-{index}"
+            process = self._context.Process(
+                target=run_worker,
+                args=(self.queue_path, worker, self.handlers, self.workflows, self.auth_factory,
+                      self.visibility_timeout, self.poll_interval, self._stop_event),
+                name=f"council-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._workers.append(process)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Asks the workers to stop after their current job and waits for them.
+        Workers still running after `timeout` are terminated; their jobs are
+        leased again once their lease expires.
+        """
+        self._stop_event.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for process in self._workers:
+            process.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._workers = []
+
+    def alive(self) -> int:
+        """
+        Returns the number of worker processes still running.
+        """
+        return sum(process.is_alive() for process in self._workers)
+
+    def __enter__(self) -> "WorkerFleet":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,478 @@
+"""
+Module: council.workflow
+Description:
+    This module runs multi-stage council pipelines declared as a graph instead
+    of being scripted step by step. A Workflow is a directed acyclic graph
+    whose nodes are steps: a chatbot (Config, Model) with a prompt template,
+    or a plain Python function. The edges carry outputs: a node's template is
+    filled with the workflow inputs and the outputs of the nodes it depends on.
+
+    The WorkflowScheduler starts every node as soon as its dependencies are
+    done, so independent nodes run concurrently and the latency of a run is
+    that of its critical path rather than the sum of all steps. Node results
+    are cached under a hash of the node definition and of its inputs: running
+    a workflow again after changing an input or a node only re-runs the nodes
+    whose inputs changed, i.e. the nodes downstream of the change. The hash
+    of a function node covers its code, constants, default arguments, closure
+    variables and the functions of its module it calls; a `version` can be
+    set for changes it cannot see (e.g. a library upgrade).
+
+Usage:
+    workflow = (
+        Workflow("review")
+        .add_node("draft", (config, Director.default_model()), "Write code that {task}")
+        .add_node("critique_code", (config, Director.python_programmer()),
+                  "Review this code:\\n{draft}", inputs=["draft"])
+        .add_node("critique_docs", (config, Director.writer()),
+                  "Review the wording of:\\n{draft}", inputs=["draft"])
+        .add_node("revise", (config, Director.default_model()),
+                  "Revise:\\n{draft}\\nCode review:\\n{critique_code}\\nWording review:\\n{critique_docs}",
+                  inputs=["draft", "critique_code", "critique_docs"])
+    )
+    outputs = WorkflowScheduler(auth).run(workflow, {"task": "parses a CSV file"})
+
+Classes:
+    WorkflowError:
+        A node failed or the workflow is malformed.
+    WorkflowNode:
+        A step of a workflow.
+    Workflow:
+        The graph of steps.
+    NodeResult:
+        The output of a node in a run.
+    NodeCache:
+        Node outputs keyed by the hash of their definition and inputs.
+    WorkflowScheduler:
+        Runs a workflow with maximal concurrency.
+"""
+
+import hashlib
+import inspect
+import re
+import string
+import threading
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from chat_manager import ChatManager, RunBudget, answer_text
+from helpers.json_codec import codec
+from helpers.utils import safe_read_file, safe_write_file
+
+
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _value_digest(value: Any, seen: set) -> str:
+    """
+    Returns a stable description of a value a function depends on.
+    """
+    if isinstance(value, types.CodeType):
+        return _code_digest(value, None, seen)
+    if isinstance(value, types.FunctionType):
+        return _function_digest(value, seen)
+    if isinstance(value, types.ModuleType):
+        return f"module {value.__name__}"
+    if isinstance(value, (tuple, list, frozenset, set)):
+        items = [_value_digest(item, seen) for item in value]
+        return f"{type(value).__name__}({', '.join(sorted(items) if isinstance(value, (set, frozenset)) else items)})"
+    # Memory addresses change between processes.
+    return _ADDRESS.sub("", repr(value))
+
+
+def _code_digest(code: types.CodeType, function: Optional[types.FunctionType], seen: set) -> str:
+    """
+    Returns the hash of a code object: its bytecode, constants (nested code
+    objects included) and names, and the functions of the same module the
+    names refer to.
+    """
+    digest = hashlib.sha256(code.co_code)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            # Nested functions and comprehensions see the same module.
+            digest.update(_code_digest(constant, function, seen).encode("utf-8"))
+        else:
+            digest.update(_value_digest(constant, seen).encode("utf-8"))
+    digest.update(repr(code.co_names).encode("utf-8"))
+    namespace = getattr(function, "__globals__", {})
+    for name in code.co_names:
+        value = namespace.get(name)
+        if isinstance(value, types.FunctionType) and value.__module__ == getattr(function, "__module__", None):
+            digest.update(_function_digest(value, seen).encode("utf-8"))
+        elif isinstance(value, (int, float, str, bytes, bool, tuple, frozenset)):
+            digest.update(f"{name}={_value_digest(value, seen)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _function_digest(function: types.FunctionType, seen: set) -> str:
+    """
+    Returns the hash of a function: its code, default arguments and closure variables.
+    """
+    if id(function) in seen:
+        return f"recursive {function.__qualname__}"
+    seen.add(id(function))
+    digest = hashlib.sha256(_code_digest(function.__code__, function, seen).encode("utf-8"))
+    digest.update(_value_digest(function.__defaults__ or (), seen).encode("utf-8"))
+    digest.update(_value_digest(sorted((function.__kwdefaults__ or {}).items()), seen).encode("utf-8"))
+    for cell in function.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            # An empty cell: the variable was not assigned yet.
+            contents = None
+        digest.update(_value_digest(contents, seen).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class WorkflowError(Exception):
+    """
+    A node of a workflow failed, or the workflow is malformed.
+
+    Attributes:
+        node (Optional[str]): The name of the failed node, if any.
+    """
+
+    def __init__(self, message: str, node: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.node = node
+
+
+@dataclass
+class WorkflowNode:
+    """
+    A step of a workflow.
+
+    Attributes:
+        name (str): The unique name of the node; its output is available to
+            downstream templates as `{name}`.
+        inputs (List[str]): The nodes whose outputs this node needs.
+        chatbot (Optional[Tuple[Config, Model]]): The model answering the prompt.
+        template (str): The prompt, formatted with the workflow inputs and the
+            outputs of `inputs`.
+        function (Optional[Callable[..., str]]): Computes the output from the
+            same values, passed as the keyword arguments it declares, instead of a model.
+        cacheable (bool): Whether the output may be reused for equal inputs.
+        version (Optional[str]): Changing it invalidates the cached outputs of the node.
+    """
+    name: str
+    inputs: List[str] = field(default_factory=list)
+    chatbot: Optional[Tuple[Any, Any]] = None
+    template: str = ""
+    function: Optional[Callable[..., str]] = None
+    cacheable: bool = True
+    version: Optional[str] = None
+
+    def fields(self) -> List[str]:
+        """
+        Returns the names the template refers to.
+        """
+        return [name for _, name, _, _ in string.Formatter().parse(self.template) if name]
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Returns what identifies the definition of the node in cache keys.
+        """
+        if self.function is not None:
+            function = self.function
+            return {
+                "function": f"{function.__module__}.{getattr(function, '__qualname__', '')}",
+                "code": _function_digest(function, set()) if isinstance(function, types.FunctionType) else None,
+                "version": self.version,
+            }
+        model_config, model = self.chatbot
+        return {
+            "model": model.model_type,
+            "developer": model.developer,
+            "params": model_config.get_params(),
+            "template": self.template,
+            "version": self.version,
+        }
+
+
+class Workflow:
+    """
+    A directed acyclic graph of steps, built fluently.
+
+    Attributes:
+        name (str): The name of the workflow.
+        nodes (Dict[str, WorkflowNode]): The nodes, by name, in insertion order.
+    """
+
+    def __init__(self, name: str = "workflow") -> None:
+        self.name = name
+        self.nodes: Dict[str, WorkflowNode] = {}
+
+    def _add(self, node: WorkflowNode) -> "Workflow":
+        if node.name in self.nodes:
+            raise WorkflowError(f"The workflow already has a node named {node.name}.", node.name)
+        self.nodes[node.name] = node
+        return self
+
+    def add_node(self,
+                 name: str,
+                 chatbot: Tuple[Any, Any],
+                 template: str,
+                 inputs: Optional[List[str]] = None,
+                 cacheable: bool = True,
+                 version: Optional[str] = None) -> "Workflow":
+        """
+        Adds a step answered by a model.
+
+        Args:
+            name (str): The unique name of the node.
+            chatbot (Tuple[Config, Model]): The model answering the prompt.
+            template (str): The prompt, with `{placeholders}` for the workflow inputs
+                and the outputs of `inputs`.
+            inputs (Optional[List[str]]): The nodes whose outputs the node needs.
+            cacheable (bool): Whether the output may be reused for equal inputs
+                (disable for sampled outputs that must differ between runs).
+            version (Optional[str]): Changing it invalidates the cached outputs of the node.
+
+        Returns:
+            Workflow: The current instance (for fluent chaining).
+        """
+        return self._add(WorkflowNode(name, list(inputs or []), chatbot=chatbot,
+                                      template=template, cacheable=cacheable, version=version))
+
+    def add_function(self,
+                     name: str,
+                     function: Callable[..., str],
+                     inputs: Optional[List[str]] = None,
+                     cacheable: bool = True,
+                     version: Optional[str] = None) -> "Workflow":
+        """
+        Adds a step computed by a Python function (e.g. a vote or a formatter).
+
+        Args:
+            name (str): The unique name of the node.
+            function (Callable[..., str]): Receives the workflow inputs and the outputs
+                of `inputs` it declares as keyword arguments (all of them with **kwargs)
+                and returns the node's output.
+            inputs (Optional[List[str]]): The nodes whose outputs the node needs.
+            cacheable (bool): Whether the output may be reused for equal inputs.
+            version (Optional[str]): Changing it invalidates the cached outputs of the node
+                (for changes the code hash does not see, such as a library upgrade).
+
+        Returns:
+            Workflow: The current instance (for fluent chaining).
+        """
+        return self._add(WorkflowNode(name, list(inputs or []), function=function, cacheable=cacheable,
+                                      version=version))
+
+    def order(self) -> List[str]:
+        """
+        Returns the node names in a topological order.
+
+        Raises:
+            WorkflowError: If a node depends on an unknown node or the graph has a cycle.
+        """
+        for node in self.nodes.values():
+            for dependency in node.inputs:
+                if dependency not in self.nodes:
+                    raise WorkflowError(f"Node {node.name} depends on the unknown node {dependency}.", node.name)
+        remaining = {name: set(node.inputs) for name, node in self.nodes.items()}
+        order = []
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise WorkflowError(f"The workflow has a cycle through {sorted(remaining)}.")
+            for name in ready:
+                del remaining[name]
+                order.append(name)
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+        return order
+
+    def downstream(self, name: str) -> List[str]:
+        """
+        Returns the nodes that depend, directly or not, on node `name`.
+        """
+        found = []
+        for candidate in self.order():
+            node = self.nodes[candidate]
+            if any(dependency == name or dependency in found for dependency in node.inputs):
+                found.append(candidate)
+        return found
+
+
+@dataclass
+class NodeResult:
+    """
+    The output of a node in a run.
+
+    Attributes:
+        output (str): The output of the node.
+        cached (bool): Whether the output came from the cache.
+        seconds (float): The time the node took (0 when cached).
+    """
+    output: str
+    cached: bool = False
+    seconds: float = 0.0
+
+
+class NodeCache:
+    """
+    Node outputs keyed by the hash of the node definition and of its inputs.
+    Kept in memory and, if a directory is given, persisted as one JSON file per entry.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory) if directory is not None else None
+        self._entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        path = self.directory / f"{key}.json" if self.directory is not None else None
+        if path is not None and path.is_file():
+            content = safe_read_file(str(path))
+            if content is not None:
+                output = codec.loads(content)
+                with self._lock:
+                    self._entries[key] = output
+                return output
+        return None
+
+    def put(self, key: str, output: str) -> None:
+        with self._lock:
+            self._entries[key] = output
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            safe_write_file(codec.dumps(output), str(self.directory / f"{key}.json"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class WorkflowScheduler:
+    """
+    Runs workflows, starting every node as soon as its dependencies are done.
+
+    Attributes:
+        auth (AuthenticationService): Provides the client of the model steps.
+        max_workers (int): The maximum number of nodes running at once.
+        cache (NodeCache): The node outputs reused across runs.
+        last_run (Dict[str, NodeResult]): The results of the latest run, by node.
+    """
+
+    def __init__(self, auth, max_workers: int = 8, cache: Optional[NodeCache] = None) -> None:
+        self.auth = auth
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else NodeCache()
+        self.last_run: Dict[str, NodeResult] = {}
+
+    def _values_for(self, node: WorkflowNode, inputs: Dict[str, str], outputs: Dict[str, str]) -> Dict[str, str]:
+        """
+        Returns the values a node sees: the workflow inputs and its dependencies' outputs.
+        """
+        values = dict(inputs)
+        values.update({name: outputs[name] for name in node.inputs})
+        if node.function is not None:
+            parameters = inspect.signature(node.function).parameters.values()
+            if not any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters):
+                names = {parameter.name for parameter in parameters}
+                values = {name: value for name, value in values.items() if name in names}
+        else:
+            missing = [name for name in node.fields() if name not in values]
+            if missing:
+                raise WorkflowError(f"Node {node.name} refers to missing values {missing}.", node.name)
+            # Only the values the template uses take part in the cache key.
+            values = {name: values[name] for name in node.fields()}
+        return values
+
+    def _run_node(self, node: WorkflowNode, values: Dict[str, str], budget: Optional[RunBudget]) -> str:
+        """
+        Computes the output of a node. Runs in a worker thread.
+        """
+        if node.function is not None:
+            return node.function(**values)
+        model_config, model = node.chatbot
+        manager = ChatManager(self.auth)
+        if model.developer:
+            manager.send_developer(model.developer)
+        manager.send_message(node.template.format_map(values))
+        return answer_text(manager.get_response((model_config, model), budget))
+
+    def run(self,
+            workflow: Workflow,
+            inputs: Optional[Dict[str, str]] = None,
+            budget: Optional[RunBudget] = None) -> Dict[str, str]:
+        """
+        Runs a workflow.
+
+        Args:
+            workflow (Workflow): The workflow.
+            inputs (Optional[Dict[str, str]]): The values of the template placeholders
+                that are not node outputs.
+            budget (Optional[RunBudget]): The limits shared by every model step.
+
+        Returns:
+            Dict[str, str]: The output of every node. Details are in `last_run`.
+
+        Raises:
+            WorkflowError: If the workflow is malformed or a node failed (the nodes
+                already running are finished first; no new node is started).
+        """
+        inputs = dict(inputs or {})
+        order = workflow.order()
+        pending = {name: set(workflow.nodes[name].inputs) for name in order}
+        outputs: Dict[str, str] = {}
+        self.last_run = {}
+        running: Dict[Future, Tuple[str, str, float]] = {}
+        failure: Optional[WorkflowError] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workflow") as pool:
+            while pending or running:
+                # Start every node whose dependencies are done (cache hits complete at once).
+                ready = [name for name in order if name in pending and not pending[name]] if failure is None else []
+                for name in ready:
+                    del pending[name]
+                    node = workflow.nodes[name]
+                    try:
+                        values = self._values_for(node, inputs, outputs)
+                    except WorkflowError as error:
+                        failure = failure or error
+                        break
+                    key = codec.hash_key({"node": node.fingerprint(), "values": values})
+                    cached = self.cache.get(key) if node.cacheable else None
+                    if cached is not None:
+                        self._complete(name, NodeResult(cached, cached=True), outputs, pending)
+                    else:
+                        future = pool.submit(self._run_node, node, values, budget)
+                        running[future] = (name, key, time.monotonic())
+                if not running:
+                    if failure is not None or not any(not dependencies for dependencies in pending.values()):
+                        break
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, start = running.pop(future)
+                    if future.exception() is not None:
+                        failure = failure or WorkflowError(
+                            f"Node {name} failed: {future.exception()}", name)
+                        continue
+                    output = future.result()
+                    if workflow.nodes[name].cacheable:
+                        self.cache.put(key, output)
+                    self._complete(name, NodeResult(output, seconds=time.monotonic() - start), outputs, pending)
+
+        if failure is not None:
+            raise failure
+        return outputs
+
+    def _complete(self, name: str, result: NodeResult, outputs: Dict[str, str],
+                  pending: Dict[str, set]) -> None:
+        """
+        Records the output of a node and releases the nodes waiting for it.
+        """
+        self.last_run[name] = result
+        outputs[name] = result.output
+        for dependencies in pending.values():
+            dependencies.discard(name)
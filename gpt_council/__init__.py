@@ -1,19 +1,85 @@
-# gpt_council/modules/__init__.py
+"""
+Module: gpt_council
+Version: 1.0.0
 
-import pkgutil
+Description:
+    The single entry point of the package. `import gpt_council` is nearly free:
+    the subpackages (authentication, chat_manager, models, tools, helpers, council) and
+    their public names are loaded on first access through a module-level
+    `__getattr__` (PEP 562), and the openai client is only imported by
+    `AuthenticationService.login`. CLI tools and workers that only need part
+    of the package no longer pay for the rest at start-up.
 
-# Automatically determine available modules
-__all__ = [name for _, name, _ in pkgutil.iter_modules(__path__)]
+Usage:
+    import gpt_council as gc
 
+    auth = gc.AuthenticationService()      # loads authentication only
+    manager = gc.ChatManager(auth)         # loads chat_manager on first access
+    model = gc.models.Director.default_model()
 
-from .modules import *
+    `python -m gpt_council.benchmark_import` measures the cold import times.
+"""
 
-# Optionally, if you want the module names to appear in the package namespace:
-# This will import each module as an attribute of gpt_council.
-import pkgutil
 import importlib
+from typing import Any, List
 
-modules_path = __path__[0] + '/modules'
-for finder, module_name, is_pkg in pkgutil.iter_modules([modules_path]):
-    module = importlib.import_module(f"{__name__}.modules.{module_name}")
-    globals()[module_name] = module
\ No newline at end of file
+__version__ = "1.0.0"
+
+# The subpackages reachable as attributes.
+_SUBPACKAGES = ("authentication", "chat_manager", "models", "tools", "helpers", "council")
+
+# The public names reachable as attributes, and the subpackage defining each.
+_EXPORTS = {
+    "AuthenticationService": "authentication",
+    "SessionManager": "authentication",
+    "ChatManager": "chat_manager",
+    "ChatHistory": "chat_manager",
+    "APIResponse": "chat_manager",
+    "ClientAction": "chat_manager",
+    "RunBudget": "chat_manager",
+    "HedgePolicy": "chat_manager",
+    "RunCheckpointer": "chat_manager",
+    "HookRegistry": "chat_manager",
+    "ProfilingHook": "chat_manager",
+    "majority_vote": "chat_manager",
+    "LogprobBatch": "chat_manager",
+    "PromptCache": "chat_manager",
+    "Config": "models",
+    "ConfigAdapter": "models",
+    "ConfigDirector": "models",
+    "Model": "models",
+    "Director": "models",
+    "ModelCascade": "models",
+    "ModelTool": "tools",
+    "ModelToolList": "tools",
+    "ToolSandbox": "tools",
+    "read_project": "helpers",
+    "write_project": "helpers",
+    "safe_read_file": "helpers",
+    "safe_write_file": "helpers",
+    "Workflow": "council",
+    "WorkflowScheduler": "council",
+    "Council": "council",
+    "JobQueue": "council",
+    "WorkerFleet": "council",
+}
+
+__all__ = list(_SUBPACKAGES) + list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Loads a subpackage or a public name on first access and caches it in the module.
+    """
+    if name in _SUBPACKAGES:
+        value = importlib.import_module(name)
+    elif name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
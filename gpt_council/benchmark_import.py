@@ -0,0 +1,89 @@
+"""
+Module: gpt_council.benchmark_import
+Description:
+    Measures the cold import time of the package and of each subpackage. Every
+    measurement runs in a fresh interpreter, so nothing is already imported;
+    the median of several runs is reported, together with the number of
+    modules the import loaded and whether it pulled in openai.
+
+Usage:
+    python -m gpt_council.benchmark_import [--repeat N] [statements ...]
+
+    Each statement is timed as written, e.g. "import chat_manager" or
+    "import gpt_council; gpt_council.ChatManager".
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_STATEMENTS = [
+    "import gpt_council",
+    "import gpt_council; gpt_council.ChatManager",
+    "import authentication",
+    "import tools",
+    "import models",
+    "import helpers",
+    "import chat_manager",
+]
+
+_PROBE = (
+    "import sys, time\n"
+    "before = set(sys.modules)\n"
+    "start = time.perf_counter()\n"
+    "{statement}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "loaded = set(sys.modules) - before\n"
+    "print(elapsed, len(loaded), 'openai' in loaded)\n"
+)
+
+
+def time_statement(statement: str, repeat: int = 5) -> Dict[str, object]:
+    """
+    Times a statement in `repeat` fresh interpreters.
+
+    Args:
+        statement (str): The import statement(s) to time.
+        repeat (int): The number of runs.
+
+    Returns:
+        Dict[str, object]: The median time in milliseconds ("ms"), the number of
+            modules loaded ("modules") and whether openai was imported ("openai"),
+            or the error of the first failed run ("error").
+    """
+    times: List[float] = []
+    modules = 0
+    openai = False
+    for _ in range(repeat):
+        run = subprocess.run([sys.executable, "-c", _PROBE.format(statement=statement)],
+                             cwd=_ROOT, capture_output=True, text=True)
+        if run.returncode != 0:
+            return {"error": run.stderr.strip().splitlines()[-1] if run.stderr else "failed"}
+        elapsed, modules, openai = run.stdout.split()[-3:]
+        times.append(float(elapsed) * 1000)
+    return {"ms": statistics.median(times), "modules": int(modules), "openai": openai == "True"}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import times.")
+    parser.add_argument("statements", nargs="*", default=DEFAULT_STATEMENTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    width = max(len(statement) for statement in args.statements)
+    for statement in args.statements:
+        result = time_statement(statement, args.repeat)
+        if "error" in result:
+            print(f"{statement:<{width}}  error: {result['error']}")
+        else:
+            print(f"{statement:<{width}}  {result['ms']:8.1f} ms  {result['modules']:4d} modules"
+                  f"{'  (openai)' if result['openai'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
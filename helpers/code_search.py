@@ -0,0 +1,368 @@
+"""
+Module: helpers.code_search
+Description:
+    This module provides a trigram inverted index over the source files of a
+    project, so a model can look up the lines it needs instead of reading the
+    whole project with `read_project` or whole files with `safe_read_file`.
+
+    Every file is indexed by the set of (lower-cased) three-character
+    substrings it contains. A query is reduced to the trigrams any match must
+    contain, the posting sets of those trigrams are intersected to find the
+    candidate files, and only the candidates are scanned line by line. The
+    index is kept up to date incrementally: updating a file only touches the
+    postings of the trigrams that were added or removed.
+
+Classes:
+    CodeSearchIndex:
+        The trigram index. Its `search_code` method is meant to be registered
+        as a model tool.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from helpers.utils import iter_project_files, iter_project_paths
+from tools import ModelTool
+
+# Characters that give a regular expression a meaning other than their literal self.
+_REGEX_META = set(".^$*+?{}[]()|\\")
+# Escapes that stand for a single literal character.
+_LITERAL_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v"}
+# Numeric escapes (\x41, \u0041, \U00000041, \N{...}, \101, back-references \1)
+# and the length of what follows their letter.
+_NUMERIC_ESCAPE = re.compile(r"x[0-9a-fA-F]{0,2}|u[0-9a-fA-F]{0,4}|U[0-9a-fA-F]{0,8}|N\{[^}]*\}?|[0-9]{1,3}")
+
+
+def _trigrams(text: str) -> Set[str]:
+    """
+    Returns the set of lower-cased three-character substrings of `text`.
+    """
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _required_literals(pattern: str, flags: int = 0) -> Optional[List[str]]:
+    """
+    Extracts the literal runs that every match of the regular expression
+    `pattern` must contain.
+
+    The analysis is conservative: only literals at the top level of the
+    pattern are kept (anything inside a group or a character class is
+    skipped), and a top-level alternation makes every literal optional.
+    Verbose patterns (re.VERBOSE or "(?x)") give no literals, since their
+    whitespace is not matched. Case-insensitive patterns keep their ASCII
+    literals only: the trigrams are lower-cased, but some non-ASCII letters
+    match characters with a different lower-case form (e.g. "ſ" and "s").
+
+    Args:
+        pattern (str): The regular expression.
+        flags (int): The flags the pattern is compiled with.
+
+    Returns:
+        Optional[List[str]]: The required literal runs, or None if the pattern
+            can match without any specific literal (e.g. "a|b").
+    """
+    try:
+        # Compiling honours the inline flags ("(?x)", "(?i)") wherever they appear.
+        flags = re.compile(pattern, flags).flags
+    except re.error:
+        return None
+    if flags & re.VERBOSE:
+        return None
+
+    literals: List[str] = []
+    run: List[str] = []
+    depth = 0
+    i = 0
+
+    def close_run() -> None:
+        if run:
+            literals.append("".join(run))
+            run.clear()
+
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            numeric = _NUMERIC_ESCAPE.match(pattern, i + 1)
+            i = numeric.end() if numeric else i + 2
+            if depth:
+                continue
+            if numeric:
+                # The character a numeric escape stands for is not decoded: end the run
+                # so its digits are not taken for literal text.
+                close_run()
+            elif escaped in _LITERAL_ESCAPES:
+                run.append(_LITERAL_ESCAPES[escaped])
+            elif not escaped.isalnum():
+                run.append(escaped)
+            else:
+                # \w, \d, \b, back-references... are not literals.
+                close_run()
+            continue
+        if char == "[":
+            # Skip the character class, honouring "[]...]" and escapes.
+            close_run()
+            i += 1
+            if i < len(pattern) and pattern[i] == "^":
+                i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            continue
+        if char == "(":
+            close_run()
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif char == "|" and depth == 0:
+            return None
+        elif char in "?*{":
+            # The previous character may be optional or repeated zero times.
+            if run:
+                run.pop()
+            close_run()
+            if char == "{":
+                closing = pattern.find("}", i)
+                i = len(pattern) if closing == -1 else closing
+        elif char in _REGEX_META:
+            close_run()
+        elif depth == 0:
+            run.append(char)
+        i += 1
+
+    close_run()
+    if flags & re.IGNORECASE:
+        return [literal for literal in literals if literal.isascii()]
+    return literals
+
+
+class CodeSearchIndex:
+    """
+    A trigram inverted index over a project's source files.
+
+    The index can be built from a directory (honouring the same ".crawler_ignore"
+    rules as `read_project`) or from a project dictionary already returned by
+    `read_project`. Files are identified by their "/"-separated path relative to
+    the project root.
+
+    Attributes:
+        root_dir (Optional[Path]): The directory the index was built from, if any.
+    """
+
+    def __init__(self, root_dir: Optional[Union[str, Path]] = None) -> None:
+        """
+        Initializes the index and, if `root_dir` is given, indexes its files.
+
+        Args:
+            root_dir (Optional[Union[str, Path]]): The root directory of the project.
+        """
+        self.root_dir: Optional[Path] = Path(root_dir) if root_dir is not None else None
+        self._lock = threading.RLock()
+        self._contents: Dict[str, str] = {}
+        self._file_trigrams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        if self.root_dir is not None:
+            self.refresh()
+
+    @classmethod
+    def from_project(cls, project_content: Dict[str, Any]) -> "CodeSearchIndex":
+        """
+        Builds an index from a project dictionary returned by `read_project`.
+
+        Args:
+            project_content (Dict[str, Any]): A nested dictionary representing the project structure.
+
+        Returns:
+            CodeSearchIndex: The populated index.
+        """
+        index = cls()
+        for module_path, file_name, content in iter_project_files(project_content):
+            path = file_name if module_path == "." else f"{module_path}/{file_name}"
+            index.update_file(path, content)
+        return index
+
+    def update_file(self, path: str, content: str) -> None:
+        """
+        Adds a file to the index, or updates it if it is already indexed.
+
+        Only the postings of the trigrams that appear in or disappear from the
+        file are touched.
+
+        Args:
+            path (str): The path of the file relative to the project root.
+            content (str): The new content of the file.
+        """
+        new_trigrams = _trigrams(content)
+        with self._lock:
+            old_trigrams = self._file_trigrams.get(path, set())
+            for trigram in old_trigrams - new_trigrams:
+                posting = self._postings[trigram]
+                posting.discard(path)
+                if not posting:
+                    del self._postings[trigram]
+            for trigram in new_trigrams - old_trigrams:
+                self._postings.setdefault(trigram, set()).add(path)
+            self._file_trigrams[path] = new_trigrams
+            self._contents[path] = content
+
+    def remove_file(self, path: str) -> None:
+        """
+        Removes a file from the index. Unknown paths are ignored.
+
+        Args:
+            path (str): The path of the file relative to the project root.
+        """
+        with self._lock:
+            for trigram in self._file_trigrams.pop(path, set()):
+                posting = self._postings[trigram]
+                posting.discard(path)
+                if not posting:
+                    del self._postings[trigram]
+            self._contents.pop(path, None)
+            self._stats.pop(path, None)
+
+    def refresh(self) -> List[str]:
+        """
+        Re-synchronizes the index with `root_dir`.
+
+        Files are compared by modification time and size, so only files that
+        were added, changed or deleted since the last refresh are read.
+
+        Returns:
+            List[str]: The paths that were added, updated or removed.
+
+        Raises:
+            ValueError: If the index was not built from a directory.
+        """
+        if self.root_dir is None:
+            raise ValueError("The index was not built from a directory and cannot be refreshed.")
+
+        changed = []
+        seen = set()
+        for path, file_path in iter_project_paths(self.root_dir):
+            seen.add(path)
+            try:
+                stat = file_path.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._stats.get(path) == signature:
+                    continue
+                content = file_path.read_text(encoding="utf-8")
+            except Exception as e:
+                print(f"Error indexing file {file_path}: {e}")
+                continue
+            self.update_file(path, content)
+            self._stats[path] = signature
+            changed.append(path)
+
+        with self._lock:
+            removed = [path for path in self._contents if path not in seen]
+        for path in removed:
+            self.remove_file(path)
+        return changed + removed
+
+    def _candidates(self, literals: Optional[List[str]]) -> List[str]:
+        """
+        Returns the files that contain every trigram of `literals`, sorted by path.
+        """
+        required = set()
+        for literal in literals or []:
+            required |= _trigrams(literal)
+        if not required:
+            return sorted(self._contents)
+
+        # Intersect the smallest posting sets first.
+        postings = sorted((self._postings.get(trigram, set()) for trigram in required), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return sorted(candidates)
+
+    def search(self,
+               query: str,
+               max_hits: int = 20,
+               regex: bool = False,
+               case_sensitive: bool = True) -> List[Tuple[str, int, str]]:
+        """
+        Finds the lines matching `query`.
+
+        Args:
+            query (str): A substring, or a regular expression if `regex` is True.
+            max_hits (int): The maximum number of lines returned.
+            regex (bool): Whether `query` is a regular expression.
+            case_sensitive (bool): Whether the match is case sensitive.
+
+        Returns:
+            List[Tuple[str, int, str]]: The file path, 1-based line number and
+                line text of every hit, in path and line order.
+
+        Raises:
+            re.error: If `regex` is True and `query` is not a valid expression.
+        """
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if regex:
+            matcher = re.compile(query, flags)
+            literals = _required_literals(query, flags)
+        else:
+            matcher = re.compile(re.escape(query), flags)
+            literals = [query] if case_sensitive or query.isascii() else None
+
+        hits: List[Tuple[str, int, str]] = []
+        if max_hits <= 0:
+            return hits
+        with self._lock:
+            candidates = self._candidates(literals)
+            contents = [(path, self._contents[path]) for path in candidates]
+
+        for path, content in contents:
+            for line_number, line in enumerate(content.splitlines(), start=1):
+                if matcher.search(line):
+                    hits.append((path, line_number, line))
+                    if len(hits) >= max_hits:
+                        return hits
+        return hits
+
+    def search_code(self, query: str, max_hits: int = 20) -> str:
+        """
+        Searches the project's source code and returns the matching lines.
+
+        The query is a Python regular expression; if it is not a valid one, it
+        is searched as plain text. Each hit is reported as "path:line: text".
+
+        Args:
+            query (str): The regular expression or text to look for.
+            max_hits (int): The maximum number of matching lines to return.
+
+        Returns:
+            str: One hit per line, or a message saying nothing matched.
+        """
+        max_hits = int(max_hits)
+        try:
+            hits = self.search(query, max_hits, regex=True)
+        except re.error:
+            hits = self.search(query, max_hits)
+        if not hits:
+            return f"No matches for {query!r}."
+        return "\n".join(f"{path}:{line_number}: {line}" for path, line_number, line in hits)
+
+    def as_tool(self) -> ModelTool:
+        """
+        Wraps `search_code` into a ModelTool, ready for `ModelToolList.add_tool`.
+
+        Returns:
+            ModelTool: The search_code tool bound to this index.
+        """
+        return ModelTool().set_function(self.search_code)
+
+    def __len__(self) -> int:
+        """
+        Return the number of indexed files.
+        """
+        return len(self._contents)
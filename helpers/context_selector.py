@@ -0,0 +1,375 @@
+"""
+Module: helpers.context_selector
+Description:
+    This module selects the parts of a project that are relevant to a question,
+    so a project-aware prompt only carries those parts instead of the output of
+    `format_project_structure` for the whole tree.
+
+    The crawled project is split into chunks: one per file and one per function
+    or method (found with `ast`). The chunks are ranked with Okapi BM25 against
+    the question. Because a BM25 term weight only depends on the term frequency
+    and the chunk length, the weight of every (term, chunk) posting is computed
+    once when the index is built; scoring a question is then a sum over the
+    postings of its terms. The best chunks are packed into a token budget and
+    prepended to the question. Everything runs locally, with no embedding service.
+
+    The postings of all terms are stored in two flat arrays (chunk ids and
+    weights) with the slice of every term. With NumPy installed (the
+    "analytics" extra), scoring is vectorized: the slices of the question's
+    terms are concatenated and summed per chunk with `numpy.bincount`, and
+    the chunks are ranked with a single sort. Without NumPy, the same arrays
+    are summed in Python.
+
+Classes:
+    CodeChunk:
+        A piece of a source file that can be selected as context.
+    BM25ContextSelector:
+        The BM25 index and the budgeted selection of chunks.
+"""
+
+import ast
+import functools
+import math
+import re
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from helpers.utils import estimate_tokens, iter_project_files, read_project
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """
+    Returns the numpy module, or None if it is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text or source code into lower-cased search terms.
+
+    Identifiers are kept whole and also split on underscores and camelCase
+    boundaries, so "get_all_schemas" matches a question about "schemas" and
+    "ModelToolList" matches one about "tool list".
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms, in order of appearance (with repetitions).
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        terms.append(lowered)
+        parts = [part for word in identifier.split("_") for part in _CAMEL_BOUNDARY.split(word) if part]
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    return terms
+
+
+@dataclass
+class CodeChunk:
+    """
+    A piece of a source file that can be selected as context.
+
+    Attributes:
+        path (str): The file path relative to the project root.
+        name (str): The qualified function or method name, or "" for a whole file.
+        start_line (int): The first line of the chunk (1-based).
+        end_line (int): The last line of the chunk (inclusive).
+        text (str): The source of the chunk.
+    """
+    path: str
+    name: str
+    start_line: int
+    end_line: int
+    text: str
+
+    def header(self) -> str:
+        """
+        Returns the line that introduces the chunk in a prompt.
+        """
+        if self.name:
+            return f"File Name: {self.path} (lines {self.start_line}-{self.end_line}, {self.name})\n"
+        return f"File Name: {self.path}\n"
+
+
+def split_into_chunks(path: str, content: str) -> List[CodeChunk]:
+    """
+    Splits a file into a whole-file chunk plus one chunk per function or method.
+
+    Files that are not valid Python only produce the whole-file chunk.
+
+    Args:
+        path (str): The file path relative to the project root.
+        content (str): The content of the file.
+
+    Returns:
+        List[CodeChunk]: The chunks of the file.
+    """
+    lines = content.splitlines()
+    chunks = [CodeChunk(path, "", 1, max(1, len(lines)), content)]
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return chunks
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = prefix + child.name
+                start = min([child.lineno] + [decorator.lineno for decorator in child.decorator_list])
+                text = "\n".join(lines[start - 1:child.end_lineno])
+                chunks.append(CodeChunk(path, name, start, child.end_lineno, text))
+            elif isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+
+    visit(tree, "")
+    return chunks
+
+
+class BM25ContextSelector:
+    """
+    Ranks the chunks of a project against a question with Okapi BM25 and packs
+    the best ones into a token budget.
+
+    The index is built once: the vocabulary maps every term to the slice of
+    its postings in two flat arrays of chunk ids and precomputed BM25 weights.
+
+    Attributes:
+        chunks (List[CodeChunk]): The indexed chunks.
+        k1 (float): The BM25 term-frequency saturation parameter.
+        b (float): The BM25 length-normalization parameter.
+    """
+
+    def __init__(self, chunks: List[CodeChunk], k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Builds the inverted index over `chunks`.
+
+        Args:
+            chunks (List[CodeChunk]): The chunks to index.
+            k1 (float): The BM25 term-frequency saturation parameter.
+            b (float): The BM25 length-normalization parameter.
+        """
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        # Term -> (start, end) of its postings in the flat arrays.
+        self._slices: Dict[str, Tuple[int, int]] = {}
+        self._chunk_ids = array("i")
+        self._weights = array("d")
+
+        term_frequencies = []
+        lengths = []
+        for chunk in chunks:
+            frequencies: Dict[str, int] = {}
+            terms = tokenize(chunk.text)
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            term_frequencies.append(frequencies)
+            lengths.append(len(terms))
+
+        total = len(chunks)
+        average_length = (sum(lengths) / total) if total else 0.0
+        raw_postings: Dict[str, List[tuple]] = {}
+        for chunk_id, frequencies in enumerate(term_frequencies):
+            for term, frequency in frequencies.items():
+                raw_postings.setdefault(term, []).append((chunk_id, frequency))
+
+        for term, postings in raw_postings.items():
+            idf = math.log(1.0 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            start = len(self._chunk_ids)
+            for chunk_id, frequency in postings:
+                norm = k1 * (1.0 - b + b * lengths[chunk_id] / average_length) if average_length else k1
+                self._chunk_ids.append(chunk_id)
+                self._weights.append(idf * frequency * (k1 + 1.0) / (frequency + norm))
+            self._slices[term] = (start, len(self._chunk_ids))
+
+        np = _numpy()
+        # Views of the flat arrays, without copying them.
+        self._np_chunk_ids = np.frombuffer(self._chunk_ids, dtype=np.intc) if np is not None else None
+        self._np_weights = np.frombuffer(self._weights, dtype=np.float64) if np is not None else None
+
+    @classmethod
+    def from_project(cls, project_content: Dict[str, Any], **kwargs: Any) -> "BM25ContextSelector":
+        """
+        Builds a selector from a project dictionary returned by `read_project`.
+
+        Args:
+            project_content (Dict[str, Any]): A nested dictionary representing the project structure.
+            **kwargs: Forwarded to the constructor (k1, b).
+
+        Returns:
+            BM25ContextSelector: The selector.
+        """
+        chunks = []
+        for module_path, file_name, content in iter_project_files(project_content):
+            path = file_name if module_path == "." else f"{module_path}/{file_name}"
+            chunks.extend(split_into_chunks(path, content))
+        return cls(chunks, **kwargs)
+
+    @classmethod
+    def from_directory(cls, root_dir: Union[str, Path], **kwargs: Any) -> "BM25ContextSelector":
+        """
+        Crawls `root_dir` with `read_project` and builds a selector over it.
+
+        Args:
+            root_dir (str or Path): The root directory of the project.
+            **kwargs: Forwarded to the constructor (k1, b).
+
+        Returns:
+            BM25ContextSelector: The selector.
+        """
+        return cls.from_project(read_project(root_dir), **kwargs)
+
+    def score(self, question: str) -> Dict[int, float]:
+        """
+        Computes the BM25 score of every chunk sharing a term with `question`.
+
+        Args:
+            question (str): The question or query text.
+
+        Returns:
+            Dict[int, float]: The score of each matching chunk, keyed by chunk id.
+        """
+        np = _numpy()
+        if np is not None:
+            scores = self._score_array(question)
+            matching = np.flatnonzero(scores)
+            return dict(zip(matching.tolist(), scores[matching].tolist()))
+
+        scores: Dict[int, float] = {}
+        for term, repetitions in self._query_terms(question).items():
+            start, end = self._slices[term]
+            for chunk_id, weight in zip(self._chunk_ids[start:end], self._weights[start:end]):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + repetitions * weight
+        return scores
+
+    def _query_terms(self, question: str) -> Dict[str, int]:
+        """
+        Returns the indexed terms of `question` with their number of repetitions.
+        """
+        query_terms: Dict[str, int] = {}
+        for term in tokenize(question):
+            if term in self._slices:
+                query_terms[term] = query_terms.get(term, 0) + 1
+        return query_terms
+
+    def _score_array(self, question: str):
+        """
+        Computes the BM25 score of every chunk with NumPy (0 for chunks without a
+        query term).
+
+        Returns:
+            numpy.ndarray: The scores, indexed by chunk id.
+        """
+        np = _numpy()
+        query_terms = self._query_terms(question)
+        if not query_terms:
+            return np.zeros(len(self.chunks))
+        slices = [self._slices[term] for term in query_terms]
+        chunk_ids = np.concatenate([self._np_chunk_ids[start:end] for start, end in slices])
+        weights = np.concatenate([self._np_weights[start:end] * repetitions
+                                  for (start, end), repetitions in zip(slices, query_terms.values())])
+        return np.bincount(chunk_ids, weights=weights, minlength=len(self.chunks))
+
+    def rank(self, question: str) -> List[int]:
+        """
+        Returns the ids of the chunks sharing a term with `question`, best first
+        (ties in chunk order).
+        """
+        np = _numpy()
+        if np is None:
+            scores = self.score(question)
+            return sorted(scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))
+        scores = self._score_array(question)
+        matching = np.flatnonzero(scores)
+        # A stable sort keeps equal scores in chunk order.
+        return matching[np.argsort(-scores[matching], kind="stable")].tolist()
+
+    def select(self,
+               question: str,
+               token_budget: int,
+               top_k: int = 10,
+               token_counter: Optional[Callable[[str], int]] = None) -> List[CodeChunk]:
+        """
+        Picks the best chunks for `question` within a token budget.
+
+        Chunks are taken in decreasing score order. A chunk that overlaps one
+        already selected (e.g. a method inside a selected file) is skipped, as
+        is any chunk that does not fit in what remains of the budget.
+
+        Args:
+            question (str): The question or query text.
+            token_budget (int): The maximum number of tokens of context.
+            top_k (int): The maximum number of chunks.
+            token_counter (Optional[Callable[[str], int]]): A function returning the
+                number of tokens of a text. Defaults to `estimate_tokens`.
+
+        Returns:
+            List[CodeChunk]: The selected chunks, best first.
+        """
+        count = token_counter or estimate_tokens
+        selected: List[CodeChunk] = []
+        used = 0
+        for chunk_id in self.rank(question):
+            if len(selected) >= top_k:
+                break
+            chunk = self.chunks[chunk_id]
+            if any(other.path == chunk.path
+                   and other.start_line <= chunk.end_line
+                   and chunk.start_line <= other.end_line
+                   for other in selected):
+                continue
+            tokens = count(chunk.header() + chunk.text + "\n")
+            if used + tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += tokens
+        return selected
+
+    def build_context(self, question: str, token_budget: int, top_k: int = 10, **kwargs: Any) -> str:
+        """
+        Formats the chunks selected for `question` in the layout used by
+        `format_project_structure`.
+
+        Args:
+            question (str): The question or query text.
+            token_budget (int): The maximum number of tokens of context.
+            top_k (int): The maximum number of chunks.
+            **kwargs: Forwarded to `select` (token_counter).
+
+        Returns:
+            str: The formatted context, or "" if no chunk matched.
+        """
+        return "".join(chunk.header() + chunk.text + "\n"
+                       for chunk in self.select(question, token_budget, top_k, **kwargs))
+
+    def build_prompt(self, question: str, token_budget: int, top_k: int = 10, **kwargs: Any) -> str:
+        """
+        Prepends the context selected for `question` to the question itself.
+
+        Args:
+            question (str): The question about the project.
+            token_budget (int): The maximum number of tokens of context.
+            top_k (int): The maximum number of chunks.
+            **kwargs: Forwarded to `select` (token_counter).
+
+        Returns:
+            str: The prompt to send with `ChatManager.send_message`.
+        """
+        context = self.build_context(question, token_budget, top_k, **kwargs)
+        if not context:
+            return question
+        return f"Relevant project context:\n{context}\nQuestion:\n{question}"
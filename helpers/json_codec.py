@@ -0,0 +1,257 @@
+"""
+Module: helpers.json_codec
+Description:
+    This module provides the JSON codec used for tool-call arguments, tool
+    results, cache keys and persisted chat histories.
+
+    The fastest available backend is picked automatically: orjson, then
+    msgspec, then the standard library `json` module. Install the "fast"
+    extra (`pip install gpt_council[fast]`) to get orjson. All backends
+    expose the same interface and raise ValueError on malformed input.
+    Values a fast backend cannot encode like the standard library does
+    (integers wider than 64 bits, NaN and infinities) are encoded by the
+    standard library, so every backend gives the same JSON.
+
+    `canonical` produces a deterministic encoding (sorted keys, no
+    whitespace, UTF-8) suitable for hashing: equal values always encode to
+    the same bytes with a given backend.
+
+Classes:
+    JSONCodec:
+        The codec interface and its standard-library implementation.
+
+Functions:
+    get_codec:
+        Returns the codec for a backend (the fastest one by default).
+    to_jsonable:
+        Converts SDK objects, dataclasses, enums and paths to plain JSON values.
+"""
+
+import dataclasses
+import enum
+import hashlib
+import json
+import math
+import pathlib
+from typing import Any, Dict, Optional, Union
+
+
+def to_jsonable(obj: Any) -> Any:
+    """
+    Converts a value that JSON cannot encode natively into one it can.
+
+    Pydantic models (such as the openai response messages) are dumped without
+    their unset fields, dataclasses become dictionaries, enums their values,
+    paths and unknown objects their string form and sets sorted lists.
+
+    Args:
+        obj (Any): The value to convert.
+
+    Returns:
+        Any: A JSON-compatible value.
+    """
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    return str(obj)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """
+    Returns True if a value contains NaN or an infinity, which the fast
+    backends write as null and the standard library as NaN/Infinity.
+    """
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+class JSONCodec:
+    """
+    A JSON codec backed by the standard library `json` module.
+
+    Faster backends subclass it and override the three encoding/decoding methods.
+
+    Attributes:
+        name (str): The name of the backend.
+    """
+
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decodes a JSON document.
+
+        Args:
+            data (Union[str, bytes]): The JSON text.
+
+        Returns:
+            Any: The decoded value.
+
+        Raises:
+            ValueError: If `data` is not valid JSON.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        """
+        Encodes a value as compact JSON text.
+
+        Args:
+            obj (Any): The value to encode; see `to_jsonable` for non-JSON types.
+
+        Returns:
+            str: The JSON text.
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=to_jsonable)
+
+    def canonical(self, obj: Any) -> bytes:
+        """
+        Encodes a value deterministically, with sorted keys and no whitespace.
+
+        Args:
+            obj (Any): The value to encode.
+
+        Returns:
+            bytes: The canonical UTF-8 encoding.
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True,
+                          default=to_jsonable).encode("utf-8")
+
+    def hash_key(self, obj: Any) -> str:
+        """
+        Returns a stable key for a value, e.g. for caches.
+
+        Args:
+            obj (Any): The value to hash.
+
+        Returns:
+            str: The SHA-256 hex digest of the canonical encoding.
+        """
+        return hashlib.sha256(self.canonical(obj)).hexdigest()
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    A JSON codec backed by orjson.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson.JSONDecodeError is a subclass of ValueError.
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            text = self._orjson.dumps(obj, default=to_jsonable, option=self._orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson only encodes 64-bit integers.
+            return super().dumps(obj)
+        if b"null" in text and _has_non_finite(obj):
+            return super().dumps(obj)
+        return text.decode("utf-8")
+
+    def canonical(self, obj: Any) -> bytes:
+        try:
+            data = self._orjson.dumps(obj, default=to_jsonable,
+                                      option=self._orjson.OPT_SORT_KEYS | self._orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().canonical(obj)
+        if b"null" in data and _has_non_finite(obj):
+            return super().canonical(obj)
+        return data
+
+
+class MsgspecCodec(JSONCodec):
+    """
+    A JSON codec backed by msgspec.
+    """
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self._msgspec = msgspec
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder(enc_hook=to_jsonable)
+        self._canonical_encoder = msgspec.json.Encoder(enc_hook=to_jsonable, order="sorted")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            data = self._encoder.encode(obj)
+        except (TypeError, ValueError, OverflowError, self._msgspec.EncodeError):
+            # msgspec only encodes 64-bit integers.
+            return super().dumps(obj)
+        if b"null" in data and _has_non_finite(obj):
+            return super().dumps(obj)
+        return data.decode("utf-8")
+
+    def canonical(self, obj: Any) -> bytes:
+        try:
+            data = self._canonical_encoder.encode(obj)
+        except (TypeError, ValueError, OverflowError, self._msgspec.EncodeError):
+            return super().canonical(obj)
+        if b"null" in data and _has_non_finite(obj):
+            return super().canonical(obj)
+        return data
+
+
+_BACKENDS = {"orjson": OrjsonCodec, "msgspec": MsgspecCodec, "json": JSONCodec}
+_codecs: Dict[str, JSONCodec] = {}
+
+
+def get_codec(backend: Optional[str] = None) -> JSONCodec:
+    """
+    Returns the codec for `backend`, or the fastest installed one.
+
+    Args:
+        backend (Optional[str]): "orjson", "msgspec" or "json". None picks the
+            first installed backend in that order.
+
+    Returns:
+        JSONCodec: The codec (one shared instance per backend).
+
+    Raises:
+        ValueError: If `backend` is unknown.
+        ImportError: If `backend` is not installed.
+    """
+    if backend is not None and backend not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}'; expected one of {list(_BACKENDS)}.")
+
+    for name in ([backend] if backend else list(_BACKENDS)):
+        if name in _codecs:
+            return _codecs[name]
+        try:
+            _codecs[name] = _BACKENDS[name]()
+        except ImportError:
+            if backend:
+                raise
+            continue
+        return _codecs[name]
+    return _codecs.setdefault("json", JSONCodec())
+
+
+# The default codec, shared by the whole package.
+codec = get_codec()
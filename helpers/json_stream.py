@@ -0,0 +1,480 @@
+"""
+Module: helpers.json_stream
+Description:
+    This module parses a JSON document while it is being streamed, so the
+    parts of a structured output can be used before the model has finished
+    generating the rest.
+
+    The IncrementalJSONParser is fed the text chunks as they arrive. Every
+    value that closes inside an object or an array (a field, an array item)
+    is reported at once as a JSONEvent carrying its path, and the whole
+    document is reported when it closes. Each value is validated against
+    the matching part of the response schema as soon as it closes; the
+    checks are shallow (type, enum, const, required and additional
+    properties, anyOf, local $ref), since its children were checked when
+    they closed.
+
+    Parsing is linear in the size of the document: strings and numbers are
+    decoded by the codec once they are complete, and the chunks of an
+    unfinished string are only scanned once.
+
+Classes:
+    JSONEvent:
+        A value that just closed.
+    StreamValidationError:
+        A value does not match the schema (strict parsers only).
+    IncrementalJSONParser:
+        Parses a JSON document fed in chunks.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from helpers.json_codec import codec
+
+FIELD = "field"
+ITEM = "item"
+DOCUMENT = "document"
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+_LITERALS = {"true": True, "false": False, "null": None}
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+@dataclass
+class JSONEvent:
+    """
+    A value that just closed.
+
+    Attributes:
+        kind (str): "field" (a member of an object), "item" (an element of an array)
+            or "document" (the whole document).
+        path (Tuple[Union[str, int], ...]): The keys and indices leading to the value.
+        value (Any): The value.
+        errors (List[str]): The schema violations of the value itself.
+    """
+    kind: str
+    path: Tuple[Union[str, int], ...]
+    value: Any
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+class StreamValidationError(ValueError):
+    """
+    A streamed value does not match the response schema.
+
+    Attributes:
+        event (JSONEvent): The offending value.
+    """
+
+    def __init__(self, event: JSONEvent) -> None:
+        super().__init__(f"{'/'.join(map(str, event.path)) or '<document>'}: {'; '.join(event.errors)}")
+        self.event = event
+
+
+def schema_of(response_format: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the JSON schema of a response format: the schema of a
+    {"type": "json_schema", "json_schema": {"schema": ...}} format, or the
+    format itself if it already is a schema.
+    """
+    if not response_format:
+        return None
+    if response_format.get("type") == "json_schema":
+        return response_format.get("json_schema", {}).get("schema")
+    if response_format.get("type") == "json_object":
+        return {"type": "object"}
+    return response_format
+
+
+class _Frame:
+    """
+    An object or array being parsed.
+    """
+    __slots__ = ("container", "path", "schema", "key", "state")
+
+    def __init__(self, container, path, schema) -> None:
+        self.container = container
+        self.path = path
+        self.schema = schema
+        self.key = None
+        # Objects: "key", "colon", "value", "comma". Arrays: "value", "comma".
+        self.state = "key" if isinstance(container, dict) else "value"
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON document fed in chunks, reporting the values as they close.
+
+    Attributes:
+        schema (Optional[Dict[str, Any]]): The schema the values are validated against.
+        strict (bool): Whether a schema violation raises StreamValidationError.
+        max_depth (Optional[int]): The deepest values reported (1 for the fields or
+            items of the document, None for all); the document is always reported.
+        done (bool): Whether the document has closed.
+        value (Any): The document, once it has closed.
+        errors (List[str]): Every schema violation seen so far, with its path.
+    """
+
+    def __init__(self,
+                 schema: Optional[Dict[str, Any]] = None,
+                 strict: bool = False,
+                 max_depth: Optional[int] = None,
+                 on_event: Optional[Callable[[JSONEvent], None]] = None) -> None:
+        """
+        Initializes the parser.
+
+        Args:
+            schema (Optional[Dict[str, Any]]): A JSON schema or a response format (see `schema_of`).
+            strict (bool): Raise StreamValidationError on the first schema violation.
+            max_depth (Optional[int]): The deepest values reported (None for all).
+            on_event (Optional[Callable[[JSONEvent], None]]): Called with every event,
+                in addition to `feed` returning them.
+        """
+        self.schema = schema_of(schema)
+        self.strict = strict
+        self.max_depth = max_depth
+        self.on_event = on_event
+        self.done = False
+        self.value = None
+        self.errors: List[str] = []
+        self._buffer = ""
+        self._pos = 0
+        # Where the scan of an unfinished string resumes (0 if none is unfinished).
+        self._string_scan = 0
+        # The chunks received inside an unfinished string, not yet added to the buffer.
+        self._parts: List[str] = []
+        self._stack: List[_Frame] = []
+        self._events: List[JSONEvent] = []
+
+    # Schema
+
+    def _resolve(self, schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        while schema and "$ref" in schema and schema["$ref"].startswith("#/"):
+            target = self.schema
+            for part in schema["$ref"][2:].split("/"):
+                target = target.get(part, {}) if isinstance(target, dict) else {}
+            schema = target
+        return schema
+
+    def _child_schema(self, schema: Optional[Dict[str, Any]], key) -> Optional[Dict[str, Any]]:
+        schema = self._resolve(schema)
+        if not schema:
+            return None
+        if "anyOf" in schema:
+            # The first branch describing the child; shallow checks keep this cheap.
+            for branch in schema["anyOf"]:
+                child = self._child_schema(branch, key)
+                if child is not None:
+                    return child
+            return None
+        if isinstance(key, int):
+            items = schema.get("items")
+            return items if isinstance(items, dict) else None
+        properties = schema.get("properties", {})
+        if key in properties:
+            return properties[key]
+        additional = schema.get("additionalProperties")
+        return additional if isinstance(additional, dict) else None
+
+    def _check(self, value: Any, schema: Optional[Dict[str, Any]]) -> List[str]:
+        """
+        Returns the violations of a value against a schema, without descending into children.
+        """
+        schema = self._resolve(schema)
+        if not schema:
+            return []
+        if "anyOf" in schema:
+            branches = [self._check(value, branch) for branch in schema["anyOf"]]
+            return [] if any(not errors for errors in branches) else ["matches none of anyOf"]
+        errors = []
+        expected = schema.get("type")
+        if expected is not None:
+            types = expected if isinstance(expected, list) else [expected]
+            if not any(self._has_type(value, name) for name in types):
+                errors.append(f"expected {' or '.join(types)}, got {type(value).__name__}")
+                return errors
+        if "enum" in schema and value not in schema["enum"]:
+            errors.append(f"{value!r} is not one of {schema['enum']}")
+        if "const" in schema and value != schema["const"]:
+            errors.append(f"{value!r} is not {schema['const']!r}")
+        if isinstance(value, dict):
+            missing = [name for name in schema.get("required", ()) if name not in value]
+            if missing:
+                errors.append(f"missing {', '.join(missing)}")
+            if schema.get("additionalProperties") is False:
+                extra = [name for name in value if name not in schema.get("properties", {})]
+                if extra:
+                    errors.append(f"unexpected {', '.join(extra)}")
+        return errors
+
+    @staticmethod
+    def _has_type(value: Any, name: str) -> bool:
+        if name == "integer":
+            return isinstance(value, int) and not isinstance(value, bool)
+        if name == "number":
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        expected = _TYPES.get(name)
+        if expected is None:
+            return True
+        if expected is not bool and isinstance(value, bool):
+            return False
+        return isinstance(value, expected)
+
+    # Values
+
+    def _report(self, kind: str, path: Tuple, value: Any, schema: Optional[Dict[str, Any]]) -> None:
+        errors = self._check(value, schema) if self.schema is not None else []
+        if errors:
+            self.errors.extend(f"{'/'.join(map(str, path)) or '<document>'}: {error}" for error in errors)
+        if kind != DOCUMENT and self.max_depth is not None and len(path) > self.max_depth:
+            return
+        event = JSONEvent(kind, path, value, errors)
+        if errors and self.strict:
+            raise StreamValidationError(event)
+        self._events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def _complete(self, value: Any, schema: Optional[Dict[str, Any]] = None, is_container: bool = False) -> None:
+        """
+        Attaches a closed value to its parent (or ends the document).
+        """
+        if not self._stack:
+            self.done = True
+            self.value = value
+            self._report(DOCUMENT, (), value, self.schema)
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            key = frame.key
+            frame.container[key] = value
+            kind = FIELD
+        else:
+            key = len(frame.container)
+            frame.container.append(value)
+            kind = ITEM
+        frame.state = "comma"
+        if not is_container:
+            schema = self._child_schema(frame.schema, key)
+        self._report(kind, frame.path + (key,), value, schema)
+
+    def _open(self, container) -> None:
+        if self._stack:
+            parent = self._stack[-1]
+            key = parent.key if isinstance(parent.container, dict) else len(parent.container)
+            path = parent.path + (key,)
+            schema = self._child_schema(parent.schema, key)
+        else:
+            path = ()
+            schema = self.schema
+        self._stack.append(_Frame(container, path, schema))
+
+    def _close(self) -> None:
+        frame = self._stack.pop()
+        self._complete(frame.container, frame.schema, is_container=True)
+
+    # Tokens
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"Invalid JSON at offset {self._pos}: {message}")
+
+    def _scan_string(self, start: int) -> int:
+        """
+        Returns the index after the closing quote of the string starting at
+        `start`, or -1 if it has not arrived yet.
+        """
+        buffer = self._buffer
+        index = max(start + 1, self._string_scan)
+        while True:
+            quote = buffer.find('"', index)
+            if quote < 0:
+                self._string_scan = len(buffer)
+                return -1
+            backslashes = 0
+            while buffer[quote - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                self._string_scan = 0
+                return quote + 1
+            index = quote + 1
+
+    def _scan_scalar(self, start: int, final: bool) -> int:
+        """
+        Returns the index after the number or literal starting at `start`, or -1
+        if it may continue in the next chunk.
+        """
+        buffer = self._buffer
+        index = start
+        while index < len(buffer) and buffer[index] not in _DELIMITERS:
+            index += 1
+        if index == len(buffer) and not final:
+            return -1
+        return index
+
+    def _value_token(self, char: str, final: bool) -> bool:
+        """
+        Consumes the value starting at the current position.
+
+        Returns:
+            bool: False if the value is incomplete and more input is needed.
+        """
+        if char == "{":
+            self._open({})
+            self._pos += 1
+        elif char == "[":
+            self._open([])
+            self._pos += 1
+        elif char == '"':
+            end = self._scan_string(self._pos)
+            if end < 0:
+                return False
+            value = codec.loads(self._buffer[self._pos:end])
+            self._pos = end
+            self._complete(value)
+        else:
+            end = self._scan_scalar(self._pos, final)
+            if end < 0:
+                return False
+            text = self._buffer[self._pos:end]
+            if text in _LITERALS:
+                value = _LITERALS[text]
+            else:
+                try:
+                    value = codec.loads(text)
+                except ValueError:
+                    raise self._error(f"unexpected {text[:20]!r}") from None
+                if not isinstance(value, (int, float)):
+                    raise self._error(f"unexpected {text[:20]!r}")
+            self._pos = end
+            self._complete(value)
+        return True
+
+    def _advance(self, final: bool = False) -> None:
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            if char in _WHITESPACE:
+                self._pos += 1
+                continue
+            if self.done:
+                raise self._error("text after the end of the document")
+            if not self._stack:
+                if not self._value_token(char, final):
+                    return
+                continue
+            frame = self._stack[-1]
+            state = frame.state
+            if state == "key":
+                if char == "}" and not frame.container:
+                    self._pos += 1
+                    self._close()
+                elif char == '"':
+                    end = self._scan_string(self._pos)
+                    if end < 0:
+                        return
+                    frame.key = codec.loads(buffer[self._pos:end])
+                    frame.state = "colon"
+                    self._pos = end
+                else:
+                    raise self._error(f"expected a key, got {char!r}")
+            elif state == "colon":
+                if char != ":":
+                    raise self._error(f"expected ':', got {char!r}")
+                frame.state = "value"
+                self._pos += 1
+            elif state == "value":
+                if char == "]" and isinstance(frame.container, list) and not frame.container:
+                    self._pos += 1
+                    self._close()
+                elif char in ",:}]":
+                    raise self._error(f"expected a value, got {char!r}")
+                elif not self._value_token(char, final):
+                    return
+            else:
+                closing = "}" if isinstance(frame.container, dict) else "]"
+                if char == ",":
+                    frame.state = "key" if isinstance(frame.container, dict) else "value"
+                    self._pos += 1
+                elif char == closing:
+                    self._pos += 1
+                    self._close()
+                else:
+                    raise self._error(f"expected ',' or {closing!r}, got {char!r}")
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """
+        Parses the next chunk of the document.
+
+        Args:
+            chunk (str): The text received.
+
+        Returns:
+            List[JSONEvent]: The values that closed in this chunk, innermost first.
+
+        Raises:
+            ValueError: If the text is not valid JSON.
+            StreamValidationError: If the parser is strict and a value violates the schema.
+        """
+        if self._string_scan and '"' not in chunk:
+            # The string cannot end in this chunk: defer the concatenation.
+            self._parts.append(chunk)
+            return []
+        if self._parts:
+            chunk = "".join(self._parts) + chunk
+            self._parts = []
+        if self._pos > 65536 and self._pos * 2 > len(self._buffer):
+            # Drop the consumed text so the buffer stays proportional to the unparsed part.
+            if self._string_scan:
+                self._string_scan -= self._pos
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self._buffer += chunk
+        self._advance()
+        events, self._events = self._events, []
+        return events
+
+    def finish(self) -> List[JSONEvent]:
+        """
+        Ends the input: a trailing number is completed.
+
+        Returns:
+            List[JSONEvent]: The values that closed with the end of the input (a
+                top-level number and the document, validated like the others).
+
+        Raises:
+            ValueError: If the document is incomplete.
+            StreamValidationError: If the parser is strict and a value violates the schema.
+        """
+        if self._parts:
+            self._buffer += "".join(self._parts)
+            self._parts = []
+        self._advance(final=True)
+        if not self.done:
+            raise ValueError("The JSON document is incomplete.")
+        events, self._events = self._events, []
+        return events
+
+    def close(self) -> Any:
+        """
+        Ends the input like `finish`.
+
+        Returns:
+            Any: The document.
+
+        Raises:
+            ValueError: If the document is incomplete.
+        """
+        self.finish()
+        return self.value
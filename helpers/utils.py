@@ -1,5 +1,10 @@
+import fnmatch
+import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Union, Callable, Iterator, List, Sequence, Tuple
 
 
 from pathlib import Path
@@ -32,33 +37,92 @@ def safe_read_file(file_path: str) -> Optional[str]:
         return None
 
 
+def _write_if_changed(content: str, path: Path) -> str:
+    """
+    Atomically writes `content` to `path` unless the file already holds it.
+
+    The existing file is compared by size and SHA-256 digest first, so identical
+    content is never rewritten. Otherwise the content is written to a temporary
+    file in the same directory, flushed to disk and renamed over the target, so
+    readers only ever see the old or the new file, never a torn one.
+
+    Args:
+        content (str): The content to write to the file.
+        path (Path): The destination file.
+
+    Returns:
+        str: "created", "updated" or "unchanged".
+    """
+    data = content.encode("utf-8")
+    existed = path.is_file()
+    if existed and path.stat().st_size == len(data):
+        if hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(data).digest():
+            return "unchanged"
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_name = str(path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp")
+    # Created with 0666 like a plain open(): the kernel applies the umask, so a new
+    # file gets the mode a plain write would give without reading the umask.
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        if existed:
+            # A replaced file keeps its mode.
+            os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return "updated" if existed else "created"
+
+
 def safe_write_file(content: str, file_path: str) -> bool:
     """
     Safely writes the given content to a file at the specified file path.
 
     This function accepts the destination file path as a string, converts it to a
     Path object, ensures that the directory exists (creating it if necessary), and
-    writes the content using UTF-8 encoding. It handles any exceptions by printing
-    an error message.
+    writes the content using UTF-8 encoding. The file is left untouched when it
+    already holds the same content, and is otherwise replaced atomically through
+    a temporary file. It handles any exceptions by printing an error message.
 
     Args:
         content (str): The content to write to the file.
         file_path (str): The path to the file where the content should be written.
 
     Returns:
-        bool: True if the file was written successfully, False otherwise.
+        bool: True if the file was written successfully (or was already up to date), False otherwise.
     """
     path = Path(file_path)
     try:
-        # Ensure the parent directory exists
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(content, encoding="utf-8")
+        _write_if_changed(content, path)
         return True
     except Exception as e:
         print(f"Error writing to file {file_path}: {e}")
         return False
 
 
+def _read_ignore_set(directory: Path) -> set:
+    """
+    Returns the names listed in the ".crawler_ignore" file of `directory`
+    (one per line, ignoring blank lines and comments starting with '#').
+    """
+    ignore_set = set()
+    ignore_file = directory / ".crawler_ignore"
+    if ignore_file.is_file():
+        for line in ignore_file.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                ignore_set.add(line)
+    return ignore_set
+
+
 def read_project(root_dir: str | Path) -> Dict[str, Any]:
     """
     Recursively reads a project's directory structure starting from `root_dir` and
@@ -84,13 +148,7 @@ def read_project(root_dir: str | Path) -> Dict[str, Any]:
     project_dict = {}
 
     # Build ignore set from .crawler_ignore if it exists
-    ignore_set = set()
-    ignore_file = root_dir / ".crawler_ignore"
-    if ignore_file.is_file():
-        for line in ignore_file.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if line and not line.startswith("#"):
-                ignore_set.add(line)
+    ignore_set = _read_ignore_set(root_dir)
 
     # Read Python files in the current directory
     files = {}
@@ -119,78 +177,313 @@ def read_project(root_dir: str | Path) -> Dict[str, Any]:
 
 
 
-def write_project(project_dict: Dict[str, Any], dest_dir: Union[str, Path]) -> None:
+def iter_project_paths(root_dir: Union[str, Path]) -> Iterator[Tuple[str, Path]]:
+    """
+    Walks the same files as `read_project` without reading them.
+
+    Hidden items and the names listed in each directory's ".crawler_ignore"
+    are skipped, and only Python files (.py) are yielded. This is meant for
+    callers that only need to know which files changed (e.g. by comparing
+    modification times) before reading them.
+
+    Args:
+        root_dir (str or Path): The root directory of the project to scan.
+
+    Yields:
+        Tuple[str, Path]: The "/"-separated path relative to `root_dir` and the file path.
+    """
+    if not isinstance(root_dir, Path):
+        root_dir = Path(root_dir)
+
+    pending = [(root_dir, "")]
+    while pending:
+        directory, prefix = pending.pop()
+        ignore_set = _read_ignore_set(directory)
+        sub_dirs = []
+        for item in sorted(directory.iterdir()):
+            if item.name.startswith('.') or item.name in ignore_set:
+                continue
+            if item.is_file() and item.suffix == ".py":
+                yield prefix + item.name, item
+            elif item.is_dir():
+                sub_dirs.append((item, f"{prefix}{item.name}/"))
+        pending.extend(reversed(sub_dirs))
+
+
+def write_project(project_dict: Dict[str, Any],
+                  dest_dir: Union[str, Path],
+                  max_workers: int = 8) -> Dict[str, List[str]]:
     """
     Recreates the project structure from `project_dict` into the destination directory
     `dest_dir`. The dictionary format should match that returned by `read_project`.
 
     Files (under the "files" key) are created with their corresponding content, and any
-    subdirectories are recursively created.
+    subdirectories are recursively created. Only files whose content differs from what
+    is already on disk are written, each one atomically, and the writes are spread over
+    a bounded pool of threads.
 
     Args:
         project_dict (Dict[str, Any]): A nested dictionary representing the project structure.
         dest_dir (str or Path): The destination directory where the project should be recreated.
+        max_workers (int): The maximum number of files written concurrently.
 
-    Raises:
-        Exception: If any file or directory cannot be created or written.
+    Returns:
+        Dict[str, List[str]]: A change summary mapping "created", "updated", "unchanged"
+            and "failed" to the paths (relative to `dest_dir`) in each state.
     """
     # Ensure dest_dir is a Path object
     if not isinstance(dest_dir, Path):
         dest_dir = Path(dest_dir)
 
-    dest_dir.mkdir(parents=True, exist_ok=True)
+    summary: Dict[str, List[str]] = {"created": [], "updated": [], "unchanged": [], "failed": []}
 
-    # Write files in the current directory
-    files = project_dict.get("files", {})
-    for file_name, content in files.items():
-        file_path = dest_dir / file_name
+    # Create the directory tree up front so the workers only deal with files.
+    def create_dirs(sub_dict: Dict[str, Any], sub_dir: Path) -> None:
         try:
-            file_path.write_text(content, encoding="utf-8")
+            sub_dir.mkdir(parents=True, exist_ok=True)
         except Exception as e:
-            print(f"Error writing file {file_path}: {e}")
+            print(f"Error creating directory {sub_dir}: {e}")
+            return
+        for key, value in sub_dict.items():
+            if key != "files" and isinstance(value, dict):
+                create_dirs(value, sub_dir / key)
 
-    # Process subdirectories recursively
-    for key, value in project_dict.items():
-        if key == "files":
-            continue
-        sub_dir = dest_dir / key
+    create_dirs(project_dict, dest_dir)
+
+    jobs = []
+    for module_path, file_name, content in iter_project_files(project_dict):
+        relative = file_name if module_path == "." else f"{module_path}/{file_name}"
+        jobs.append((relative, content))
+
+    def write_job(job: Tuple[str, str]) -> Tuple[str, str]:
+        relative, content = job
         try:
-            sub_dir.mkdir(parents=True, exist_ok=True)
+            return relative, _write_if_changed(content, dest_dir / relative)
         except Exception as e:
-            print(f"Error creating directory {sub_dir}: {e}")
+            print(f"Error writing file {dest_dir / relative}: {e}")
+            return relative, "failed"
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+            for relative, status in pool.map(write_job, jobs):
+                summary[status].append(relative)
+
+    return summary
+
+
+def iter_project_files(project_content: Dict[str, Any], module_path: str = ".") -> Iterator[Tuple[str, str, str]]:
+    """
+    Walks a project dictionary (as returned by `read_project`) depth-first and
+    yields every file it contains, at any nesting level.
+
+    Files of a directory are yielded before the files of its subdirectories, so
+    the order matches the layout produced by `read_project`.
+
+    Args:
+        project_content (Dict[str, Any]): A nested dictionary representing the project structure.
+        module_path (str): The path of `project_content` relative to the project root.
+
+    Yields:
+        Tuple[str, str, str]: The module path, the file name and the file content.
+    """
+    for file_name, file_content in project_content.get("files", {}).items():
+        yield module_path, file_name, file_content
+
+    for key, value in project_content.items():
+        if key == "files" or not isinstance(value, dict):
             continue
-        if isinstance(value, dict):
-            write_project(value, sub_dir)
-            
+        sub_path = key if module_path == "." else f"{module_path}/{key}"
+        yield from iter_project_files(value, sub_path)
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Cheaply estimates the number of tokens in a text.
+
+    The estimate assumes an average of `chars_per_token` characters per token,
+    which is a good approximation for English prose and source code with the
+    OpenAI tokenizers. Use an exact tokenizer through the `token_counter`
+    argument of `pack_project_structure` when precision matters.
+
+    Args:
+        text (str): The text to measure.
+        chars_per_token (float): The average number of characters per token.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return int(len(text) / chars_per_token) + 1
+
+
 def format_project_structure(project_content: dict) -> str:
     """
     Formats a given project dictionary into a readable string representation.
 
+    The whole tree is walked, not only the first level, and the output is
+    accumulated in a list that is joined once, so the cost is linear in the
+    size of the project.
+
     Args:
         project_content (dict): A dictionary representing the project structure.
-            Expected format:
+            Expected format (as returned by `read_project`):
             {
+                "files": {"filename": "file_content"},
                 "module_name": {
                     "files": {
                         "filename": "file_content"
-                    }
+                    },
+                    "submodule_name": {...}
                 }
             }
 
     Returns:
         str: A formatted string representing the project structure.
     """
-    project_map = ""
-    
-    for module_name, module_data in project_content.items():
-        project_map += f"Module Name: {module_name}\n"
-        
-        if "files" in module_data:
-            for file_name, file_content in module_data["files"].items():
-                project_map += f"File Name: {file_name}\n"
-                project_map += file_content
-                project_map += "\n"
-                
-    return project_map
+    parts: List[str] = []
+    current_module = None
+
+    for module_path, file_name, file_content in iter_project_files(project_content):
+        if module_path != current_module:
+            parts.append(f"Module Name: {module_path}\n")
+            current_module = module_path
+        parts.append(f"File Name: {file_name}\n")
+        parts.append(file_content)
+        parts.append("\n")
+
+    return "".join(parts)
+
+
+def _file_priority(path: str, priority: Optional[Sequence[str]]) -> int:
+    """
+    Returns the rank of `path` in the `priority` list of glob patterns.
+    Files that match no pattern are ranked after every pattern.
+    """
+    if not priority:
+        return 0
+    for rank, pattern in enumerate(priority):
+        if fnmatch.fnmatch(path, pattern):
+            return rank
+    return len(priority)
+
+
+def _split_lines(text: str, room: int, count: Callable[[str], int]) -> List[List[str]]:
+    """
+    Splits a text on line boundaries into pieces of at most `room` tokens,
+    cutting lines that are larger than `room` on their own into slices.
+    """
+    pieces: List[List[str]] = [[]]
+    piece_tokens = 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = count(line)
+        if line_tokens > room:
+            # A single line larger than the budget is cut into slices.
+            step = max(1, len(line) * room // line_tokens)
+            segments = [line[start:start + step] for start in range(0, len(line), step)]
+        else:
+            segments = [line]
+        for segment in segments:
+            segment_tokens = line_tokens if len(segments) == 1 else count(segment)
+            if pieces[-1] and piece_tokens + segment_tokens > room:
+                pieces.append([])
+                piece_tokens = 0
+            pieces[-1].append(segment)
+            piece_tokens += segment_tokens
+    return pieces
+
+
+def pack_project_structure(project_content: Dict[str, Any],
+                           token_budget: int,
+                           priority: Optional[Sequence[str]] = None,
+                           token_counter: Optional[Callable[[str], int]] = None) -> List[str]:
+    """
+    Formats a project dictionary into a list of chunks, each of which fits in
+    `token_budget` tokens.
+
+    Files are packed greedily in priority order, so the first chunk holds the
+    most relevant files. A file is always kept whole in a single chunk unless
+    it is larger than the budget on its own, in which case it is split on line
+    boundaries into consecutive parts. Every chunk uses the same layout as
+    `format_project_structure` and repeats the "Module Name" header it needs,
+    so each chunk can be sent to a model independently.
+
+    Args:
+        project_content (Dict[str, Any]): A nested dictionary representing the project structure.
+        token_budget (int): The maximum number of tokens per chunk for the target model.
+        priority (Optional[Sequence[str]]): Glob patterns matched against the file path
+            relative to the project root (e.g. "models/*.py"). Files matching earlier
+            patterns are packed first; unmatched files keep their tree order at the end.
+        token_counter (Optional[Callable[[str], int]]): A function returning the number of
+            tokens of a text. Defaults to `estimate_tokens`.
 
+    Returns:
+        List[str]: The formatted chunks, in priority order.
+
+    Raises:
+        ValueError: If `token_budget` is not a positive integer.
+    """
+    if token_budget <= 0:
+        raise ValueError("token_budget must be a positive integer.")
+    count = token_counter or estimate_tokens
+
+    entries = []
+    for module_path, file_name, file_content in iter_project_files(project_content):
+        path = file_name if module_path == "." else f"{module_path}/{file_name}"
+        entries.append((_file_priority(path, priority), module_path, file_name, file_content))
+    # sorted() is stable, so files of equal priority keep their tree order.
+    entries.sort(key=lambda entry: entry[0])
+
+    chunks: List[str] = []
+    parts: List[str] = []
+    used = 0
+    current_module = None
+
+    def flush() -> None:
+        nonlocal parts, used, current_module
+        if parts:
+            chunks.append("".join(parts))
+        parts, used, current_module = [], 0, None
+
+    def add_block(module_path: str, block: str, block_tokens: int) -> None:
+        nonlocal used, current_module
+        header = f"Module Name: {module_path}\n"
+        header_tokens = count(header)
+        needed = block_tokens if module_path == current_module else block_tokens + header_tokens
+        if parts and used + needed > token_budget:
+            flush()
+            needed = block_tokens + header_tokens
+        if module_path != current_module:
+            parts.append(header)
+            current_module = module_path
+        parts.append(block)
+        used += needed
+
+    for _, module_path, file_name, file_content in entries:
+        block = f"File Name: {file_name}\n{file_content}\n"
+        block_tokens = count(block)
+        header_tokens = count(f"Module Name: {module_path}\n")
+        if block_tokens + header_tokens <= token_budget:
+            add_block(module_path, block, block_tokens)
+            continue
 
+        # The file cannot fit in a chunk on its own: split it on line boundaries.
+        # Every part repeats a "(part N/M)" header and ends with a newline, so
+        # their length is reserved for the final part count: more parts can mean
+        # a longer header, so the split is redone until the count is stable.
+        total = 1
+        while True:
+            label = f"File Name: {file_name} (part {total}/{total})\n"
+            room = token_budget - header_tokens - count(label) - count("\n")
+            if room <= 0:
+                raise ValueError(f"token_budget is too small to hold any part of {file_name}.")
+            pieces = _split_lines(file_content, room, count)
+            if len(pieces) <= total:
+                break
+            total = len(pieces)
+
+        flush()
+        for index, piece in enumerate(pieces, start=1):
+            part = f"File Name: {file_name} (part {index}/{len(pieces)})\n{''.join(piece)}\n"
+            add_block(module_path, part, count(part))
+
+    flush()
+    return chunks
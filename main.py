@@ -34,6 +34,9 @@ if __name__ == "__main__":
     manager.send_developer(model.developer)
 
  #   message = "Could you read my project in the current directory and give me an honest opinion on the patterns and design  using mark down and defining a clear set of improvement in order to pass to my facotring team. You can write this on "+documents_directory
+ #   from helpers.context_selector import BM25ContextSelector
+ #   selector = BM25ContextSelector.from_directory(original_project_directory)
+ #   message = selector.build_prompt(message, token_budget=8000, top_k=12)
     message = "Dog is a human as Cat is to ?"
 
     if manager.send_message(message):
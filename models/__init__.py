@@ -14,15 +14,22 @@ It aggregates the following modules:
     - model_config (Config): A builder-style class for configuring chat completion
       parameters.
     - model (Model): Defines the model configuration and behavior.
+    - model_capabilities (CapabilityRegistry): What every model type accepts, loaded
+      from the model_capabilities.json data file.
     - model_config_adapter (ConfigAdapter): Specializes a generic configuration to
       the specific requirements of a given model type.
     - model_config_director (ConfigDirector): Provides preset configurations for models.
     - model_director (Director): Orchestrates the creation of different types of models
       using the builder pattern.
+    - model_cascade (ModelCascade): Escalates a request from cheap to strong presets
+      until an answer is confident enough.
 """
 
 from .model_config import Config
 from .model import Model
+from .model_capabilities import ModelCapabilities, CapabilityRegistry
 from .model_config_adapter import ConfigAdapter
 from .model_config_director import ConfigDirector
 from .model_director import Director
+from .model_cascade import (ConfidenceScorer, LogprobScorer, SelfCheckScorer, ValidatorScorer,
+                            CascadeStage, CascadeOutcome, ModelCascade)
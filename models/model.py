@@ -15,7 +15,7 @@ and control the model.
 """
 
 from typing import Any, Dict, List, Optional
-from tools import ModelTool, ModelToolList
+from tools import ModelTool, ModelToolList, ToolRouter
 
 
 class Model:
@@ -169,6 +169,22 @@ class Model:
             self.set_tool(external_tool)
         return self
 
+    def set_tool_router(self, router: ToolRouter) -> "Model":
+        """
+        Set the router that selects which tools are sent with each request.
+
+        Args:
+            router (ToolRouter): The router, or None to always send every tool.
+
+        Returns:
+            Model: The current Model instance (for fluent chaining).
+        """
+        if self.tools_list is None:
+            self.tools_list = ModelToolList()
+
+        self.tools_list.set_router(router)
+        return self
+
     def enable_parallel_tool_calls(self, enable: bool) -> "Model":
         """
         Enable or disable parallel calls to multiple tools.
@@ -0,0 +1,137 @@
+"""
+Module: models.model_capabilities
+Description:
+    This module describes what every model type accepts. The capabilities live
+    in a data file (model_capabilities.json, shipped with the package) rather
+    than in code, so a new model is supported by adding a line to it.
+
+    The file defines families (e.g. "chat" and "reasoning") holding default
+    capabilities, and model entries keyed by a model type prefix that name
+    their family and override some of its values. A model type takes the
+    entry of its longest matching prefix, so dated snapshots such as
+    "o3-mini-2025-01-31" behave like "o3-mini", and an unknown "o5" still
+    falls in the reasoning family through the "o" entry.
+
+Classes:
+    ModelCapabilities:
+        What a model type accepts and supports.
+    CapabilityRegistry:
+        Loads the data file and looks model types up by prefix.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional
+
+_DEFAULT_PATH = Path(__file__).with_name("model_capabilities.json")
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """
+    What a model type accepts and supports.
+
+    Attributes:
+        family (str): The family of the model (e.g. "chat" or "reasoning").
+        allowed_params (FrozenSet[str]): The Config parameters the API accepts for the model.
+        context_window (int): The maximum number of prompt plus completion tokens.
+        max_output_tokens (int): The maximum number of completion tokens.
+        tools (bool): Whether the model accepts tools.
+        streaming (bool): Whether the model can stream its answer.
+        reasoning (bool): Whether the model reasons before answering (no sampling
+            parameters, no logprobs, completion tokens spent on reasoning).
+    """
+    family: str
+    allowed_params: FrozenSet[str]
+    context_window: int
+    max_output_tokens: int
+    tools: bool
+    streaming: bool
+    reasoning: bool
+
+
+class CapabilityRegistry:
+    """
+    The capabilities of every model type, loaded from a data file.
+
+    Lookups are memoized per model type.
+
+    Attributes:
+        path (Path): The data file.
+        version (int): Incremented whenever an entry is registered at runtime.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initializes the registry. The data file is read on first lookup.
+
+        Args:
+            path (Optional[str]): The data file (the one shipped with the package if None).
+        """
+        self.path = Path(path) if path is not None else _DEFAULT_PATH
+        self.version = 0
+        self._data: Optional[Dict[str, Any]] = None
+        self._cache: Dict[str, ModelCapabilities] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self._data = json.load(file)
+        return self._data
+
+    def register(self, prefix: str, family: str, **overrides) -> "CapabilityRegistry":
+        """
+        Adds or replaces the entry of a model type prefix at runtime.
+
+        Args:
+            prefix (str): The model type prefix.
+            family (str): The family the entry belongs to.
+            **overrides: The capabilities that differ from the family's.
+
+        Returns:
+            CapabilityRegistry: The current instance (for fluent chaining).
+        """
+        with self._lock:
+            self._load()["models"][prefix] = dict(overrides, family=family)
+            self._cache.clear()
+            self.version += 1
+        return self
+
+    def get(self, model_type: str) -> ModelCapabilities:
+        """
+        Returns the capabilities of a model type, from its longest matching prefix
+        (or the default family if no prefix matches).
+
+        Args:
+            model_type (str): The model type, e.g. "o3-mini-2025-01-31".
+
+        Returns:
+            ModelCapabilities: The capabilities.
+        """
+        capabilities = self._cache.get(model_type)
+        if capabilities is not None:
+            return capabilities
+        with self._lock:
+            data = self._load()
+            matches = [prefix for prefix in data["models"] if model_type.startswith(prefix)]
+            entry = data["models"][max(matches, key=len)] if matches else {}
+            family = entry.get("family", data["default_family"])
+            values = dict(data["families"][family], **entry)
+            capabilities = ModelCapabilities(
+                family=family,
+                allowed_params=frozenset(values["allowed_params"]),
+                context_window=values["context_window"],
+                max_output_tokens=values["max_output_tokens"],
+                tools=values["tools"],
+                streaming=values["streaming"],
+                reasoning=values["reasoning"],
+            )
+            self._cache[model_type] = capabilities
+        return capabilities
+
+
+# The registry of the capabilities shipped with the package.
+registry = CapabilityRegistry()
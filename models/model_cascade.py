@@ -0,0 +1,325 @@
+"""
+Module: models.model_cascade
+Description:
+    This module answers requests with the cheapest model that is confident
+    enough. A ModelCascade holds an ordered list of stages built from the
+    Director presets (e.g. `default_model` on gpt-4o-mini, then
+    `python_programmer` on o3-mini). Each stage answers in its own branch of
+    the conversation; a scorer rates its confidence, and the answer is kept if
+    the score reaches the stage's threshold. Otherwise the request escalates to
+    the next, stronger stage. The last stage always answers.
+
+    Confidence comes from the token logprobs of the answer, from a self-check
+    request (the probability the model answers "yes" when asked whether its
+    answer is correct) or from a validator supplied by the caller. Thresholds
+    are learned from logged outcomes: the lowest score at which the accepted
+    answers of a stage reached a target accuracy.
+
+Classes:
+    ConfidenceScorer:
+        The scorer interface.
+    LogprobScorer:
+        Scores the mean token probability of the answer.
+    SelfCheckScorer:
+        Asks the stage whether its answer is correct.
+    ValidatorScorer:
+        Scores the answer with a caller-supplied function.
+    CascadeStage:
+        A preset and the confidence needed to keep its answers.
+    CascadeOutcome:
+        A logged score and whether the answer was correct.
+    ModelCascade:
+        Runs the stages in order and learns their thresholds.
+"""
+
+import copy
+import math
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+from models import Config, ConfigAdapter, ConfigDirector, Director, Model
+from models.model_capabilities import registry
+from helpers.json_codec import codec
+from helpers.utils import safe_read_file, safe_write_file
+
+
+class ConfidenceScorer:
+    """
+    The scorer interface: `score` rates an answer between 0 and 1.
+    """
+
+    def prepare(self, config: Config, model: Model) -> Config:
+        """
+        Returns the config a stage is run with (e.g. with logprobs enabled).
+
+        Args:
+            config (Config): The config of the stage, adapted to its model.
+            model (Model): The model of the stage.
+        """
+        return config
+
+    def score(self, manager, chatbot: Tuple[Config, Model]) -> float:
+        """
+        Rates the latest answer of a conversation.
+
+        Args:
+            manager (ChatManager): The branch holding the stage's answer in `last_response`.
+            chatbot (Tuple[Config, Model]): The stage that answered.
+
+        Returns:
+            float: The confidence, between 0 and 1.
+        """
+        raise NotImplementedError
+
+
+class LogprobScorer(ConfidenceScorer):
+    """
+    Scores the geometric mean of the token probabilities of the answer.
+
+    Stages are run with `logprobs` enabled, except reasoning models, which
+    reject the parameter; their answers have no logprobs, score 0 and escalate.
+    """
+
+    def prepare(self, config, model):
+        if registry.get(model.model_type).reasoning:
+            return config
+        return copy.copy(config).set_logprobs(True)
+
+    def score(self, manager, chatbot):
+        response = manager.last_response
+        if response is None or response.raw_api_response is None:
+            return 0.0
+        logprobs = response.raw_api_response.choices[response.choice_index].logprobs
+        tokens = getattr(logprobs, "content", None) or []
+        if not tokens:
+            return 0.0
+        return math.exp(sum(token.logprob for token in tokens) / len(tokens))
+
+
+class SelfCheckScorer(ConfidenceScorer):
+    """
+    Asks the stage whether its answer is correct and scores the probability
+    of a "yes". The check is a separate one-token request on a copy of the
+    conversation, so it costs a fraction of the answer.
+    """
+
+    def __init__(self,
+                 question: str = "Is the answer above correct and complete? Answer only yes or no.") -> None:
+        self.question = question
+
+    def score(self, manager, chatbot):
+        model_config, model = chatbot
+        messages = manager.chat_history.messages() + [{"role": "user", "content": self.question}]
+        params = dict(model_config.get_params(), n=None)
+        params.update(logprobs=True, top_logprobs=5)
+        if registry.get(model.model_type).reasoning:
+            # Reasoning models spend completion tokens before answering and return no logprobs.
+            params.update(logprobs=None, top_logprobs=None)
+        else:
+            params.update(max_completion_tokens=1)
+        raw_api_response = manager.auth.get_client().chat.completions.create(
+            model=model.model_type,
+            messages=messages,
+            **{key: value for key, value in params.items() if value is not None}
+        )
+        choice = raw_api_response.choices[0]
+        tokens = getattr(choice.logprobs, "content", None) or []
+        if tokens and tokens[0].top_logprobs:
+            return sum(math.exp(candidate.logprob) for candidate in tokens[0].top_logprobs
+                       if candidate.token.strip().lower() == "yes")
+        return 1.0 if (choice.message.content or "").strip().lower().startswith("yes") else 0.0
+
+
+class ValidatorScorer(ConfidenceScorer):
+    """
+    Scores the answer with a function of its content: a bool (e.g. "the code
+    compiles", "the JSON parses") or a float between 0 and 1.
+    """
+
+    def __init__(self, validate: Callable[[str], Union[bool, float]]) -> None:
+        self.validate = validate
+
+    def score(self, manager, chatbot):
+        response = manager.last_response
+        content = response.get_content() if response is not None and response.raw_api_response else None
+        if content is None:
+            return 0.0
+        try:
+            return float(self.validate(content))
+        except Exception:
+            return 0.0
+
+
+@dataclass
+class CascadeStage:
+    """
+    A preset of the cascade.
+
+    Attributes:
+        name (str): The name of the stage (the Director preset by default).
+        model (Model): The model answering at this stage.
+        config (Config): The config adapted to the model.
+        threshold (float): The confidence needed to keep an answer of this stage.
+    """
+    name: str
+    model: Model
+    config: Config
+    threshold: float = 0.8
+
+
+@dataclass
+class CascadeOutcome:
+    """
+    A logged answer of a stage.
+
+    Attributes:
+        stage (str): The name of the stage.
+        score (float): The confidence of the answer.
+        correct (bool): Whether the answer turned out to be correct.
+    """
+    stage: str
+    score: float
+    correct: bool
+
+
+class ModelCascade:
+    """
+    Runs the stages in order until one is confident enough.
+
+    Attributes:
+        stages (List[CascadeStage]): The stages, from cheapest to strongest.
+        scorer (ConfidenceScorer): Rates the answers.
+        outcomes (List[CascadeOutcome]): The logged outcomes thresholds are learned from.
+        last_trace (List[Tuple[str, Optional[float], bool]]): The (stage, score, accepted)
+            of every attempt of the latest run; the last stage is always accepted and
+            not scored (None).
+    """
+
+    def __init__(self, stages: List[CascadeStage], scorer: Optional[ConfidenceScorer] = None) -> None:
+        """
+        Initializes the cascade.
+
+        Args:
+            stages (List[CascadeStage]): The stages, from cheapest to strongest.
+            scorer (Optional[ConfidenceScorer]): Rates the answers (LogprobScorer by default).
+        """
+        if not stages:
+            raise ValueError("A cascade needs at least one stage.")
+        self.stages = stages
+        self.scorer = scorer or LogprobScorer()
+        self.outcomes: List[CascadeOutcome] = []
+        self.last_trace: List[Tuple[str, Optional[float], bool]] = []
+
+    @classmethod
+    def from_presets(cls,
+                     presets: Iterable[Union[str, Tuple[str, float]]] = ("default_model", "python_programmer"),
+                     config: Optional[Config] = None,
+                     scorer: Optional[ConfidenceScorer] = None,
+                     tools: Optional[List[object]] = None) -> "ModelCascade":
+        """
+        Builds a cascade from Director presets.
+
+        Args:
+            presets (Iterable): The names of Director presets, from cheapest to strongest,
+                optionally paired with their threshold.
+            config (Optional[Config]): The config template (ConfigDirector.default_config() if None),
+                adapted to the model of every stage.
+            scorer (Optional[ConfidenceScorer]): Rates the answers.
+            tools (Optional[List[object]]): Tools registered on every stage's model.
+
+        Returns:
+            ModelCascade: The cascade.
+        """
+        config = config or ConfigDirector.default_config()
+        stages = []
+        for preset in presets:
+            name, threshold = (preset, 0.8) if isinstance(preset, str) else preset
+            model = getattr(Director, name)()
+            if tools:
+                model.set_tools(tools)
+            stages.append(CascadeStage(name, model, ConfigAdapter.adapt(config, model), threshold))
+        return cls(stages, scorer)
+
+    def run(self, manager, budget=None) -> str:
+        """
+        Answers the pending request of a conversation with the first confident stage.
+
+        Every stage answers in a fork of the conversation; the accepted branch
+        becomes the conversation of `manager`.
+
+        Args:
+            manager (ChatManager): The conversation, ending with the user's request.
+            budget (Optional[RunBudget]): The limits shared by all stages.
+
+        Returns:
+            str: The readable answer of the accepted stage.
+        """
+        self.last_trace = []
+        for position, stage in enumerate(self.stages):
+            chatbot = (self.scorer.prepare(stage.config, stage.model), stage.model)
+            branch = type(manager)(manager.auth)
+            branch.chat_history = manager.chat_history.fork()
+            answer = branch.get_response(chatbot, budget)
+            last = position == len(self.stages) - 1
+            # The last stage is accepted whatever its score: scoring it may cost a request.
+            score = None if last else self.scorer.score(branch, chatbot)
+            accepted = last or score >= stage.threshold
+            self.last_trace.append((stage.name, score, accepted))
+            if accepted or (budget is not None and budget.exhausted()):
+                manager.chat_history = branch.chat_history
+                manager.last_response = branch.last_response
+                return answer
+
+    def record_outcome(self, stage: str, score: float, correct: bool) -> None:
+        """
+        Logs whether an answer of `stage` with confidence `score` was correct.
+        """
+        self.outcomes.append(CascadeOutcome(stage, score, correct))
+
+    def fit_thresholds(self, target_accuracy: float = 0.9, min_samples: int = 20) -> None:
+        """
+        Sets the threshold of every stage (but the last) to the lowest score at
+        which its logged answers scoring at least that much reach `target_accuracy`.
+
+        Stages with fewer than `min_samples` outcomes keep their threshold. A stage
+        that never reaches the target gets an infinite threshold: it always escalates.
+
+        Args:
+            target_accuracy (float): The accuracy required of accepted answers.
+            min_samples (int): The number of outcomes needed to fit a stage.
+        """
+        for stage in self.stages[:-1]:
+            outcomes = sorted((outcome for outcome in self.outcomes if outcome.stage == stage.name),
+                              key=lambda outcome: outcome.score, reverse=True)
+            if len(outcomes) < min_samples:
+                continue
+            threshold = math.inf
+            correct = 0
+            for count, outcome in enumerate(outcomes, start=1):
+                correct += outcome.correct
+                # Answers with equal scores are accepted or escalated together.
+                tied = count < len(outcomes) and outcomes[count].score == outcome.score
+                if not tied and correct / count >= target_accuracy:
+                    threshold = outcome.score
+            stage.threshold = threshold
+
+    def save_outcomes(self, file_path: str) -> bool:
+        """
+        Saves the logged outcomes as JSON.
+
+        Returns:
+            bool: True if the file was written.
+        """
+        return safe_write_file(codec.dumps([asdict(outcome) for outcome in self.outcomes]), file_path)
+
+    def load_outcomes(self, file_path: str) -> "ModelCascade":
+        """
+        Appends the outcomes saved by `save_outcomes`.
+
+        Returns:
+            ModelCascade: The current instance (for fluent chaining).
+        """
+        content = safe_read_file(file_path)
+        if content:
+            self.outcomes.extend(CascadeOutcome(**outcome) for outcome in codec.loads(content))
+        return self
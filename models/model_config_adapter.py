@@ -3,38 +3,41 @@ ford begin_TODO
 - Consider renaming the class "ConfigAdapter" to "ModelConfigAdapter" for clarity.
 - In the adapt() method, consider renaming the parameter "model" to "model_instance" to avoid potential confusion.
 - Update the adapt() docstring: change "model_type" to "model" since a Model instance is expected.
-- Replace print statements with logging for production use.
 end_todo
 
 Implements a ModelConfigAdapter that specializes a generic Config
 preset based on the provided model_type. This adapter can remove or adapt
 parameters that don’t apply to a given model.
+
+The parameters each model accepts come from the capability registry
+(models.model_capabilities), so dated snapshots and new models of a known
+family are adapted too. The adapted parameters are memoized per (preset
+parameters, model type); every call returns a new Config built from them.
 """
 
 import copy
+import threading
 from models import Config, Model
+from models.model_capabilities import registry
+from helpers.json_codec import codec
 
 class ConfigAdapter:
-    # Define restrictions or adjustments based on model type.
-    # For example, which parameters are not applicable for a model.
-    _restricted_params = {
-        # For model type "o3-mini", remove these config keys.
-        "gpt-4o-mini": ["reasoning_effort"],
-        # For model type "gpt-4o-mini", remove or adjust these keys.
-        "gpt-4o": ["reasoning_effort"],
-        "gpt-4.5": ["reasoning_effort"],
-        "o3-mini": ["frequency_penalty", "top_p", "presence_penalty", "temperature"],
-        "o1": ["frequency_penalty", "top_p", "presence_penalty", "temperature"]
-    }
+    # Adapted parameters, keyed by (registry version, model type, canonical preset parameters).
+    _cache = {}
+    _cache_lock = threading.Lock()
+    _max_cache_size = 1024
 
     @staticmethod
     def adapt(config: Config, model: Model) -> Config:
         """
         Adapts the given configuration for the specified model.
 
-        This method examines the model's model_type and removes, nullifies,
-        or adjusts parameters in the configuration that are not applicable
-        for that specific model type.
+        This method looks the model's model_type up in the capability registry,
+        drops the parameters the model does not accept, and caps
+        max_completion_tokens at the model's maximum output.
+
+        The adapted parameters are memoized per (preset parameters, model type);
+        the returned Config is a new instance the caller may change freely.
 
         Args:
             config (Config): A Config instance containing the preset parameters.
@@ -43,33 +46,25 @@ class ConfigAdapter:
 
         Returns:
             Config: The adapted Config instance with modifications applied
-                  according to the model's restrictions.
+                  according to the model's capabilities.
         """
-        # Retrieve current parameters as a dict, if needed.
-        sp_config = copy.copy(config)
-        params = sp_config.get_params()
-
-        # Get the list of keys to restrict for this model, if any.
-        model_type = model.model_type
-        print(model_type)
-        keys_to_remove = ConfigAdapter._restricted_params.get(model_type, [])
-
-        # Remove or adjust each restricted parameter.
-        for key in keys_to_remove:
-            if key in params:
-                # Option A: Remove the parameter completely.
-                # One way is to set the attribute to None.
-                setattr(sp_config, key, None)
-                # Alternatively, if you want to remove from the dictionary,
-                # you could delete it from params—but note that
-                # config.get_params() builds the dictionary dynamically.
-                # So setting the underlying attribute to None is sufficient.
-        # Further adaptation rules can go here:
-        # For instance, if a parameter’s value is out of range for a model,
-        # you might adjust it:
-        if (model_type == "gpt-4o-mini") or (model_type == "gpt-4o"):
-            sp_config.set_reasoning_effort(None)
+        params = config.get_params()
+        key = (registry.version, model.model_type, codec.canonical(params))
+        adapted_params = ConfigAdapter._cache.get(key)
+        if adapted_params is None:
+            capabilities = registry.get(model.model_type)
+            adapted_params = {name: copy.deepcopy(value) for name, value in params.items()
+                              if name in capabilities.allowed_params}
+            if adapted_params.get("max_completion_tokens") is not None:
+                adapted_params["max_completion_tokens"] = min(adapted_params["max_completion_tokens"],
+                                                              capabilities.max_output_tokens)
+            with ConfigAdapter._cache_lock:
+                if len(ConfigAdapter._cache) >= ConfigAdapter._max_cache_size:
+                    ConfigAdapter._cache.clear()
+                ConfigAdapter._cache[key] = adapted_params
 
-        # At this point, you can either return the modified config
-        # or even build a fresh dict if desired.
-        return sp_config
+        adapted = Config()
+        for name, value in adapted_params.items():
+            # Values such as metadata or stop lists are copied: the cached ones are shared.
+            setattr(adapted, name, copy.deepcopy(value))
+        return adapted
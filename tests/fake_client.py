@@ -0,0 +1,65 @@
+"""
+A scripted stand-in for the openai client, for tests that drive ChatManager
+without network access.
+"""
+
+import itertools
+import json
+from types import SimpleNamespace
+
+_ids = itertools.count()
+
+
+def message(content=None, tool_calls=None):
+    """
+    Returns an assistant message as the SDK would (with `model_dump`).
+    """
+    plain = {"role": "assistant", "content": content}
+    if tool_calls:
+        plain["tool_calls"] = [{"id": call.id, "type": "function",
+                                "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                               for call in tool_calls]
+    result = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    result.model_dump = lambda exclude_none=True, **_: {key: value for key, value in plain.items()
+                                                         if value is not None or not exclude_none}
+    return result
+
+
+def tool_call(name, arguments):
+    """
+    Returns a function tool call.
+    """
+    return SimpleNamespace(id=f"call_{next(_ids)}", type="function",
+                           function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def completion(*messages, usage=(10, 5)):
+    """
+    Returns a chat completion with one choice per message.
+    """
+    return SimpleNamespace(
+        id=f"chatcmpl_{next(_ids)}", model="gpt-4o-mini",
+        choices=[SimpleNamespace(index=index, message=item, logprobs=None, finish_reason="stop")
+                 for index, item in enumerate(messages)],
+        usage=SimpleNamespace(prompt_tokens=usage[0], completion_tokens=usage[1], total_tokens=sum(usage)))
+
+
+class FakeAuth:
+    """
+    An authentication service whose client answers with `script(request, call_number)`.
+
+    Attributes:
+        calls (List[dict]): The keyword arguments of every request.
+    """
+
+    def __init__(self, script):
+        self.calls = []
+
+        def create(**request):
+            self.calls.append(request)
+            return script(request, len(self.calls))
+
+        self._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    def get_client(self):
+        return self._client
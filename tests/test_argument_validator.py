@@ -0,0 +1,44 @@
+"""
+Tests of tools.argument_validator: unions prefer the member the JSON value
+already matches and coerce only as a fallback.
+"""
+
+from typing import List, Optional, Union
+
+import pytest
+
+from tools.argument_validator import ToolArgumentError, compile_validator
+
+
+def tool(a: Union[str, int], b: Union[str, float] = 0.0, c: Union[int, List[int]] = 0,
+         d: Optional[Union[str, bool]] = None) -> None:
+    pass
+
+
+validate = compile_validator(tool)
+
+
+@pytest.mark.parametrize("arguments, expected", [
+    ({"a": 5}, {"a": 5}),
+    ({"a": "5"}, {"a": "5"}),
+    ({"a": 1, "b": 5}, {"a": 1, "b": 5.0}),
+    ({"a": 1, "b": "x"}, {"a": 1, "b": "x"}),
+    ({"a": 1, "c": [1, "2"]}, {"a": 1, "c": [1, 2]}),
+    ({"a": 1, "d": True}, {"a": 1, "d": True}),
+    ({"a": 1, "d": None}, {"a": 1}),
+])
+def test_union_prefers_exact_members(arguments, expected):
+    assert validate(arguments) == expected
+
+
+def test_union_coerces_as_a_fallback():
+    def count(n: Union[int, List[int]]) -> None:
+        pass
+    assert compile_validator(count)({"n": "3"}) == {"n": 3}
+
+
+def test_union_reports_every_member():
+    def count(n: Union[int, List[int]]) -> None:
+        pass
+    with pytest.raises(ToolArgumentError, match="an integer.* or .*an array"):
+        compile_validator(count)({"n": {"x": 1}})
@@ -0,0 +1,59 @@
+"""
+Tests of helpers.code_search: the trigram prefilter never drops a real match.
+"""
+
+import re
+
+import pytest
+
+from helpers.code_search import CodeSearchIndex, _required_literals
+
+
+@pytest.fixture
+def index():
+    index = CodeSearchIndex()
+    index.update_file("a.py", "value = 'fooAbar'\nprint(value)\n")
+    index.update_file("b.py", "pattern = 'foo-bar'\n")
+    return index
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"foo\x41bar", ["foo", "bar"]),
+    (r"fooAbar", ["fooAbar"]),
+    (r"foo\101bar", ["foo", "bar"]),
+    (r"\N{LATIN CAPITAL LETTER A}bar", ["bar"]),
+    (r"foo\.bar", ["foo.bar"]),
+    (r"foo|bar", None),
+])
+def test_required_literals(pattern, expected):
+    assert _required_literals(pattern) == expected
+
+
+@pytest.mark.parametrize("pattern", [r"foo\x41bar", r"fooAbar", r"foo\101bar"])
+def test_numeric_escapes_still_match(index, pattern):
+    assert [hit[0] for hit in index.search(pattern, regex=True)] == ["a.py"]
+
+
+@pytest.mark.parametrize("max_hits", [0, -1])
+def test_no_hits_without_room(index, max_hits):
+    assert index.search("value", max_hits=max_hits) == []
+
+
+@pytest.mark.parametrize("pattern, flags, expected", [
+    (r"(?x)ab cd", 0, None),
+    (r"ab cd", re.VERBOSE, None),
+    (r"(?i)fooAbar", 0, ["fooAbar"]),
+    (r"(?i)straße", 0, []),
+])
+def test_required_literals_honour_flags(pattern, flags, expected):
+    assert _required_literals(pattern, flags) == expected
+
+
+@pytest.mark.parametrize("pattern, line", [
+    (r"(?x)ab cd", "abcd = 1"),
+    (r"(?i)FOOABAR", "value = 'fooAbar'"),
+    (r"(?i)ſtream", "stream = open(path)"),
+])
+def test_inline_flags_still_match(index, pattern, line):
+    index.update_file("c.py", line + "\n")
+    assert ("c.py", 1, line) in index.search(pattern, regex=True)
@@ -0,0 +1,58 @@
+"""
+Tests of helpers.context_selector: BM25 ranking, with and without NumPy.
+"""
+
+import pytest
+
+import helpers.context_selector as context_selector
+from helpers.context_selector import BM25ContextSelector, split_into_chunks
+
+SOURCES = {
+    "tools.py": "def get_schemas(tools):\n    return [tool.schema for tool in tools]\n\n"
+                "def run_tool(tool, arguments):\n    return tool(**arguments)\n",
+    "history.py": "class ChatHistory:\n    def fork(self):\n        return ChatHistory()\n\n"
+                  "    def append_message(self, message):\n        self.messages.append(message)\n",
+    "notes.md": "The tool list holds schemas of every tool.\n",
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def selector(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(context_selector, "_numpy", lambda: None)
+    chunks = [chunk for path, text in SOURCES.items() for chunk in split_into_chunks(path, text)]
+    return BM25ContextSelector(chunks)
+
+
+def test_rank_puts_the_best_chunk_first(selector):
+    ranked = selector.rank("run_tool with arguments")
+    assert selector.chunks[ranked[0]].path == "tools.py"
+    scores = selector.score("run_tool with arguments")
+    assert sorted(scores) == sorted(ranked)
+    assert [scores[chunk_id] for chunk_id in ranked] == sorted(scores.values(), reverse=True)
+
+
+def test_unknown_terms_match_nothing(selector):
+    assert selector.rank("zebra") == [] and selector.score("zebra") == {}
+
+
+def test_select_skips_overlapping_chunks(selector):
+    selected = selector.select("fork the chat history", token_budget=1000, top_k=5)
+    assert selected[0].path == "history.py"
+    assert not any(chunk.path == "history.py" and chunk.name == "" for chunk in selected[1:])
+
+
+def test_numpy_and_python_scores_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    chunks = [chunk for path, text in SOURCES.items() for chunk in split_into_chunks(path, text)]
+    vectorized = BM25ContextSelector(chunks).score("tool schemas tool")
+    monkeypatch.setattr(context_selector, "_numpy", lambda: None)
+    plain = BM25ContextSelector(chunks).score("tool schemas tool")
+    assert vectorized.keys() == plain.keys()
+    assert all(abs(vectorized[key] - plain[key]) < 1e-9 for key in plain)
+
+
+def test_empty_index(selector):
+    assert BM25ContextSelector([]).rank("anything") == []
@@ -0,0 +1,58 @@
+"""
+Tests of ChatManager.get_responses and adopt_branch: every choice of an n-way
+request is followed in its own branch.
+"""
+
+from chat_manager import APIResponse, ChatManager
+from models import Config, Model
+from tests.fake_client import FakeAuth, completion, message, tool_call
+
+
+def lookup(city: str) -> str:
+    """Return the weather of a city."""
+    return f"sunny in {city}"
+
+
+def two_way(request, call):
+    if call == 1:
+        return completion(message(tool_calls=[tool_call("lookup", {"city": "Rome"})]),
+                          message("it is probably sunny"))
+    return completion(message(f"after the tool: {request['messages'][-1]['content']}"))
+
+
+def roles(history):
+    return [item["role"] if isinstance(item, dict) else item.role for item in history.messages()]
+
+
+def test_split_choices():
+    raw_api_response = completion(message("first"), message("second"))
+    responses = APIResponse.split_choices(raw_api_response)
+    assert [response.choice_index for response in responses] == [0, 1]
+    assert [response.get_content() for response in responses] == ["first", "second"]
+
+
+def test_branches_are_independent():
+    auth = FakeAuth(two_way)
+    manager = ChatManager(auth)
+    manager.send_message("weather in Rome?")
+    chatbot = (Config(), Model().set_model_type("gpt-4o-mini").set_tool(lookup))
+    answers = manager.get_responses(chatbot, 2)
+
+    assert "after the tool: sunny in Rome" in answers[0] and "it is probably sunny" in answers[1]
+    assert auth.calls[0]["n"] == 2 and "n" not in auth.calls[1]
+    assert roles(manager.chat_history) == ["user"]
+    assert roles(manager.branches[0].chat_history) == ["user", "assistant", "tool", "assistant"]
+    assert roles(manager.branches[1].chat_history) == ["user", "assistant"]
+    assert manager.last_responses[1].get_content() == "it is probably sunny"
+
+
+def test_adopt_branch_switches_the_history():
+    manager = ChatManager(FakeAuth(two_way))
+    manager.send_message("weather in Rome?")
+    manager.get_responses((Config(), Model().set_model_type("gpt-4o-mini").set_tool(lookup)), 2)
+
+    manager.adopt_branch(1)
+    assert manager.last_response is manager.last_responses[1]
+    manager.send_message("thanks")
+    assert roles(manager.chat_history) == ["user", "assistant", "user"]
+    assert roles(manager.branches[0].chat_history) == ["user", "assistant", "tool", "assistant"]
@@ -0,0 +1,76 @@
+"""
+Tests of chat_manager.hedging: slow requests are duplicated, failed ones are not.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from chat_manager import HedgePolicy, RunBudget
+
+CHATBOT = (None, SimpleNamespace(model_type="gpt-4o-mini"))
+
+
+@pytest.fixture
+def policy():
+    with HedgePolicy(min_samples=1, min_delay=0.05) as policy:
+        policy.tracker.record("gpt-4o-mini", 0.05)
+        yield policy
+
+
+def test_fast_failures_are_not_hedged(policy):
+    calls = []
+
+    def send(chatbot):
+        calls.append(chatbot)
+        raise PermissionError("invalid api key")
+
+    with pytest.raises(PermissionError):
+        policy.call(send, CHATBOT)
+    assert len(calls) == 1 and policy.hedges_sent == 0
+
+
+def test_slow_requests_are_hedged(policy):
+    calls = []
+
+    def send(chatbot):
+        calls.append(chatbot)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    assert policy.call(send, CHATBOT) == "fast"
+    assert policy.hedges_sent == 1 and policy.hedges_won == 1
+
+
+def test_close_stops_the_executor():
+    policy = HedgePolicy()
+    policy.close()
+    with pytest.raises(RuntimeError):
+        policy._executor.submit(print)
+
+
+def test_the_losing_request_is_charged(policy):
+    budget = RunBudget()
+    calls = []
+    loser_done = threading.Event()
+
+    def send(chatbot):
+        calls.append(chatbot)
+        if len(calls) == 1:
+            time.sleep(0.3)
+            loser_done.set()
+            return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=50))
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+
+    winner = policy.call(send, CHATBOT, budget=budget)
+    assert winner.usage.prompt_tokens == 10
+    loser_done.wait(2)
+    deadline = time.monotonic() + 2
+    while budget.turns_used == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The caller records the winner; the policy records the loser.
+    assert (budget.turns_used, budget.tokens_used) == (1, 150)
@@ -0,0 +1,51 @@
+"""
+Tests of chat_manager.history_compactor: originals are archived before they
+are replaced by summaries, and are never replaced if the archive fails.
+"""
+
+import chat_manager.history_compactor as history_compactor
+from chat_manager import ChatHistory, HistoryCompactor
+
+
+def compactor(tmp_path, **options):
+    return HistoryCompactor(summarize=lambda text: f"summary of {len(text)} chars",
+                            threshold_tokens=100, keep_recent=1, min_chars=100,
+                            archive_dir=str(tmp_path / "archive"), **options)
+
+
+def long_history():
+    return ChatHistory(history=[{"role": "user", "content": "read the project"},
+                                {"role": "tool", "tool_call_id": "call_1", "content": "x" * 2000},
+                                {"role": "user", "content": "now fix it"}])
+
+
+def compact(compactor, history):
+    compactor.poll(history)
+    compactor.wait()
+    return compactor.poll(history)
+
+
+def test_archive_and_restore(tmp_path):
+    archive = compactor(tmp_path)
+    message = {"role": "tool", "tool_call_id": "call_1", "content": "x" * 2000}
+    archive_id = archive.archive(message)
+    assert archive.load_original(archive_id) == message
+    assert archive.retrieve_archived(archive_id) == "x" * 2000
+    assert archive.retrieve_archived("missing").startswith("Error")
+
+
+def test_compaction_replaces_long_messages(tmp_path):
+    archive, history = compactor(tmp_path), long_history()
+    assert compact(archive, history) == 1
+    summary = history.messages()[1]
+    assert summary["tool_call_id"] == "call_1" and summary["content"].startswith("[Compacted tool message")
+    archive_id = summary["content"].split("archived as ")[1].split("]")[0]
+    assert archive.retrieve_archived(archive_id) == "x" * 2000
+
+
+def test_failed_archive_keeps_the_original(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_compactor, "safe_write_file", lambda content, path: False)
+    archive, history = compactor(tmp_path), long_history()
+    assert archive.archive({"role": "user", "content": "text"}) is None
+    assert compact(archive, history) == 0
+    assert history.messages()[1]["content"] == "x" * 2000
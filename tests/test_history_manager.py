@@ -0,0 +1,55 @@
+"""
+Tests of chat_manager.history_manager: forked histories share their prefix
+copy-on-write.
+"""
+
+from chat_manager import ChatHistory
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+def contents(history):
+    return [message["content"] for message in history.messages()]
+
+
+def test_appending_to_a_fork_leaves_the_others_unchanged():
+    parent = ChatHistory(history=[user("a"), user("b")])
+    first, second = parent.fork(), parent.fork()
+    first.history.append(user("first"))
+    second.history.append(user("second"))
+    parent.history.append(user("parent"))
+
+    assert contents(parent) == ["a", "b", "parent"]
+    assert contents(first) == ["a", "b", "first"]
+    assert contents(second) == ["a", "b", "second"]
+    assert first.prefix is second.prefix and len(first) == 3
+
+
+def test_forks_of_forks_share_every_segment():
+    parent = ChatHistory(history=[user("a")])
+    child = parent.fork()
+    child.history.append(user("b"))
+    grandchild = child.fork()
+    grandchild.history.append(user("c"))
+    assert contents(grandchild) == ["a", "b", "c"]
+    assert grandchild.prefix.parent is parent.prefix
+    assert list(reversed(list(grandchild.iter_reversed()))) == grandchild.messages()
+
+
+def test_replace_messages_on_a_fork_keeps_the_shared_prefix():
+    parent = ChatHistory(history=[user("a"), user("b")])
+    fork, sibling = parent.fork(), parent.fork()
+    original = fork.messages()[0]
+
+    assert fork.replace_messages({0: (original, user("summary of a"))}) == 1
+    assert contents(fork) == ["summary of a", "b"]
+    assert contents(parent) == ["a", "b"] and contents(sibling) == ["a", "b"]
+    assert parent.prefix.messages[0] is original
+
+
+def test_stale_replacements_are_skipped():
+    history = ChatHistory(history=[user("a")])
+    assert history.replace_messages({0: (user("a"), user("summary"))}) == 0
+    assert contents(history) == ["a"]
@@ -0,0 +1,94 @@
+"""
+Tests of council.job_queue: leases, expiry, heartbeats, retries with backoff,
+dead letters and requeueing.
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from council.job_queue import DEAD, DONE, LEASED, QUEUED, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), retry_delay=10.0)
+
+
+def available_at(queue, job_id):
+    with sqlite3.connect(queue.path) as connection:
+        return connection.execute("SELECT available_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_lease_gives_each_job_to_one_worker(queue):
+    first = queue.enqueue("chat", {"prompt": "a"})
+    second = queue.enqueue("chat", {"prompt": "b"})
+    leased = [queue.lease("w1"), queue.lease("w2"), queue.lease("w3")]
+    assert [job.id for job in leased[:2]] == [first, second] and leased[2] is None
+    assert leased[0].payload == {"prompt": "a"} and leased[0].status == LEASED and leased[0].attempts == 1
+    assert queue.complete(first, "w1", {"answer": "A"})
+    assert queue.get(first).status == DONE and queue.get(first).result == {"answer": "A"}
+    assert queue.counts() == {QUEUED: 0, LEASED: 1, DONE: 1, DEAD: 0}
+
+
+def test_delayed_jobs_wait(queue):
+    queue.enqueue("chat", {}, delay=60.0)
+    assert queue.lease("w1") is None
+
+
+def test_an_expired_lease_is_leased_again(queue):
+    job_id = queue.enqueue("chat", {})
+    queue.lease("w1", visibility_timeout=0.0)
+    time.sleep(0.01)
+    job = queue.lease("w2")
+    assert job.id == job_id and job.worker == "w2" and job.attempts == 2
+
+
+def test_a_worker_that_lost_its_lease_is_told_so(queue):
+    job_id = queue.enqueue("chat", {})
+    queue.lease("w1", visibility_timeout=0.0)
+    time.sleep(0.01)
+    queue.lease("w2")
+    assert not queue.heartbeat(job_id, "w1")
+    assert not queue.report_progress(job_id, "w1", 0.5)
+    assert not queue.complete(job_id, "w1", "late")
+    assert queue.fail(job_id, "w1", "late") is None
+    assert queue.heartbeat(job_id, "w2") and queue.report_progress(job_id, "w2", 0.5, "half")
+    assert (queue.get(job_id).progress, queue.get(job_id).note) == (0.5, "half")
+
+
+def test_failed_jobs_are_retried_with_a_doubling_delay(queue):
+    job_id = queue.enqueue("chat", {}, max_attempts=3)
+    delays = []
+    for attempt in range(2):
+        queue.lease("w1")
+        before = time.time()
+        assert queue.fail(job_id, "w1", "boom") == QUEUED
+        delays.append(available_at(queue, job_id) - before)
+        assert queue.lease("w1") is None
+        # Make the job available without waiting for its delay.
+        with sqlite3.connect(queue.path) as connection:
+            connection.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    assert delays[0] == pytest.approx(10.0, abs=1.0) and delays[1] == pytest.approx(20.0, abs=1.0)
+
+
+def test_jobs_out_of_attempts_are_dead_lettered_and_requeued(queue):
+    job_id = queue.enqueue("chat", {}, max_attempts=1)
+    queue.lease("w1")
+    assert queue.fail(job_id, "w1", "boom") == DEAD
+    assert [job.id for job in queue.dead_letters()] == [job_id] and queue.get(job_id).error == "boom"
+    assert queue.lease("w1") is None
+
+    assert queue.requeue(job_id, max_attempts=2)
+    assert not queue.requeue(job_id)
+    job = queue.lease("w1")
+    assert job.id == job_id and job.attempts == 1 and job.max_attempts == 2
+
+
+def test_an_expired_lease_out_of_attempts_is_dead_lettered(queue):
+    job_id = queue.enqueue("chat", {}, max_attempts=1)
+    queue.lease("w1", visibility_timeout=0.0)
+    time.sleep(0.01)
+    assert queue.lease("w2") is None
+    assert queue.get(job_id).status == DEAD and queue.get(job_id).error == "the lease expired"
@@ -0,0 +1,63 @@
+"""
+Tests of helpers.json_codec: every installed backend encodes like the
+standard library, and tool results that cannot be encoded do not break the
+tool loop.
+"""
+
+import importlib.util
+
+import pytest
+
+from chat_manager import ChatManager
+from helpers.json_codec import JSONCodec, get_codec
+from models import Config, Model
+from tests.fake_client import FakeAuth, completion, message, tool_call
+
+BACKENDS = [pytest.param(name, marks=pytest.mark.skipif(importlib.util.find_spec(name) is None,
+                                                        reason=f"{name} is not installed"))
+            for name in ("orjson", "msgspec")] + ["json"]
+
+VALUES = [
+    {"b": 1, "a": [1.5, "é", None, True]},
+    2 ** 70,
+    [-(2 ** 65), {"wide": 2 ** 64}],
+    float("nan"),
+    {"scores": [float("inf"), -float("inf"), 0.25]},
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("value", VALUES, ids=repr)
+def test_backends_encode_like_the_standard_library(backend, value):
+    codec, reference = get_codec(backend), JSONCodec()
+    assert codec.dumps(value) == reference.dumps(value)
+    assert codec.canonical(value) == reference.canonical(value)
+
+
+def huge_number() -> str:
+    """Return a number wider than 64 bits."""
+    return 2 ** 70
+
+
+def looping() -> str:
+    """Return a list that contains itself."""
+    items = []
+    items.append(items)
+    return items
+
+
+@pytest.mark.parametrize("function, expected", [(huge_number, str(2 ** 70)), (looping, "[[...]]")])
+def test_unencodable_tool_results_reach_the_model(function, expected):
+    def script(request, call):
+        if call == 1:
+            return completion(message(tool_calls=[tool_call(function.__name__, {})]))
+        return completion(message("done"))
+
+    auth = FakeAuth(script)
+    model = Model().set_model_type("gpt-4o-mini").set_tool(function)
+    manager = ChatManager(auth)
+    manager.send_message("go")
+    manager.get_response((Config(), model))
+
+    tool_message = next(item for item in auth.calls[1]["messages"] if isinstance(item, dict) and item.get("role") == "tool")
+    assert tool_message["content"] == expected
@@ -0,0 +1,104 @@
+"""
+Tests of helpers.json_stream and ChatManager.stream_json.
+"""
+
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from chat_manager import ChatManager
+from helpers.json_stream import DOCUMENT, IncrementalJSONParser, StreamValidationError
+from models import Config, Model
+from tests.fake_client import FakeAuth
+
+
+def random_value(generator: random.Random, depth: int = 0):
+    kind = generator.choice(["int", "float", "str", "bool", "null", "list", "dict"] if depth < 4
+                            else ["int", "str", "bool"])
+    if kind == "int":
+        return generator.randint(-10 ** 6, 10 ** 6)
+    if kind == "float":
+        return generator.uniform(-1e3, 1e3)
+    if kind == "str":
+        return "".join(generator.choice('ab "\\\n\té€😀{}[],:') for _ in range(generator.randint(0, 12)))
+    if kind == "bool":
+        return generator.random() < 0.5
+    if kind == "null":
+        return None
+    if kind == "list":
+        return [random_value(generator, depth + 1) for _ in range(generator.randint(0, 4))]
+    return {f"k{index}": random_value(generator, depth + 1) for index in range(generator.randint(0, 4))}
+
+
+def feed_in_chunks(parser, text: str, generator: random.Random):
+    events = []
+    position = 0
+    while position < len(text):
+        size = generator.randint(1, 8)
+        events.extend(parser.feed(text[position:position + size]))
+        position += size
+    return events + parser.finish()
+
+
+def test_chunked_round_trip():
+    generator = random.Random(7)
+    for _ in range(500):
+        document = random_value(generator)
+        text = json.dumps(document, ensure_ascii=generator.random() < 0.5,
+                          indent=generator.choice([None, 2]))
+        events = feed_in_chunks(IncrementalJSONParser(), text, generator)
+        assert events[-1].kind == DOCUMENT and events[-1].value == document
+
+
+def test_top_level_number_is_validated():
+    parser = IncrementalJSONParser({"type": "string"})
+    assert parser.feed("12") == []
+    (event,) = parser.finish()
+    assert event.kind == DOCUMENT and event.value == 12 and not event.valid
+
+
+def test_strict_parser_raises_on_the_first_violation():
+    parser = IncrementalJSONParser({"type": "object", "properties": {"age": {"type": "integer"}}}, strict=True)
+    with pytest.raises(StreamValidationError):
+        parser.feed('{"age": "old"')
+
+
+def test_incomplete_document():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": [1, 2')
+    with pytest.raises(ValueError):
+        parser.finish()
+
+
+def stream(*pieces):
+    """
+    Returns a streaming script yielding (choice index, text) pieces.
+    """
+    def script(request, call):
+        chunks = [SimpleNamespace(usage=None, choices=[SimpleNamespace(index=index, delta=SimpleNamespace(content=text))])
+                  for index, text in pieces]
+        chunks.append(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=3, completion_tokens=4), choices=[]))
+        return iter(chunks)
+    return script
+
+
+def test_stream_json_follows_the_first_choice():
+    auth = FakeAuth(stream((0, '{"a": '), (1, '{"b": '), (0, '1}'), (1, '2}')))
+    manager = ChatManager(auth)
+    manager.send_message("give me json")
+    events = list(manager.stream_json((Config().set_n(2), Model().set_model_type("gpt-4o-mini"))))
+    assert events[-1].value == {"a": 1}
+    assert "n" not in auth.calls[0]
+    assert manager.last_response.get_content() == '{"a": 1}'
+    assert manager.chat_history.messages()[-1] is manager.last_response.get_api_message()
+
+
+def test_stream_json_reports_errors_of_a_trailing_number():
+    model = Model().set_model_type("gpt-4o-mini").set_response_format(
+        {"type": "json_schema", "json_schema": {"name": "answer", "schema": {"type": "string"}}})
+    manager = ChatManager(FakeAuth(stream((0, "4"), (0, "2"))))
+    manager.send_message("give me json")
+    (event,) = list(manager.stream_json((Config(), model)))
+    assert event.value == 42 and event.errors
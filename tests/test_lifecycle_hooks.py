@@ -0,0 +1,54 @@
+"""
+Tests of chat_manager.lifecycle_hooks as driven by ChatManager.get_response.
+"""
+
+import pytest
+
+from chat_manager import ChatManager, HookRegistry
+from chat_manager.lifecycle_hooks import RUN_FINISHED, RUN_STARTED
+from models import Config, Model
+from tests.fake_client import FakeAuth, completion, message
+
+
+@pytest.fixture
+def chatbot():
+    return Config(), Model().set_model_type("gpt-4o-mini")
+
+
+def finished_events(script):
+    events = []
+    hooks = HookRegistry().on(RUN_STARTED, events.append).on(RUN_FINISHED, events.append)
+    manager = ChatManager(FakeAuth(script)).set_hooks(hooks)
+    manager.send_message("hello")
+    return manager, events
+
+
+def test_run_finished_ignores_an_outer_exception(chatbot):
+    manager, events = finished_events(lambda request, call: completion(message("hi")))
+    try:
+        raise KeyError("unrelated")
+    except KeyError:
+        manager.get_response(chatbot)
+    assert events[-1].name == RUN_FINISHED and events[-1].details["error"] is None
+
+
+def test_run_finished_reports_the_run_error(chatbot):
+    def fail(request, call):
+        raise ConnectionError("lost")
+
+    manager, events = finished_events(fail)
+    with pytest.raises(ConnectionError):
+        manager.get_response(chatbot)
+    assert events[-1].details["error"] == "lost"
+
+
+def test_runs_keep_their_own_number_and_timing(chatbot):
+    manager, events = finished_events(lambda request, call: completion(message("hi")))
+    manager.get_response(chatbot)
+    manager.send_message("again")
+    manager.get_response(chatbot)
+    started = [event for event in events if event.name == RUN_STARTED]
+    finished = [event for event in events if event.name == RUN_FINISHED]
+    assert [event.run for event in started] == [event.run for event in finished]
+    assert started[0].run != started[1].run
+    assert all(event.seconds >= 0 for event in finished)
@@ -0,0 +1,76 @@
+"""
+Tests of chat_manager.logprob_analytics: scores of ragged batches, answers
+without logprobs and top-k alternatives.
+"""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chat_manager.logprob_analytics import LogprobBatch  # noqa: E402
+
+
+def choice(content, logprobs=None, top=None):
+    tokens = None
+    if logprobs is not None:
+        tokens = [{"logprob": value, "top_logprobs": [{"logprob": alternative} for alternative in (top or [])[index]]
+                   if top else []}
+                  for index, value in enumerate(logprobs)]
+    return {"message": {"content": content}, "logprobs": {"content": tokens} if tokens is not None else None}
+
+
+def response(*choices):
+    return {"choices": list(choices)}
+
+
+def test_ragged_lengths_and_missing_logprobs():
+    batch = LogprobBatch.from_responses(
+        [response(choice("Paris", [math.log(0.5), math.log(0.5)]), choice("paris.", [math.log(0.8)])),
+         response(choice("Lyon"))],
+        labels=["sampled", "reasoning"])
+    assert batch.labels == ["sampled:0", "sampled:1", "reasoning"]
+    assert batch.lengths.tolist() == [2, 1, 0]
+    assert batch.mask.tolist() == [[True, True], [True, False], [False, False]]
+
+    confidence = batch.confidence()
+    assert confidence[:2] == pytest.approx([0.5, 0.8])
+    assert math.isnan(confidence[2])
+    assert batch.min_confidence()[:2] == pytest.approx([0.5, 0.8]) and math.isnan(batch.min_confidence()[2])
+    with pytest.raises(ValueError):
+        batch.entropy()
+
+
+def test_entropy_and_margin_with_top_k():
+    top = [[math.log(0.5), math.log(0.5)], [math.log(0.9), math.log(0.1), -math.inf]]
+    batch = LogprobBatch.from_responses([response(choice("a", [math.log(0.5), math.log(0.9)], top))])
+    assert batch.top_logprobs.shape == (1, 2, 3)
+
+    uniform = math.log(2)
+    skewed = -(0.9 * math.log(0.9) + 0.1 * math.log(0.1))
+    assert batch.entropy()[0] == pytest.approx((uniform + skewed) / 2)
+    assert batch.margin()[0] == pytest.approx((0.0 + 0.8) / 2)
+    assert set(batch.scores()) == {"confidence", "min_confidence", "agreement", "tokens", "entropy", "margin"}
+
+
+def test_agreement_and_weighted_vote():
+    batch = LogprobBatch.from_responses([response(
+        choice("Paris", [math.log(0.6)]),
+        choice("paris!", [math.log(0.6)]),
+        choice("Lyon", [math.log(0.95)]),
+        choice("", [math.log(0.99)]),
+    )])
+    assert batch.agreement().tolist() == pytest.approx([1 / 3, 1 / 3, 0.0, 0.0])
+
+    answer, share = batch.weighted_vote()
+    assert answer == "Paris" and share == pytest.approx(1.2 / 2.15)
+    assert batch.weighted_vote(weights=[0.1, 0.1, 1.0, 1.0])[0] == "Lyon"
+
+    rows = batch.table()
+    assert rows[0]["label"] == "0:0" and rows[0]["tokens"] == 1
+
+
+def test_a_batch_without_votes():
+    batch = LogprobBatch.from_responses([response(choice(""))])
+    assert batch.weighted_vote() == (None, 0.0)
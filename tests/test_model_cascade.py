@@ -0,0 +1,55 @@
+"""
+Tests of models.model_cascade: stages escalate until one is confident, and
+the last stage is never scored.
+"""
+
+from chat_manager import ChatManager
+from models import CascadeStage, Config, ConfidenceScorer, LogprobScorer, Model, ModelCascade
+from tests.fake_client import FakeAuth, completion, message
+
+
+class CountingScorer(ConfidenceScorer):
+    def __init__(self, score: float) -> None:
+        self.value = score
+        self.calls = 0
+
+    def score(self, manager, chatbot) -> float:
+        self.calls += 1
+        return self.value
+
+
+def cascade(scorer):
+    stages = [CascadeStage(name, Model().set_model_type(name), Config(), 0.8) for name in ("small", "large")]
+    return ModelCascade(stages, scorer)
+
+
+def run(cascade):
+    auth = FakeAuth(lambda request, call: completion(message(f"answer of {request['model']}")))
+    manager = ChatManager(auth)
+    manager.send_message("question")
+    return cascade.run(manager), auth
+
+
+def test_the_last_stage_is_not_scored():
+    scorer = CountingScorer(0.1)
+    chain = cascade(scorer)
+    answer, auth = run(chain)
+    assert "answer of large" in answer
+    assert scorer.calls == 1 and len(auth.calls) == 2
+    assert chain.last_trace == [("small", 0.1, False), ("large", None, True)]
+
+
+def test_a_confident_stage_stops_the_cascade():
+    scorer = CountingScorer(0.9)
+    chain = cascade(scorer)
+    answer, auth = run(chain)
+    assert "answer of small" in answer and len(auth.calls) == 1
+    assert chain.last_trace == [("small", 0.9, True)]
+
+
+def test_logprobs_are_not_sent_to_reasoning_models():
+    chain = ModelCascade.from_presets(scorer=LogprobScorer())
+    params = {stage.model.model_type: chain.scorer.prepare(stage.config, stage.model).get_params()
+              for stage in chain.stages}
+    assert params["gpt-4o-mini"]["logprobs"] is True
+    assert not params["o3-mini"].get("logprobs")
@@ -0,0 +1,25 @@
+"""
+Tests of models.model_config_adapter: adapted configs are filtered by the
+capability registry and never shared between callers.
+"""
+
+from models import Config, ConfigAdapter, Model
+
+
+def test_adapt_drops_unsupported_params():
+    config = Config().set_temperature(0.3).set_reasoning_effort("low")
+    adapted = ConfigAdapter.adapt(config, Model().set_model_type("gpt-4o-mini"))
+    assert adapted.get_params().get("temperature") == 0.3
+    assert "reasoning_effort" not in adapted.get_params()
+
+
+def test_adapted_configs_are_independent():
+    config = Config().set_temperature(0.3).set_metadata({"team": "a"})
+    model = Model().set_model_type("gpt-4o-mini")
+    first = ConfigAdapter.adapt(config, model)
+    first.set_temperature(1.2)
+    first.metadata["team"] = "b"
+    second = ConfigAdapter.adapt(config, model)
+    assert second is not first
+    assert second.temperature == 0.3
+    assert second.metadata == {"team": "a"}
@@ -0,0 +1,37 @@
+"""
+Tests of tools.model_tool: a run's remaining time only shortens the limits
+of isolated tools.
+"""
+
+from tools import ModelTool
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+
+
+class RecordingSandbox:
+    def __init__(self, default_timeout):
+        self.default_timeout = default_timeout
+        self.timeouts = []
+
+    def run(self, function, arguments, timeout=None, tool_name=None):
+        self.timeouts.append(timeout)
+        return function(**arguments)
+
+
+def test_remaining_time_never_extends_the_tool_timeout():
+    sandbox = RecordingSandbox(default_timeout=30.0)
+    tool = ModelTool().set_function(add).set_isolated(sandbox, timeout=5.0)
+    tool.call_function({"a": 1, "b": 2}, timeout=60.0)
+    tool.call_function({"a": 1, "b": 2}, timeout=2.0)
+    tool.call_function({"a": 1, "b": 2})
+    assert sandbox.timeouts == [5.0, 2.0, 5.0]
+
+
+def test_sandbox_default_applies_without_a_tool_timeout():
+    sandbox = RecordingSandbox(default_timeout=30.0)
+    tool = ModelTool().set_function(add).set_isolated(sandbox)
+    tool.call_function({"a": 1, "b": 2}, timeout=60.0)
+    assert sandbox.timeouts == [30.0]
@@ -0,0 +1,17 @@
+"""
+Tests of helpers.utils.pack_project_structure: split files stay within the budget.
+"""
+
+from helpers.utils import pack_project_structure
+
+
+def test_parts_fit_the_budget():
+    # Counting characters makes every header digit and newline count.
+    content = "".join(f"line {index:03d}\n" for index in range(2000))
+    project = {"files": {"big.py": content}}
+    chunks = pack_project_structure(project, 120, token_counter=len)
+
+    assert len(chunks) >= 100
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert f"(part {len(chunks)}/{len(chunks)})" in chunks[-1]
+    assert "".join(chunk.split("\n", 2)[2][:-1] for chunk in chunks) == content
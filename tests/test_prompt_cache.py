@@ -0,0 +1,91 @@
+"""
+Tests of chat_manager.prompt_cache: near-duplicate prompts are served, prompts
+asking something different are not, and requests with different context do
+not share answers.
+"""
+
+import pytest
+
+from chat_manager.prompt_cache import PromptCache, content_tokens, normalize_prompt
+from models import Config, Model
+
+
+@pytest.fixture
+def chatbot():
+    return Config(), Model().set_model_type("gpt-4o-mini")
+
+
+@pytest.fixture
+def cache():
+    return PromptCache()
+
+
+def test_normalize_folds_case_whitespace_and_trailing_punctuation():
+    assert normalize_prompt("  What is   the capital of France?? ") == "what is the capital of france"
+
+
+@pytest.mark.parametrize("first, second", [
+    ("What is 2+2?", "What is 2*2?"),
+    ("is x < 5", "is x > 5"),
+])
+def test_normalize_keeps_operators(first, second):
+    assert normalize_prompt(first) != normalize_prompt(second)
+
+
+def test_content_tokens_drop_stopwords_only():
+    assert content_tokens("what is the capital of france") == ("what", "capital", "of", "france")
+
+
+def test_exact_and_near_duplicate_hits(cache, chatbot):
+    cache.store("What is the capital of France?", chatbot, "Paris")
+    hit = cache.lookup("what is the capital of france", chatbot)
+    assert hit is not None and hit.answer == "Paris" and hit.similarity == 1.0
+    hit = cache.lookup("Tell me what is the capital of France?", chatbot)
+    assert hit is not None and hit.answer == "Paris" and hit.similarity < 1.0
+
+
+def test_lenient_threshold_serves_filler_variants(chatbot):
+    cache = PromptCache(threshold=0.5)
+    cache.store("What is the capital of France?", chatbot, "Paris")
+    assert cache.lookup("Please, what's the capital of France?", chatbot).answer == "Paris"
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What is 2+2?", "What is 2*2?"),
+    ("Is x < 5?", "Is x > 5?"),
+    ("What is the capital of Austria?", "What is the capital of Australia?"),
+    ("Convert 10 USD to EUR", "Convert 10 USD to GBP"),
+    ("Convert 10 USD to EUR", "Convert 100 USD to EUR"),
+])
+def test_different_questions_miss(cache, chatbot, cached, asked):
+    cache.store(cached, chatbot, "cached answer")
+    assert cache.lookup(asked, chatbot) is None
+
+
+def test_misses_even_with_a_lenient_threshold(chatbot):
+    cache = PromptCache(threshold=0.5)
+    cache.store("What is the capital of Austria?", chatbot, "Vienna")
+    assert cache.lookup("What is the capital of Australia?", chatbot) is None
+
+
+def test_scope_includes_the_developer_messages(cache, chatbot):
+    pirate = [{"role": "developer", "content": "Answer like a pirate."}]
+    formal = [{"role": "developer", "content": "Answer formally."}]
+    cache.store("Say hello", chatbot, "Ahoy!", pirate)
+    assert cache.lookup("Say hello", chatbot, formal) is None
+    assert cache.lookup("Say hello", chatbot, pirate).answer == "Ahoy!"
+
+
+def test_scope_includes_the_config(cache, chatbot):
+    cache.store("Say hello", chatbot, "Hello")
+    assert cache.lookup("Say hello", (Config().set_temperature(1.5), chatbot[1])) is None
+
+
+def test_save_and_load(tmp_path, cache, chatbot):
+    cache.store("What is 2+2?", chatbot, "4")
+    path = str(tmp_path / "cache.json")
+    assert cache.save(path)
+    loaded = PromptCache()
+    assert loaded.load(path) == 1
+    assert loaded.lookup("what is 2+2", chatbot).answer == "4"
+    assert loaded.lookup("what is 2*2", chatbot) is None
@@ -0,0 +1,128 @@
+"""
+Tests of chat_manager.responses_backend as driven by ChatManager: only the
+new messages are uploaded, expired chains are resent in full, and the history
+can go on through Chat Completions.
+"""
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from chat_manager import ChatManager
+from models import Config, Model
+from tests.fake_client import completion, message
+
+_ids = itertools.count()
+
+
+def text_response(text):
+    return SimpleNamespace(
+        id=f"resp_{next(_ids)}", model="gpt-4o-mini",
+        output=[SimpleNamespace(type="message", content=[SimpleNamespace(type="output_text", text=text)])],
+        usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+
+
+def call_response(name, arguments):
+    return SimpleNamespace(
+        id=f"resp_{next(_ids)}", model="gpt-4o-mini",
+        output=[SimpleNamespace(type="function_call", call_id=f"call_{next(_ids)}", name=name, arguments=arguments)],
+        usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+
+
+class Expired(Exception):
+    status_code = 404
+
+
+class FakeResponsesAuth:
+    """
+    A client answering Responses API requests with `script(request, call_number)`,
+    and Chat Completions requests with a fixed answer.
+    """
+
+    def __init__(self, script):
+        self.responses_calls = []
+        self.completions_calls = []
+
+        def create_response(**request):
+            self.responses_calls.append(request)
+            return script(request, len(self.responses_calls))
+
+        def create_completion(**request):
+            self.completions_calls.append(request)
+            return completion(message("from chat completions"))
+
+        self._client = SimpleNamespace(responses=SimpleNamespace(create=create_response),
+                                       chat=SimpleNamespace(completions=SimpleNamespace(create=create_completion)))
+
+    def get_client(self):
+        return self._client
+
+
+def lookup(city: str) -> str:
+    """Return the weather of a city."""
+    return f"sunny in {city}"
+
+
+@pytest.fixture
+def chatbot():
+    return Config(), Model().set_model_type("gpt-4o-mini").set_tool(lookup)
+
+
+def test_only_new_messages_are_sent(chatbot):
+    def script(request, call):
+        return call_response("lookup", '{"city": "Paris"}') if call == 1 else text_response(f"answer {call}")
+
+    auth = FakeResponsesAuth(script)
+    manager = ChatManager(auth).use_responses_api()
+    manager.send_message("weather in Paris?")
+    manager.get_response(chatbot)
+    manager.send_message("and tomorrow?")
+    manager.get_response(chatbot)
+
+    first, tool_turn, second = auth.responses_calls
+    assert "previous_response_id" not in first and first["store"] is True
+    assert [item.get("role") for item in first["input"]] == ["user"]
+    assert tool_turn["previous_response_id"].startswith("resp_")
+    assert [item["type"] for item in tool_turn["input"]] == ["function_call_output"]
+    assert tool_turn["input"][0]["output"] == "sunny in Paris"
+    assert second["input"] == [{"role": "user", "content": "and tomorrow?"}]
+    assert manager.responses_backend.resends == 0
+
+
+def test_an_expired_chain_resends_the_whole_history(chatbot):
+    def script(request, call):
+        if call == 2:
+            raise Expired("previous_response not found")
+        return text_response(f"answer {call}")
+
+    auth = FakeResponsesAuth(script)
+    manager = ChatManager(auth).use_responses_api()
+    manager.send_message("first")
+    manager.get_response(chatbot)
+    manager.send_message("second")
+    manager.get_response(chatbot)
+
+    resent = auth.responses_calls[2]
+    assert "previous_response_id" not in resent
+    assert [item["content"] for item in resent["input"]] == ["first", "answer 1", "second"]
+    assert manager.responses_backend.resends == 1
+
+
+def test_switching_back_to_chat_completions(chatbot):
+    def script(request, call):
+        return call_response("lookup", '{"city": "Oslo"}') if call == 1 else text_response("done")
+
+    auth = FakeResponsesAuth(script)
+    manager = ChatManager(auth).use_responses_api()
+    manager.send_message("weather in Oslo?")
+    manager.get_response(chatbot)
+    manager.use_responses_api(False)
+    manager.send_message("thanks")
+    manager.get_response(chatbot)
+
+    # The request holds the history list itself, which the answer was appended to since.
+    sent = auth.completions_calls[0]["messages"][:5]
+    assert all(isinstance(item, dict) for item in sent)
+    assert sent[1]["tool_calls"][0]["function"] == {"name": "lookup", "arguments": '{"city": "Oslo"}'}
+    assert [item["role"] for item in sent] == ["user", "assistant", "tool", "assistant", "user"]
@@ -0,0 +1,56 @@
+"""
+Tests of chat_manager.run_budget: budgets spawned for concurrent runs share
+the limits of their parent.
+"""
+
+from types import SimpleNamespace
+
+from chat_manager import RunBudget
+
+
+def response(tokens: int):
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=tokens, completion_tokens=0))
+
+
+def test_children_charge_the_parent():
+    parent = RunBudget(max_turns=3, max_total_tokens=1000)
+    children = [parent.spawn() for _ in range(3)]
+    for child in children:
+        child.record(response(100), "gpt-4o-mini")
+    assert parent.turns_used == 3 and parent.tokens_used == 300
+    assert all(child.exhausted() for child in children)
+    assert "3 turns" in children[0].exhaustion_reason()
+
+
+def test_children_share_the_remaining_limit():
+    parent = RunBudget(max_total_tokens=500)
+    first, second = parent.spawn(), parent.spawn()
+    first.record(response(400), "gpt-4o-mini")
+    assert not second.exhausted()
+    second.record(response(100), "gpt-4o-mini")
+    assert first.exhausted() and second.exhausted()
+
+
+def test_cancelling_a_child_stops_that_child_only():
+    parent = RunBudget()
+    first, second = parent.spawn(), parent.spawn()
+    first.cancel()
+    assert first.exhausted() and not second.exhausted() and not parent.exhausted()
+    parent.cancel()
+    assert second.exhausted() and not second.allows_final_answer()
+
+
+def test_absorb_ignores_spawned_children():
+    parent = RunBudget()
+    child = parent.spawn()
+    child.record(response(10), "gpt-4o-mini")
+    parent.absorb(child)
+    assert parent.turns_used == 1 and parent.tokens_used == 10
+
+
+def test_add_usage_charges_the_parent():
+    parent = RunBudget(max_cost=1.0)
+    child = parent.spawn()
+    child.add_usage(2, 300, 1.5)
+    assert (parent.turns_used, parent.tokens_used, parent.cost_used) == (2, 300, 1.5)
+    assert child.exhausted()
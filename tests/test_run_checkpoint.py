@@ -0,0 +1,99 @@
+"""
+Tests of chat_manager.run_checkpoint and ChatManager.resume.
+"""
+
+import pytest
+
+from chat_manager import ChatManager, RunCheckpointer
+from chat_manager.run_checkpoint import ACTION, RESPONSE
+from models import Config, Model
+from tests.fake_client import FakeAuth, completion, message, tool_call
+
+
+def add(a: int, b: int) -> int:
+    """
+    Adds two integers.
+
+    Args:
+        a (int): The first integer.
+        b (int): The second integer.
+    """
+    return a + b
+
+
+def tool_script(request, call):
+    """
+    Calls `add` once, then answers with the tool result.
+    """
+    last = request["messages"][-1]
+    if isinstance(last, dict) and last.get("role") == "tool":
+        return completion(message("The sum is " + last["content"]))
+    return completion(message(None, [tool_call("add", {"a": 2, "b": 3})]))
+
+
+@pytest.fixture
+def chatbot():
+    return Config(), Model().set_model_type("gpt-4o-mini").set_tools([add])
+
+
+def test_start_replaces_an_existing_run(tmp_path, chatbot):
+    checkpointer = RunCheckpointer(str(tmp_path), durable=False)
+    manager = ChatManager(FakeAuth(tool_script)).set_checkpointer(checkpointer)
+    manager.send_message("add 2 and 3")
+    manager.get_response(chatbot, run_id="run")
+    manager.send_message("add them again")
+    manager.get_response(chatbot, run_id="run")
+    state = checkpointer.load("run")
+    assert state.done and state.turns == 2 and len(state.messages) == 8
+    assert sum('"kind"' not in line for line in checkpointer.path_of("run").read_text().splitlines()) == 1
+
+
+def test_load_restarts_at_a_header_line(tmp_path):
+    checkpointer = RunCheckpointer(str(tmp_path), durable=False)
+    path = checkpointer.path_of("run")
+    tmp_path.mkdir(exist_ok=True)
+    path.write_text('{"run_id": "run", "model_type": "m", "messages": [{"role": "user", "content": "a"}]}\n'
+                    '{"kind": "response", "new_messages": [{"role": "assistant", "content": "b"}]}\n'
+                    '{"run_id": "run", "model_type": "m", "messages": [{"role": "user", "content": "c"}]}\n')
+    state = checkpointer.load("run")
+    assert state.kind is None and state.messages == [{"role": "user", "content": "c"}]
+
+
+def test_resume_runs_pending_tool_calls(tmp_path, chatbot):
+    checkpointer = RunCheckpointer(str(tmp_path), durable=False)
+
+    def crash_after_first_response(request, call):
+        if call == 2:
+            raise ConnectionError("lost")
+        return tool_script(request, call)
+
+    manager = ChatManager(FakeAuth(crash_after_first_response)).set_checkpointer(checkpointer)
+    manager.send_message("add 2 and 3")
+    with pytest.raises(ConnectionError):
+        manager.get_response(chatbot, run_id="run")
+    assert checkpointer.load("run").kind == ACTION
+
+    auth = FakeAuth(tool_script)
+    resumed = ChatManager(auth).set_checkpointer(checkpointer)
+    assert "The sum is 5" in resumed.resume("run", chatbot)
+    assert len(auth.calls) == 1
+    assert checkpointer.load("run").done
+
+
+def test_resume_ignores_and_cuts_a_torn_last_line(tmp_path, chatbot):
+    checkpointer = RunCheckpointer(str(tmp_path), durable=False)
+    manager = ChatManager(FakeAuth(tool_script)).set_checkpointer(checkpointer)
+    manager.send_message("add 2 and 3")
+    manager.get_response(chatbot, run_id="run")
+    path = checkpointer.path_of("run")
+    lines = path.read_text().splitlines(keepends=True)
+    # Keep the response checkpoint, tear the action checkpoint.
+    path.write_text("".join(lines[:2]) + lines[2][:len(lines[2]) // 2])
+    assert checkpointer.load("run").kind == RESPONSE
+
+    auth = FakeAuth(tool_script)
+    resumed = ChatManager(auth).set_checkpointer(checkpointer)
+    assert "The sum is 5" in resumed.resume("run", chatbot)
+    assert len(auth.calls) == 1
+    state = checkpointer.load("run")
+    assert state.done and [item["role"] for item in state.messages] == ["user", "assistant", "tool", "assistant"]
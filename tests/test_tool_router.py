@@ -0,0 +1,59 @@
+"""
+Tests of tools.tool_router: the keyword router follows retagged tools.
+"""
+
+from tools import KeywordRouter, ModelTool, ModelToolList, ToolRoutingContext
+
+
+def read_file(path: str) -> str:
+    """Return the content of a file."""
+    return ""
+
+
+def send_mail(to: str) -> str:
+    """Deliver a message."""
+    return ""
+
+
+def tools_list():
+    tools = ModelToolList()
+    tools.add_tool(ModelTool().set_function(read_file).set_tags(["disk"]))
+    tools.add_tool(ModelTool().set_function(send_mail).set_tags(["email"]))
+    return tools.set_router(KeywordRouter())
+
+
+def test_keyword_router_selects_by_tag():
+    tools = tools_list()
+    context = ToolRoutingContext(user_message="check the disk")
+    assert [schema["function"]["name"] for schema in tools.get_schemas(context)] == ["read_file"]
+
+
+def test_keyword_router_follows_retagged_tools():
+    tools = tools_list()
+    context = ToolRoutingContext(user_message="check the archive")
+    # No tool matches yet, so every tool is sent.
+    assert len(tools.get_schemas(context)) == 2
+
+    tools.get_tool_by_name("send_mail").set_tags(["archive"])
+    assert [schema["function"]["name"] for schema in tools.get_schemas(context)] == ["send_mail"]
+
+
+
+def read_file_lines(path: str, first: int, last: int) -> str:
+    """Return some lines of a file."""
+    return ""
+
+
+read_file_lines.__name__ = "read_file"
+
+
+def test_schema_caches_follow_redefined_tools():
+    tools = tools_list()
+    context = ToolRoutingContext(user_message="check the disk")
+    tools.get_all_schemas()
+    tools.get_schemas(context)
+
+    tools.get_tool_by_name("read_file").set_function(read_file_lines)
+    assert "first" in tools.get_all_schemas()[0]["function"]["parameters"]["properties"]
+    [schema] = tools.get_schemas(context)
+    assert "first" in schema["function"]["parameters"]["properties"]
@@ -0,0 +1,67 @@
+"""
+Tests of tools.tool_sandbox: timeouts and crashes are reported as tool errors,
+and a call survives the timeout of another call running in the same pool.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from tools import ToolExecutionError, ToolSandbox, ToolTimeoutError
+
+
+def nap(seconds: float) -> str:
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+def crash() -> None:
+    os._exit(1)
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = ToolSandbox(max_workers=2, max_calls_per_worker=2, default_timeout=10.0).warm_up()
+    yield sandbox
+    sandbox.shutdown()
+
+
+def test_timeout(sandbox):
+    with pytest.raises(ToolTimeoutError) as raised:
+        sandbox.run(nap, {"seconds": 5}, timeout=0.2)
+    assert raised.value.to_dict()["type"] == "Timeout"
+    assert sandbox.run(nap, {"seconds": 0}) == "slept 0"
+
+
+def test_crash(sandbox):
+    with pytest.raises(ToolExecutionError) as raised:
+        sandbox.run(crash, {})
+    assert raised.value.error_type == "WorkerCrashed"
+    assert sandbox.run(nap, {"seconds": 0}) == "slept 0"
+
+
+def test_a_call_survives_another_call_timing_out(sandbox):
+    result = {}
+
+    def bystander():
+        result["value"] = sandbox.run(nap, {"seconds": 1.0}, timeout=20)
+
+    thread = threading.Thread(target=bystander)
+    thread.start()
+    time.sleep(0.3)
+    with pytest.raises(ToolTimeoutError):
+        sandbox.run(nap, {"seconds": 30}, timeout=0.2)
+    thread.join(30)
+    assert result["value"] == "slept 1.0"
+
+
+def test_workers_are_recycled(sandbox):
+    pids = [sandbox.run(worker_pid, {}) for _ in range(8)]
+    # Two workers serving at most two calls each cannot answer eight calls alone.
+    assert len(set(pids)) > 2
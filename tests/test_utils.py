@@ -0,0 +1,35 @@
+"""
+Tests of helpers.utils: atomic writes keep the modes a plain write would give.
+"""
+
+import os
+import stat
+
+import pytest
+
+from helpers.utils import safe_write_file
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+
+
+def mode_of(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_files_follow_the_umask(tmp_path):
+    previous = os.umask(0o027)
+    try:
+        assert safe_write_file("data", str(tmp_path / "new.txt"))
+    finally:
+        os.umask(previous)
+    assert mode_of(tmp_path / "new.txt") == 0o640
+
+
+def test_replaced_files_keep_their_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    os.chmod(path, 0o750)
+    assert safe_write_file("new", str(path))
+    assert path.read_text() == "new" and mode_of(path) == 0o750
+    assert [entry.name for entry in tmp_path.iterdir()] == ["script.sh"]
+
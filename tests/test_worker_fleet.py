@@ -0,0 +1,42 @@
+"""
+Tests of council.worker_fleet: jobs run in spawned worker processes and their
+results and errors are written back to the queue.
+"""
+
+from council.job_queue import DEAD, DONE, JobQueue
+from council.worker_fleet import WorkerFleet
+
+
+def no_auth():
+    return None
+
+
+def shout(payload, context):
+    context.report(0.5, "halfway")
+    return {"text": payload["text"].upper(), "worker": context.worker}
+
+
+def explode(payload, context):
+    raise RuntimeError("boom")
+
+
+def test_fleet_round_trip(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path, retry_delay=0.0)
+    fleet = WorkerFleet(path, processes=2, auth_factory=no_auth, poll_interval=0.05)
+    fleet.set_handler("shout", shout).set_handler("explode", explode)
+    done = [queue.enqueue("shout", {"text": f"job {index}"}) for index in range(4)]
+    failed = queue.enqueue("explode", {}, max_attempts=2)
+    unknown = queue.enqueue("missing", {}, max_attempts=1)
+
+    with fleet:
+        results = [queue.wait_for(job_id, timeout=60, poll_interval=0.05) for job_id in done]
+        dead = [queue.wait_for(job_id, timeout=60, poll_interval=0.05) for job_id in (failed, unknown)]
+    assert fleet.alive() == 0
+
+    assert [job.status for job in results] == [DONE] * 4
+    assert [job.result["text"] for job in results] == [f"JOB {index}" for index in range(4)]
+    assert all(job.progress == 1.0 for job in results)
+    assert [job.status for job in dead] == [DEAD, DEAD]
+    assert dead[0].attempts == 2 and dead[0].error == "RuntimeError: boom"
+    assert "No handler" in dead[1].error
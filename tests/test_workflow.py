@@ -0,0 +1,74 @@
+"""
+Tests of council.workflow: node fingerprints change with everything the
+output of a function node depends on.
+"""
+
+from council.workflow import WorkflowNode
+
+SUFFIX = "!"
+
+
+def shout(text):
+    return text.upper() + SUFFIX
+
+
+def fingerprint(function, version=None):
+    return WorkflowNode("node", function=function, version=version).fingerprint()
+
+
+def define(source: str, namespace=None):
+    namespace = {"__name__": "tests.test_workflow", **(namespace or {})}
+    exec(source, namespace)
+    return namespace["step"]
+
+
+def test_equal_definitions_have_equal_fingerprints():
+    source = "def step(text):\n    return text + ' done'\n"
+    assert fingerprint(define(source)) == fingerprint(define(source))
+
+
+def test_constants_change_the_fingerprint():
+    first = define("def step(text):\n    return text + ' done'\n")
+    second = define("def step(text):\n    return text + ' ended'\n")
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_defaults_change_the_fingerprint():
+    first = define("def step(text, suffix='a'):\n    return text + suffix\n")
+    second = define("def step(text, suffix='b'):\n    return text + suffix\n")
+    third = define("def step(text, *, suffix='c'):\n    return text + suffix\n")
+    assert fingerprint(first) != fingerprint(second) != fingerprint(third) != fingerprint(first)
+
+
+def test_closure_variables_change_the_fingerprint():
+    def make(suffix):
+        def step(text):
+            return text + suffix
+        return step
+    assert fingerprint(make("a")) != fingerprint(make("b"))
+    assert fingerprint(make("a")) == fingerprint(make("a"))
+
+
+def test_nested_code_changes_the_fingerprint():
+    first = define("def step(items):\n    return [item * 2 for item in items]\n")
+    second = define("def step(items):\n    return [item * 3 for item in items]\n")
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_called_helpers_change_the_fingerprint():
+    source = "def step(text):\n    return helper(text)\n"
+    first = define(source, {"helper": define("def step(text):\n    return text.upper()\n")})
+    second = define(source, {"helper": define("def step(text):\n    return text.lower()\n")})
+    assert fingerprint(first) != fingerprint(second)
+
+
+def test_module_constants_and_version_change_the_fingerprint():
+    global SUFFIX
+    before = fingerprint(shout)
+    SUFFIX = "?"
+    try:
+        assert fingerprint(shout) != before
+    finally:
+        SUFFIX = "!"
+    assert fingerprint(shout) == before
+    assert fingerprint(shout, version="2") != before
@@ -1,3 +1,6 @@
-from .schema_helpers import function_to_schema, python_type_to_json_type 
+from .schema_helpers import function_to_schema, python_type_to_json_type, python_type_to_json_schema
+from .argument_validator import ToolArgumentError, compile_validator
+from .tool_sandbox import ToolSandbox, ToolExecutionError, ToolTimeoutError
 from .model_tool import ModelTool 
+from .tool_router import ToolRouter, ToolRoutingContext, TagRouter, LastToolRouter, KeywordRouter, CompositeRouter
 from .model_tool_list import ModelToolList
@@ -0,0 +1,346 @@
+"""
+Module: tools.argument_validator
+Description:
+    This module checks and coerces the arguments a model sends to a tool before
+    the tool runs. The type hints of the tool function are compiled once, when
+    the tool is registered, into a tree of small closures; validating a call is
+    then a walk over the decoded JSON with no further introspection.
+
+    Coercions are limited to lossless fixes of common model mistakes: integral
+    floats and numeric strings for int, numbers for float, "true"/"false" for
+    bool, values or names for Enum members and objects for dataclasses.
+    A Union first tries the members the JSON value already matches (an
+    integer for int before str), and coerces only if none accepts it.
+    Anything else is rejected with a ToolArgumentError naming the offending
+    argument path, which is sent back to the model as the tool result.
+
+Classes:
+    ToolArgumentError:
+        Raised when the arguments of a tool call do not match its signature.
+
+Functions:
+    compile_validator:
+        Compiles the validator of a tool function.
+"""
+
+import collections.abc
+import dataclasses
+import enum
+import inspect
+import pathlib
+import types
+import typing
+from typing import Any, Callable, Dict, get_type_hints
+
+Converter = Callable[[Any, str], Any]
+
+
+class ToolArgumentError(ValueError):
+    """
+    Raised when the arguments of a tool call do not match the tool's signature.
+    """
+
+
+def _fail(path: str, expected: str, value: Any) -> None:
+    raise ToolArgumentError(f"{path}: expected {expected}, got {value!r}")
+
+
+def _convert_any(value: Any, path: str) -> Any:
+    return value
+
+
+def _convert_str(value: Any, path: str) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    _fail(path, "a string", value)
+
+
+def _convert_path(value: Any, path: str) -> pathlib.Path:
+    return pathlib.Path(_convert_str(value, path))
+
+
+def _convert_int(value: Any, path: str) -> int:
+    if isinstance(value, bool):
+        _fail(path, "an integer", value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    _fail(path, "an integer", value)
+
+
+def _convert_float(value: Any, path: str) -> float:
+    if isinstance(value, bool):
+        _fail(path, "a number", value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    _fail(path, "a number", value)
+
+
+def _convert_bool(value: Any, path: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    _fail(path, "a boolean", value)
+
+
+def _convert_none(value: Any, path: str) -> None:
+    if value is not None:
+        _fail(path, "null", value)
+    return None
+
+
+def _match_score(py_type: Any) -> Callable[[Any], int]:
+    """
+    Compile a type hint into a function scoring how well a JSON value matches
+    it without coercion: 2 for the exact type, 1 for a compatible one (an
+    integer for float, anything for Any), 0 if the value needs coercion.
+
+    :param py_type: The type hint.
+    :return: The scoring function.
+    """
+    origin = typing.get_origin(py_type)
+    args = typing.get_args(py_type)
+
+    def of_types(*json_types: type) -> Callable[[Any], int]:
+        def score(value: Any) -> int:
+            return 2 if isinstance(value, json_types) and not (isinstance(value, bool) and bool not in json_types) \
+                else 0
+        return score
+
+    if py_type is Any or py_type is inspect.Parameter.empty:
+        return lambda value: 1
+    if py_type is None or py_type is type(None):
+        return lambda value: 2 if value is None else 0
+    if py_type is bool:
+        return of_types(bool)
+    if py_type is int:
+        return of_types(int)
+    if py_type is float:
+        return lambda value: 2 if isinstance(value, float) else \
+            1 if isinstance(value, int) and not isinstance(value, bool) else 0
+    if py_type in (str, pathlib.Path):
+        return of_types(str)
+    if origin is typing.Union or origin is types.UnionType:
+        scores = [_match_score(arg) for arg in args]
+        return lambda value: max(score(value) for score in scores)
+    if origin is typing.Literal:
+        return lambda value: 2 if any(value == choice and type(value) is type(choice) for choice in args) else 0
+    if isinstance(py_type, type) and issubclass(py_type, enum.Enum):
+        values = [member.value for member in py_type]
+        return lambda value: 2 if any(value == member and type(value) is type(member) for member in values) else 0
+    if (dataclasses.is_dataclass(py_type) and isinstance(py_type, type)) \
+            or origin in (dict, collections.abc.Mapping) or py_type is dict:
+        return of_types(dict)
+    if origin in (list, set, frozenset, tuple, collections.abc.Sequence, collections.abc.Set) \
+            or py_type in (list, set, frozenset, tuple):
+        return of_types(list, tuple)
+    return lambda value: 1
+
+
+def _compile_type(py_type: Any) -> Converter:
+    """
+    Compile a type hint into a converter called as converter(value, path).
+
+    :param py_type: The type hint.
+    :return: A function returning the coerced value or raising ToolArgumentError.
+    """
+    origin = typing.get_origin(py_type)
+    args = typing.get_args(py_type)
+
+    if py_type is Any or py_type is inspect.Parameter.empty:
+        return _convert_any
+    if py_type is None or py_type is type(None):
+        return _convert_none
+    if py_type is bool:
+        return _convert_bool
+    if py_type is int:
+        return _convert_int
+    if py_type is float:
+        return _convert_float
+    if py_type is str:
+        return _convert_str
+    if py_type is pathlib.Path:
+        return _convert_path
+
+    if origin is typing.Union or origin is types.UnionType:
+        nullable = type(None) in args
+        members = [(_match_score(arg), _compile_type(arg)) for arg in args if arg is not type(None)]
+
+        def convert_union(value: Any, path: str) -> Any:
+            if value is None and nullable:
+                return None
+            errors = []
+            # Members the value matches as is come first; the sort keeps the declaration order otherwise.
+            for _, member in sorted(members, key=lambda pair: -pair[0](value)):
+                try:
+                    return member(value, path)
+                except ToolArgumentError as error:
+                    errors.append(str(error))
+            raise ToolArgumentError(" or ".join(errors) if errors else f"{path}: unexpected {value!r}")
+
+        return convert_union
+
+    if origin is typing.Literal:
+        choices = list(args)
+
+        def convert_literal(value: Any, path: str) -> Any:
+            for choice in choices:
+                if value == choice or (isinstance(choice, enum.Enum) and value == choice.value):
+                    return choice
+            _fail(path, f"one of {choices!r}", value)
+
+        return convert_literal
+
+    if isinstance(py_type, type) and issubclass(py_type, enum.Enum):
+        enum_type = py_type
+
+        def convert_enum(value: Any, path: str) -> enum.Enum:
+            if isinstance(value, enum_type):
+                return value
+            try:
+                return enum_type(value)
+            except ValueError:
+                pass
+            if isinstance(value, str) and value in enum_type.__members__:
+                return enum_type[value]
+            _fail(path, f"one of {[member.value for member in enum_type]!r}", value)
+
+        return convert_enum
+
+    if dataclasses.is_dataclass(py_type) and isinstance(py_type, type):
+        data_type = py_type
+        field_hints = get_type_hints(data_type)
+        fields = {}
+        required = set()
+        for data_field in dataclasses.fields(data_type):
+            fields[data_field.name] = _compile_type(field_hints.get(data_field.name, Any))
+            if (data_field.default is dataclasses.MISSING
+                    and data_field.default_factory is dataclasses.MISSING):
+                required.add(data_field.name)
+
+        def convert_dataclass(value: Any, path: str) -> Any:
+            if isinstance(value, data_type):
+                return value
+            if not isinstance(value, dict):
+                _fail(path, f"an object for {data_type.__name__}", value)
+            return data_type(**_convert_fields(value, fields, required, path))
+
+        return convert_dataclass
+
+    if origin in (list, set, frozenset, collections.abc.Sequence, collections.abc.Set) \
+            or py_type in (list, set, frozenset):
+        item = _compile_type(args[0]) if args else _convert_any
+        container = set if set in (origin, py_type) or origin is collections.abc.Set else \
+            frozenset if frozenset in (origin, py_type) else list
+
+        def convert_sequence(value: Any, path: str) -> Any:
+            if not isinstance(value, (list, tuple)):
+                _fail(path, "an array", value)
+            return container(item(element, f"{path}[{index}]") for index, element in enumerate(value))
+
+        return convert_sequence
+
+    if origin is tuple or py_type is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            item = _compile_type(args[0])
+            items = None
+        else:
+            items = [_compile_type(arg) for arg in args] if args else None
+            item = _convert_any
+
+        def convert_tuple(value: Any, path: str) -> tuple:
+            if not isinstance(value, (list, tuple)):
+                _fail(path, "an array", value)
+            if items is None:
+                return tuple(item(element, f"{path}[{index}]") for index, element in enumerate(value))
+            if len(value) != len(items):
+                _fail(path, f"an array of {len(items)} items", value)
+            return tuple(convert(element, f"{path}[{index}]")
+                         for index, (convert, element) in enumerate(zip(items, value)))
+
+        return convert_tuple
+
+    if origin in (dict, collections.abc.Mapping) or py_type is dict:
+        key = _compile_type(args[0]) if len(args) == 2 else _convert_any
+        entry = _compile_type(args[1]) if len(args) == 2 else _convert_any
+
+        def convert_dict(value: Any, path: str) -> dict:
+            if not isinstance(value, dict):
+                _fail(path, "an object", value)
+            return {key(name, f"{path}.{name}"): entry(element, f"{path}.{name}")
+                    for name, element in value.items()}
+
+        return convert_dict
+
+    # Types the schema describes as plain strings are passed through untouched.
+    return _convert_any
+
+
+def _convert_fields(value: Dict[str, Any],
+                    fields: Dict[str, Converter],
+                    required: set,
+                    path: str) -> Dict[str, Any]:
+    """
+    Convert the members of an object, dropping nulls sent for optional members.
+    """
+    unknown = [name for name in value if name not in fields]
+    if unknown:
+        raise ToolArgumentError(f"{path}: unexpected argument(s) {unknown}")
+    missing = [name for name in required if name not in value]
+    if missing:
+        raise ToolArgumentError(f"{path}: missing required argument(s) {sorted(missing)}")
+
+    converted = {}
+    for name, element in value.items():
+        if element is None and name not in required:
+            # Strict schemas make optional members nullable: null means "use the default".
+            continue
+        converted[name] = fields[name](element, f"{path}.{name}")
+    return converted
+
+
+def compile_validator(func: Callable) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile the argument validator of a tool function.
+
+    The returned function takes the decoded JSON arguments of a tool call and
+    returns the keyword arguments to call `func` with, coerced to the annotated
+    types. Parameters without annotation accept any value.
+
+    :param func: The tool function.
+    :return: The validator.
+    :raises ToolArgumentError: (from the validator) if the arguments are invalid.
+    """
+    signature = inspect.signature(func)
+    type_hints = get_type_hints(func)
+    fields = {}
+    required = set()
+    for param_name, param in signature.parameters.items():
+        if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+            continue
+        fields[param_name] = _compile_type(type_hints.get(param_name, Any))
+        if param.default is inspect.Parameter.empty:
+            required.add(param_name)
+
+    name = getattr(func, "__name__", "tool")
+
+    def validate(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(f"{name}: expected an object of arguments, got {arguments!r}")
+        return _convert_fields(arguments, fields, required, name)
+
+    return validate
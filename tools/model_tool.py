@@ -1,5 +1,5 @@
 
-from tools import function_to_schema
+from tools import function_to_schema, compile_validator, ToolSandbox
 
 
 class ModelTool:
@@ -8,17 +8,48 @@ class ModelTool:
         self.tool_name: str = False
         self.tool_schema: dict = None
         self.tool_function: object = None
+        self.argument_validator = None
+        self.tags: set = set()
+        self.sandbox = None
+        self.timeout = None
         self.raw_last_answer = None
         self.last_answer = None
+        # Bumped whenever the name, schema or tags change; invalidates the router caches.
+        self.version = 0
         
     def set_function(self, external_function: object)-> None:
         self.tool_schema = function_to_schema(external_function)
+        # Compiled once here so every call only pays for the value checks.
+        self.argument_validator = compile_validator(external_function)
         self.tool_function = external_function
         self.tool_name = external_function.__name__
+        self.version += 1
         return self
     
-    def call_function(self, arguments: dict):
-        self.raw_last_answer = self.tool_function(**arguments)
+    def set_tags(self, tags: list) -> "ModelTool":
+        # Tags let a ToolRouter send this tool only with the requests that need it.
+        self.tags = set(tags)
+        self.version += 1
+        return self
+
+    def set_isolated(self, sandbox: ToolSandbox, timeout: float = None) -> "ModelTool":
+        # CPU-bound or untrusted tools run in the sandbox's worker processes, with a timeout.
+        self.sandbox = sandbox
+        self.timeout = timeout
+        return self
+
+    def call_function(self, arguments: dict, timeout: float = None):
+        # Raises ToolArgumentError before the tool runs if the arguments are malformed.
+        arguments = self.argument_validator(arguments)
+        if self.sandbox is not None:
+            # Raises ToolExecutionError (or ToolTimeoutError) if the isolated call fails.
+            # A run's remaining time may shorten the tool's own limits, never extend them.
+            limits = [limit for limit in (timeout, self.timeout, self.sandbox.default_timeout) if limit is not None]
+            self.raw_last_answer = self.sandbox.run(self.tool_function, arguments,
+                                                    timeout=min(limits) if limits else None,
+                                                    tool_name=self.tool_name)
+        else:
+            self.raw_last_answer = self.tool_function(**arguments)
         self.last_answer="You got the answer:"+str(self.raw_last_answer)+"now report it to the user"
         return self.raw_last_answer
     
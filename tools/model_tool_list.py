@@ -1,14 +1,43 @@
 
+from typing import Optional
 from tools import ModelTool
+from tools import ToolRouter, ToolRoutingContext
 
 class ModelToolList:
     """
     A container for ModelTool objects that prevents duplicate names,
     allows iteration, and supports name-based lookups.
+
+    The schema list sent with every request is cached and only rebuilt when
+    the set of tools changes (tracked by `version`) or one of the tools does
+    (tracked by the tools' own `version`). An optional ToolRouter
+    narrows the schemas sent with a request to the tools relevant to it.
     """
     def __init__(self):
         # Use a dict keyed by tool_name to prevent duplicates and allow quick lookup
         self._tools = {}
+        # Bumped on every change of the tool set; invalidates the schema caches.
+        self.version = 0
+        self._schemas_cache = None
+        self._routed_cache = {}
+        self._cached_tool_versions = None
+        self.router: Optional[ToolRouter] = None
+
+    def _invalidate(self) -> None:
+        self.version += 1
+        self._schemas_cache = None
+        self._routed_cache = {}
+
+    def _check_tool_versions(self) -> None:
+        """
+        Drops the schema caches if a tool was changed in place (e.g. `set_function`
+        called again on a registered tool).
+        """
+        versions = tuple(tool.version for tool in self._tools.values())
+        if versions != self._cached_tool_versions:
+            self._schemas_cache = None
+            self._routed_cache = {}
+            self._cached_tool_versions = versions
 
     def add_tool(self, tool: ModelTool) -> None:
         """
@@ -18,6 +47,23 @@ class ModelToolList:
         if tool.tool_name in self._tools:
             raise ValueError(f"Tool with name '{tool.tool_name}' already exists.")
         self._tools[tool.tool_name] = tool
+        self._invalidate()
+
+    def remove_tool(self, name: str) -> None:
+        """
+        Remove the ModelTool named `name`.
+        Raises a KeyError if no such tool is found.
+        """
+        del self._tools[name]
+        self._invalidate()
+
+    def set_router(self, router: Optional[ToolRouter]) -> "ModelToolList":
+        """
+        Set the ToolRouter used by `get_schemas`, or None to always send every tool.
+        """
+        self.router = router
+        self._routed_cache = {}
+        return self
 
     def get_tool_by_name(self, name: str) -> ModelTool:
         """
@@ -35,8 +81,34 @@ class ModelToolList:
     def get_all_schemas(self) -> list:
         """
         Return a list of the `tool_schema` dictionaries from all ModelTools.
+        The list is cached until the tool set changes and must not be mutated.
         """
-        return [tool.tool_schema for tool in self._tools.values()]
+        self._check_tool_versions()
+        if self._schemas_cache is None:
+            self._schemas_cache = [tool.tool_schema for tool in self._tools.values()]
+        return self._schemas_cache
+
+    def get_schemas(self, context: Optional[ToolRoutingContext] = None) -> list:
+        """
+        Return the `tool_schema` dictionaries to send with a request.
+
+        Without a router or a context, this is `get_all_schemas()`. Otherwise
+        the router selects the relevant tools; if it selects none, every tool
+        is sent so the model is never left without the tool it needs. Lists are
+        cached per selection until the tool set changes.
+        """
+        if self.router is None or context is None:
+            return self.get_all_schemas()
+
+        selected = frozenset(name for name in self.router.select(self, context) if name in self._tools)
+        if not selected:
+            return self.get_all_schemas()
+        self._check_tool_versions()
+        if selected not in self._routed_cache:
+            # Keep the registration order so equal selections give identical prompts.
+            self._routed_cache[selected] = [tool.tool_schema for name, tool in self._tools.items()
+                                            if name in selected]
+        return self._routed_cache[selected]
 
     def __iter__(self):
         """
@@ -49,8 +121,3 @@ class ModelToolList:
         Return the number of ModelTools in the container.
         """
         return len(self._tools)
-
-
-    
- 
- 
\ No newline at end of file
@@ -1,5 +1,10 @@
+import collections.abc
+import dataclasses
+import enum
 import inspect
 import json
+import pathlib
+import types
 import typing
 from typing import Any, Callable, Dict, Optional, get_type_hints
 
@@ -46,43 +51,170 @@ def function_to_schema(func: Callable) -> Dict[str, Any]:
         #   - default value (if any)
         #   - etc.
 
-        # Type hint
-        annotated_type = type_hints.get(param_name, Any)
-        # Convert Python type to JSON schema style string
-        json_type = python_type_to_json_type(annotated_type)
-
-        # Check if this param is required
-        has_default = (param.default != inspect.Parameter.empty)
-        if not has_default:
-            schema["function"]["parameters"]["required"].append(param_name)
+        # Type hint (unannotated parameters have always been described as strings)
+        annotated_type = type_hints.get(param_name, str)
+        # Convert Python type to a JSON schema
+        param_schema = python_type_to_json_schema(annotated_type)
 
         # Attempt to find a short description for this param from docstring
         # (In practice, you'd parse the docstring carefully; we'll skip that.)
         param_description = f"Parameter: {param_name}"
 
+        # Strict mode requires every parameter to be listed as required, so a
+        # parameter with a default is made nullable instead: null means "use the default".
+        has_default = (param.default != inspect.Parameter.empty)
+        if has_default:
+            param_schema = _nullable(param_schema)
+            param_description += f" (null for the default: {param.default!r})"
+        schema["function"]["parameters"]["required"].append(param_name)
+
         # Construct property definition
-        schema["function"]["parameters"]["properties"][param_name] = {
-            "type": json_type,
-            "description": param_description
-        }
+        param_schema["description"] = param_description
+        schema["function"]["parameters"]["properties"][param_name] = param_schema
 
-        # If you want to reflect param.default in the schema, you can do so here
-        # but your examples didn't do that explicitly.
+    # Free-form objects (e.g. Dict[str, int]) cannot be described in strict mode.
+    schema["function"]["strict"] = _is_strict_compatible(schema["function"]["parameters"])
 
     return schema
 
+def python_type_to_json_schema(py_type: Any) -> Dict[str, Any]:
+    """
+    Map a Python type hint to a JSON Schema.
+
+    Supported hints are str, int, float, bool, None, Any, pathlib.Path,
+    List/Sequence/Set/Tuple, Dict, Optional/Union, Literal, Enum subclasses
+    and dataclasses (nested arbitrarily). Anything else is described as a
+    string, as it always has been.
+
+    :param py_type: The type hint to convert.
+    :return: A JSON Schema dictionary.
+    """
+    origin = typing.get_origin(py_type)
+    args = typing.get_args(py_type)
+
+    if py_type is Any or py_type is inspect.Parameter.empty:
+        return {}
+    if py_type is None or py_type is type(None):
+        return {"type": "null"}
+    if py_type is bool:
+        return {"type": "boolean"}
+    if py_type is int:
+        return {"type": "integer"}
+    if py_type is float:
+        return {"type": "number"}
+    if py_type is str or py_type is pathlib.Path:
+        return {"type": "string"}
+
+    if origin is typing.Union or origin is types.UnionType:
+        members = []
+        for arg in args:
+            member = python_type_to_json_schema(arg)
+            if member not in members:
+                members.append(member)
+        if len(members) == 1:
+            return members[0]
+        simple = [member.get("type") for member in members]
+        if all(isinstance(t, str) and len(member) == 1 for t, member in zip(simple, members)):
+            return {"type": simple}
+        return {"anyOf": members}
+
+    if origin is typing.Literal:
+        values = [arg.value if isinstance(arg, enum.Enum) else arg for arg in args]
+        literal_types = {python_type_to_json_schema(type(value)).get("type") for value in values}
+        schema = {"enum": values}
+        if len(literal_types) == 1:
+            schema["type"] = literal_types.pop()
+        return schema
+
+    if isinstance(py_type, type) and issubclass(py_type, enum.Enum):
+        values = [member.value for member in py_type]
+        value_types = {python_type_to_json_schema(type(value)).get("type") for value in values}
+        schema = {"enum": values}
+        if len(value_types) == 1:
+            schema["type"] = value_types.pop()
+        return schema
+
+    if dataclasses.is_dataclass(py_type) and isinstance(py_type, type):
+        field_hints = get_type_hints(py_type)
+        properties = {}
+        for data_field in dataclasses.fields(py_type):
+            field_schema = python_type_to_json_schema(field_hints.get(data_field.name, Any))
+            if (data_field.default is not dataclasses.MISSING
+                    or data_field.default_factory is not dataclasses.MISSING):
+                field_schema = _nullable(field_schema)
+            properties[data_field.name] = field_schema
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        }
+
+    if origin in (list, set, frozenset, collections.abc.Sequence, collections.abc.Set) \
+            or py_type in (list, set, frozenset):
+        items = python_type_to_json_schema(args[0]) if args else {}
+        return {"type": "array", "items": items}
+
+    if origin is tuple or py_type is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return {"type": "array", "items": python_type_to_json_schema(args[0])}
+        if args:
+            return {
+                "type": "array",
+                "prefixItems": [python_type_to_json_schema(arg) for arg in args],
+                "minItems": len(args),
+                "maxItems": len(args),
+            }
+        return {"type": "array"}
+
+    if origin in (dict, collections.abc.Mapping) or py_type is dict:
+        schema = {"type": "object"}
+        if len(args) == 2:
+            schema["additionalProperties"] = python_type_to_json_schema(args[1])
+        return schema
+
+    return {"type": "string"}
+
+
+def _nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of `schema` that also accepts null.
+    """
+    json_type = schema.get("type")
+    if not schema:
+        return schema
+    if isinstance(json_type, str) and set(schema) <= {"type", "description"}:
+        return {**schema, "type": [json_type, "null"]}
+    if isinstance(json_type, list) and set(schema) <= {"type", "description"}:
+        return {**schema, "type": json_type if "null" in json_type else json_type + ["null"]}
+    if "anyOf" in schema:
+        if {"type": "null"} in schema["anyOf"]:
+            return schema
+        return {**schema, "anyOf": schema["anyOf"] + [{"type": "null"}]}
+    return {"anyOf": [schema, {"type": "null"}]}
+
+
+def _is_strict_compatible(schema: Dict[str, Any]) -> bool:
+    """
+    Check that every object in `schema` lists its properties and forbids
+    additional ones, as strict structured outputs require.
+    """
+    if schema.get("type") == "object" or (isinstance(schema.get("type"), list) and "object" in schema["type"]):
+        if "properties" not in schema or schema.get("additionalProperties") is not False:
+            return False
+    if not schema:
+        return False
+    children = list(schema.get("properties", {}).values()) + schema.get("anyOf", []) \
+        + schema.get("prefixItems", [])
+    if isinstance(schema.get("items"), dict):
+        children.append(schema["items"])
+    return all(_is_strict_compatible(child) for child in children)
+
+
 def python_type_to_json_type(py_type: Any) -> Any:
     """
     Helper to map Python type hints to JSON Schema types.
-    This is simplistic. For more robust handling, check for
-    generics like Union, Optional, etc.
+    Hints without a single JSON type (e.g. Any) fall back to "string";
+    use python_type_to_json_schema for the full schema.
     """
-    if py_type == str:
-        return "string"
-    elif py_type == int or py_type == float:
-        return "number"
-    elif py_type == bool:
-        return "boolean"
-    # For Optional[...] or Union[..., None], you might return ["string", "null"], etc.
-    # For demonstration, keep it simple:
-    return "string"
+    return python_type_to_json_schema(py_type).get("type", "string")
@@ -0,0 +1,150 @@
+"""
+Module: tools.tool_router
+Description:
+    This module decides which tools are sent with a request. Every schema in the
+    `tools` parameter costs prompt tokens on every turn, so with many registered
+    tools it pays to send only the few that are relevant to the request.
+
+    A router receives the ModelToolList and a ToolRoutingContext (the latest user
+    message and the last tool the model called) and returns the names of the tools
+    to send. Routers are set on a ModelToolList with `set_router`.
+
+Classes:
+    ToolRoutingContext:
+        What a router knows about the current request.
+    ToolRouter:
+        The router interface.
+    TagRouter:
+        Selects the tools carrying given tags.
+    LastToolRouter:
+        Selects the last tool used and the tools sharing a tag with it.
+    KeywordRouter:
+        Selects the tools whose name or description shares words with the user message.
+    CompositeRouter:
+        Selects the union of what several routers select.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words too common in tool descriptions and requests to say anything about relevance.
+_STOP_WORDS = frozenset(
+    "a an and are as at be by can do for from get has have how i if in into is it its me my "
+    "no not of on or please return returns set that the this to use was what when which with "
+    "you your parameter args str int bool dict list none optional true false".split()
+)
+
+
+def _words(text: str) -> set:
+    """
+    Returns the set of meaningful lower-cased words of `text` (snake_case is split).
+    """
+    return {word for word in _WORD.findall(text.lower().replace("_", " ")) if word not in _STOP_WORDS}
+
+
+@dataclass
+class ToolRoutingContext:
+    """
+    What a router knows about the current request.
+
+    Attributes:
+        user_message (str): The latest user message of the conversation.
+        last_tool (Optional[str]): The name of the last tool the model called, if any.
+    """
+    user_message: str = ""
+    last_tool: Optional[str] = None
+
+
+class ToolRouter:
+    """
+    The router interface: `select` returns the names of the tools to send.
+    """
+
+    def select(self, tools_list: "ModelToolList", context: ToolRoutingContext) -> Iterable[str]:
+        """
+        Select the tools relevant to a request.
+
+        Args:
+            tools_list (ModelToolList): The registered tools.
+            context (ToolRoutingContext): The current request.
+
+        Returns:
+            Iterable[str]: The names of the selected tools.
+        """
+        raise NotImplementedError
+
+
+class TagRouter(ToolRouter):
+    """
+    Selects the tools carrying at least one of the given tags.
+    """
+
+    def __init__(self, tags: Iterable[str]) -> None:
+        self.tags = set(tags)
+
+    def select(self, tools_list, context):
+        return [tool.tool_name for tool in tools_list if tool.tags & self.tags]
+
+
+class LastToolRouter(ToolRouter):
+    """
+    Selects the last tool used and the tools sharing a tag with it, since a
+    model that just read a file is likely to search or write one next.
+    """
+
+    def select(self, tools_list, context):
+        last = tools_list.get_tool_by_name(context.last_tool) if context.last_tool else None
+        if last is None:
+            return []
+        return [tool.tool_name for tool in tools_list
+                if tool is last or tool.tags & last.tags]
+
+
+class KeywordRouter(ToolRouter):
+    """
+    Selects the tools whose name, tags or description share at least
+    `min_matches` words with the user message.
+
+    The words of every tool are computed once per version of the tool list
+    and of its tools, so retagging a tool takes effect on the next request.
+    """
+
+    def __init__(self, min_matches: int = 1) -> None:
+        self.min_matches = min_matches
+        self._version = None
+        self._tool_words = {}
+
+    def select(self, tools_list, context):
+        # Tool versions only grow, so their sum changes whenever a tool is retagged.
+        version = (id(tools_list), tools_list.version, sum(tool.version for tool in tools_list))
+        if self._version != version:
+            self._tool_words = {}
+            for tool in tools_list:
+                description = tool.tool_schema["function"].get("description", "")
+                self._tool_words[tool.tool_name] = (
+                    _words(tool.tool_name) | _words(" ".join(tool.tags)) | _words(description)
+                )
+            self._version = version
+
+        message_words = _words(context.user_message)
+        return [name for name, words in self._tool_words.items()
+                if len(words & message_words) >= self.min_matches]
+
+
+class CompositeRouter(ToolRouter):
+    """
+    Selects the union of the tools selected by several routers.
+    """
+
+    def __init__(self, *routers: ToolRouter) -> None:
+        self.routers = routers
+
+    def select(self, tools_list, context):
+        selected = []
+        for router in self.routers:
+            for name in router.select(tools_list, context):
+                if name not in selected:
+                    selected.append(name)
+        return selected
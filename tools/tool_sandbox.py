@@ -0,0 +1,278 @@
+"""
+Module: tools.tool_sandbox
+Description:
+    This module runs tools out of the chat process. A CPU-heavy or hung tool
+    called directly from `ClientAction.execute` blocks the whole conversation;
+    a tool marked as isolated (`ModelTool.set_isolated`) runs instead in a warm
+    pool of worker processes, with a timeout on every call.
+
+    When a call times out, it is cancelled if it has not started yet; otherwise
+    the worker processes are terminated and a fresh pool is started, since a
+    running Python function cannot be interrupted from outside. The other
+    calls that were running in the terminated pool did nothing wrong: they
+    are resubmitted to the fresh pool, within what is left of their own
+    timeout. Every worker is also replaced after a number of calls, so memory
+    leaked by a tool is returned to the system. Failures are raised as
+    ToolExecutionError, whose `to_dict()` is sent back to the model as a
+    structured error.
+
+    Isolated tools and their arguments and results must be picklable (module-
+    level functions, or bound methods of picklable objects). On Python 3.11+
+    the workers are started with "forkserver" (or "spawn"), which per-worker
+    recycling requires: the tools must then be importable by the workers.
+
+Classes:
+    ToolExecutionError:
+        A tool failed, crashed its worker or was cancelled.
+    ToolTimeoutError:
+        A tool did not finish within its timeout.
+    ToolSandbox:
+        The pool of worker processes.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    # multiprocessing is imported when the first pool starts, not with the package.
+    from concurrent.futures import ProcessPoolExecutor
+
+
+class ToolExecutionError(Exception):
+    """
+    A tool run in the sandbox failed, crashed its worker or was cancelled.
+
+    Attributes:
+        tool_name (str): The name of the tool.
+        error_type (str): The kind of failure (e.g. the tool's exception class name).
+        message (str): A description of the failure.
+    """
+
+    def __init__(self, tool_name: str, error_type: str, message: str) -> None:
+        super().__init__(f"{tool_name}: {error_type}: {message}")
+        self.tool_name = tool_name
+        self.error_type = error_type
+        self.message = message
+
+    def to_dict(self) -> Dict[str, str]:
+        """
+        Returns the error in the structure sent back to the model.
+        """
+        return {"tool": self.tool_name, "type": self.error_type, "message": self.message}
+
+
+class ToolTimeoutError(ToolExecutionError):
+    """
+    A tool run in the sandbox did not finish within its timeout.
+    """
+
+
+def _invoke(function: Callable, arguments: Dict[str, Any]) -> Any:
+    """
+    Runs a tool in a worker process.
+    """
+    return function(**arguments)
+
+
+def _terminate(pool: "ProcessPoolExecutor") -> None:
+    """
+    Shuts a pool down without waiting, killing its worker processes.
+    """
+    # ProcessPoolExecutor has no public way to stop a running task.
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class ToolSandbox:
+    """
+    A warm pool of worker processes running isolated tools with timeouts.
+
+    Attributes:
+        max_workers (int): The number of worker processes.
+        max_calls_per_worker (int): The number of calls after which a worker is replaced
+            (before Python 3.11, the whole pool after max_calls_per_worker * max_workers calls).
+        default_timeout (Optional[float]): The timeout, in seconds, of calls that do not set one.
+    """
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_calls_per_worker: int = 100,
+                 default_timeout: Optional[float] = 30.0) -> None:
+        """
+        Initializes the sandbox. Worker processes are started on first use or by `warm_up`.
+
+        Args:
+            max_workers (int): The number of worker processes.
+            max_calls_per_worker (int): The number of calls after which the workers are recycled.
+            default_timeout (Optional[float]): The default per-call timeout in seconds (None for no limit).
+        """
+        self.max_workers = max_workers
+        self.max_calls_per_worker = max_calls_per_worker
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._calls = 0
+        # The pool running every in-flight call.
+        self._in_flight: Dict[Future, "ProcessPoolExecutor"] = {}
+        # In-flight calls killed because another call of their pool timed out.
+        self._collateral: Set[Future] = set()
+
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        """
+        Returns the current pool, starting a new one if there is none or if the
+        current one has served its quota of calls. Must be called with the lock held.
+        """
+        recycles_workers = sys.version_info >= (3, 11)
+        if (self._pool is not None and not recycles_workers
+                and self._calls >= self.max_calls_per_worker * self.max_workers):
+            # In-flight calls finish in the old pool, whose workers then exit.
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            if recycles_workers:
+                import multiprocessing
+                # max_tasks_per_child cannot be used with forked workers.
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context(method),
+                                                 max_tasks_per_child=self.max_calls_per_worker)
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._calls = 0
+        return self._pool
+
+    def _submit(self, function: Callable, arguments: Dict[str, Any]) -> Future:
+        """
+        Submits a call to the current pool, replacing the pool if it is broken.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        with self._lock:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_invoke, function, arguments)
+            except BrokenProcessPool:
+                self._pool = None
+                pool = self._get_pool()
+                future = pool.submit(_invoke, function, arguments)
+            self._calls += 1
+            self._in_flight[future] = pool
+        return future
+
+    def warm_up(self) -> "ToolSandbox":
+        """
+        Starts the worker processes ahead of the first tool call.
+
+        Returns:
+            ToolSandbox: The current instance (for fluent chaining).
+        """
+        with self._lock:
+            pool = self._get_pool()
+        for future in [pool.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+        return self
+
+    def run(self,
+            function: Callable,
+            arguments: Dict[str, Any],
+            timeout: Optional[float] = None,
+            tool_name: Optional[str] = None) -> Any:
+        """
+        Runs `function(**arguments)` in a worker process.
+
+        Args:
+            function (Callable): The tool function (must be picklable).
+            arguments (Dict[str, Any]): The validated keyword arguments.
+            timeout (Optional[float]): The timeout in seconds; defaults to `default_timeout`.
+            tool_name (Optional[str]): The name reported in errors; defaults to the function name.
+
+        Returns:
+            Any: The result of the tool.
+
+        Raises:
+            ToolTimeoutError: If the call did not finish in time.
+            ToolExecutionError: If the tool raised, its worker crashed or the call was cancelled.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        tool_name = tool_name or getattr(function, "__name__", "tool")
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        future = self._submit(function, arguments)
+        while True:
+            try:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                return future.result(timeout=remaining)
+            except FutureTimeoutError:
+                if not future.cancel():
+                    self._kill(future)
+                raise ToolTimeoutError(tool_name, "Timeout", f"the tool did not finish within {timeout} seconds")
+            except BrokenProcessPool:
+                with self._lock:
+                    pool = self._in_flight.get(future)
+                    if self._pool is pool:
+                        self._pool = None
+                    collateral = future in self._collateral
+                    self._collateral.discard(future)
+                    self._in_flight.pop(future, None)
+                if not collateral:
+                    raise ToolExecutionError(tool_name, "WorkerCrashed",
+                                             "the worker process running the tool died or was cancelled")
+                # Killed because another call of the pool timed out: run it again.
+                future = self._submit(function, arguments)
+            except Exception as error:
+                if future.cancelled():
+                    raise ToolExecutionError(tool_name, "Cancelled", "the call was cancelled") from error
+                raise ToolExecutionError(tool_name, type(error).__name__, str(error)) from error
+            finally:
+                with self._lock:
+                    if future.done():
+                        self._in_flight.pop(future, None)
+                        self._collateral.discard(future)
+
+    def _kill(self, culprit: Future) -> None:
+        """
+        Terminates the pool running the timed-out call `culprit` and, if it is the
+        current pool, replaces it on next use. The other calls running in it are
+        marked for resubmission.
+        """
+        with self._lock:
+            pool = self._in_flight.pop(culprit, None)
+            if pool is None:
+                return
+            if self._pool is pool:
+                self._pool = None
+            self._collateral.update(future for future, owner in self._in_flight.items()
+                                    if owner is pool and not future.done())
+        _terminate(pool)
+
+    def cancel_all(self) -> None:
+        """
+        Cancels every in-flight call, killing the workers that run them.
+        Callers waiting in `run` receive a ToolExecutionError.
+        """
+        with self._lock:
+            pending = dict(self._in_flight)
+            if self._pool in pending.values():
+                self._pool = None
+        for future in pending:
+            future.cancel()
+        for pool in {id(pool): pool for future, pool in pending.items() if not future.done()}.values():
+            _terminate(pool)
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes, killing any call still running.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            _terminate(pool)